@@ -0,0 +1,17 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Punto de entrada del servicio de recordatorios: python -m notelite.reminderd
+"""
+
+import os
+import sys
+
+# Los módulos de NoteLite viven en src/ y se importan sin paquete
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from reminderd import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Manifiestos de archivos para NoteLite.
+Un manifiesto (ruta, tamaño, fecha de modificación, hash) de los archivos del
+usuario permite saber qué ha cambiado sin volver a leerlos: lo usan los
+respaldos (backup_store.py) y la sincronización (sync_engine.py).
+"""
+
+import os
+import hashlib
+
+
+def file_hash(path, block_size=1024 * 1024):
+    """Calcula el SHA-256 de un archivo leyéndolo por bloques."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_manifest(base_dir, roots, previous=None, on_file=None):
+    """
+    Construye el manifiesto de los archivos bajo base_dir/roots.
+
+    Solo se leen los archivos cuyo tamaño o fecha de modificación difieren
+    del manifiesto anterior; para el resto se reutiliza su hash, de modo que
+    el coste depende de lo que ha cambiado y no del tamaño de la colección.
+
+    Args:
+        base_dir: Directorio de datos (~/NoteLite)
+        roots: Subdirectorios a incluir
+        previous: Manifiesto anterior o None
+        on_file: Callback opcional on_file(bytes_leidos) tras cada archivo,
+            para informar del avance o limitar el ritmo
+
+    Returns:
+        Diccionario {ruta_relativa: {"size", "mtime", "hash"}}
+    """
+    previous = previous or {}
+    manifest = {}
+
+    for root in roots:
+        root_dir = os.path.join(base_dir, root)
+        if not os.path.isdir(root_dir):
+            continue
+
+        for dirpath, _, files in os.walk(root_dir):
+            for name in files:
+                path = os.path.join(dirpath, name)
+                rel_path = os.path.relpath(path, base_dir).replace(os.sep, "/")
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+
+                entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+                old = previous.get(rel_path)
+                read_bytes = 0
+                if old and old["size"] == entry["size"] and old["mtime"] == entry["mtime"]:
+                    entry["hash"] = old["hash"]
+                else:
+                    try:
+                        entry["hash"] = file_hash(path)
+                        read_bytes = entry["size"]
+                    except OSError as e:
+                        print(f"Error al leer {rel_path}: {e}")
+                        continue
+                manifest[rel_path] = entry
+
+                if on_file:
+                    on_file(read_bytes)
+
+    return manifest
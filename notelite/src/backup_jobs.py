@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Respaldos en segundo plano para NoteLite.
+Ejecuta los respaldos en un hilo propio, a ritmo limitado para no competir
+con la escritura, informando del avance con señales Qt y permitiendo
+cancelarlos.
+"""
+
+import threading
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from job_control import Throttle, JobCancelled
+
+
+class BackupJobRunner(QObject):
+    """
+    Ejecutor de respaldos en segundo plano.
+
+    Solo hay un trabajo a la vez: pedir otro mientras uno está en marcha no
+    hace nada. Las señales se emiten desde el hilo del trabajo, así que los
+    receptores de la interfaz las reciben encoladas en su propio hilo.
+    """
+
+    # Señales
+    backup_started = pyqtSignal()
+    backup_progress = pyqtSignal(str, int, int)  # fase ("scan"/"store"/"verify"), hechos, total
+    backup_finished = pyqtSignal(bool, str)  # éxito, mensaje
+    verify_finished = pyqtSignal(bool, str)  # sin errores, mensaje
+
+    # Límites por defecto: suficientes para respaldar sin que se note al escribir
+    DEFAULT_MAX_BYTES_PER_SECOND = 4 * 1024 * 1024
+    DEFAULT_CPU_FRACTION = 0.25
+
+    # La verificación tras cada respaldo va aún más despacio
+    VERIFY_CPU_FRACTION = 0.1
+
+    def __init__(self, backup_store, max_bytes_per_second=None, cpu_fraction=None):
+        """
+        Inicializa el ejecutor.
+
+        Args:
+            backup_store: Almacén de respaldos (BackupStore)
+            max_bytes_per_second: Límite de lectura y escritura (0 = sin límite)
+            cpu_fraction: Fracción de tiempo de CPU del trabajo (1 = sin límite)
+        """
+        super().__init__()
+        self.backup_store = backup_store
+        self.max_bytes_per_second = (self.DEFAULT_MAX_BYTES_PER_SECOND
+                                     if max_bytes_per_second is None else max_bytes_per_second)
+        self.cpu_fraction = (self.DEFAULT_CPU_FRACTION
+                             if cpu_fraction is None else cpu_fraction)
+
+        # Verificar los objetos que escribe cada respaldo al terminar
+        self.verify_after_backup = True
+        self.last_verify_report = None
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._throttle = None
+
+    @property
+    def compression_level(self):
+        """Nivel de compresión zlib de los objetos nuevos (0-9)."""
+        return self.backup_store.compression_level
+
+    @compression_level.setter
+    def compression_level(self, level):
+        self.backup_store.compression_level = max(0, min(9, int(level)))
+
+    def is_running(self):
+        """Indica si hay un respaldo en marcha."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def _new_throttle(self, throttled):
+        """Limitador para un trabajo nuevo, con los límites actuales o sin ellos."""
+        if not throttled:
+            return Throttle()
+        return Throttle(self.max_bytes_per_second or None,
+                        self.cpu_fraction if self.cpu_fraction < 1 else None)
+
+    def start(self, throttled=True):
+        """
+        Inicia un respaldo en segundo plano.
+
+        Args:
+            throttled: Si es False, el respaldo va a toda velocidad (por
+                ejemplo, uno pedido a mano antes de cerrar)
+
+        Returns:
+            True si se ha iniciado, False si ya había uno en marcha
+        """
+        with self._lock:
+            if self.is_running():
+                return False
+
+            self._throttle = self._new_throttle(throttled)
+            self._thread = threading.Thread(target=self._run, args=(self._throttle,), daemon=True)
+            self._thread.start()
+            return True
+
+    def run(self, throttled=False):
+        """
+        Ejecuta un respaldo en el hilo actual, emitiendo las mismas señales.
+
+        Returns:
+            Tupla (éxito, ID de la instantánea creada o None, o mensaje de error)
+        """
+        with self._lock:
+            if self.is_running():
+                return False, "Ya hay un respaldo en marcha"
+            self._throttle = self._new_throttle(throttled)
+            self._thread = threading.current_thread()
+        try:
+            ok, result, stored = self._run(self._throttle, verify=False)
+        finally:
+            self._thread = None
+
+        # La verificación no hace esperar a quien pidió el respaldo
+        if ok and result and self.verify_after_backup:
+            self.start_verification([result], stored)
+        return ok, result
+
+    def start_verification(self, snapshot_ids=None, stored=None):
+        """
+        Inicia en segundo plano, a baja prioridad, la verificación de las
+        instantáneas indicadas (por defecto, todas).
+
+        Args:
+            snapshot_ids: Instantáneas a verificar (por defecto, todas)
+            stored: Objetos escritos por un respaldo ({hash: ruta}); si se
+                indica, solo se comprueban esos en la instantánea indicada
+
+        Returns:
+            True si se ha iniciado, False si ya había un trabajo en marcha
+        """
+        with self._lock:
+            if self.is_running():
+                return False
+
+            self._throttle = Throttle(self.max_bytes_per_second or None, self.VERIFY_CPU_FRACTION)
+            self._thread = threading.Thread(target=self._verify,
+                                            args=(snapshot_ids, self._throttle, stored), daemon=True)
+            self._thread.start()
+            return True
+
+    def cancel(self):
+        """Pide la cancelación del respaldo en marcha (si lo hay)."""
+        if self._throttle is not None:
+            self._throttle.cancel()
+
+    def wait(self, timeout=None):
+        """Espera a que termine el respaldo en marcha."""
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        return not self.is_running()
+
+    def _run(self, throttle, verify=True):
+        """Cuerpo del trabajo: instantánea, retención, recolección de basura
+        y, si procede, verificación de lo que ha escrito el respaldo.
+
+        Returns:
+            Tupla (éxito, ID de la instantánea o None, o mensaje de error,
+            objetos escritos {hash: ruta})
+        """
+        self.backup_started.emit()
+        try:
+            snapshot_id, stored = self.backup_store.create_snapshot(
+                progress=self.backup_progress.emit, throttle=throttle)
+            throttle.pause()
+            self.backup_store.prune()
+        except JobCancelled:
+            self.backup_finished.emit(False, "Respaldo cancelado")
+            return False, "Respaldo cancelado", {}
+        except Exception as e:
+            self.backup_finished.emit(False, f"Error al crear respaldo: {str(e)}")
+            return False, str(e), {}
+
+        if snapshot_id is None:
+            self.backup_finished.emit(True, "Sin cambios desde el último respaldo")
+        else:
+            self.backup_finished.emit(True, f"Respaldo creado: {snapshot_id}")
+            if verify and self.verify_after_backup:
+                throttle.cpu_fraction = min(throttle.cpu_fraction or 1, self.VERIFY_CPU_FRACTION)
+                self._verify([snapshot_id], throttle, stored)
+        return True, snapshot_id, stored
+
+    def _verify(self, snapshot_ids, throttle, stored=None):
+        """Verifica instantáneas (o solo los objetos stored de una) y emite
+        verify_finished con el resultado."""
+        try:
+            if stored is not None:
+                report = self.backup_store.verify_stored(
+                    snapshot_ids[0], stored, workers=2,
+                    progress=self.backup_progress.emit, throttle=throttle)
+            else:
+                report = self.backup_store.verify(
+                    snapshot_ids, workers=2, progress=self.backup_progress.emit, throttle=throttle)
+        except JobCancelled:
+            self.verify_finished.emit(False, "Verificación cancelada")
+            return
+        except Exception as e:
+            self.verify_finished.emit(False, f"Error al verificar respaldos: {str(e)}")
+            return
+
+        self.last_verify_report = report
+        ok, message = describe_verify_report(report)
+        self.verify_finished.emit(ok, message)
+
+
+def describe_verify_report(report):
+    """
+    Resume un informe de verificación.
+
+    Returns:
+        Tupla (sin errores, mensaje)
+    """
+    problems = len(report["missing"]) + len(report["corrupt"]) + len(report["damaged_snapshots"])
+    if not problems:
+        return True, (f"Respaldos verificados: {report['snapshots']} respaldos, "
+                      f"{report['objects']} archivos correctos")
+
+    details = [f"{entry['snapshot']}: {entry['path']} ({label})"
+               for label, key in (("falta", "missing"), ("dañado", "corrupt"))
+               for entry in report[key]]
+    details += [f"{snapshot_id}: manifiesto ilegible" for snapshot_id in report["damaged_snapshots"]]
+    shown = "\n".join(details[:20])
+    if len(details) > 20:
+        shown += f"\n... y {len(details) - 20} más"
+    return False, f"Se encontraron {problems} problemas en los respaldos:\n{shown}"
@@ -0,0 +1,786 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Almacén de respaldos direccionado por contenido para NoteLite.
+Cada versión de un archivo se guarda una sola vez, con su hash como nombre,
+y cada respaldo es una instantánea que solo referencia esos objetos.
+"""
+
+import os
+import json
+import zlib
+import hashlib
+import datetime
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from backup_archive import build_manifest
+
+
+class BackupStore:
+    """
+    Almacén de respaldos con deduplicación.
+
+    Estructura en disco (por defecto ~/NoteLite/backups/):
+        objects/ab/abcdef...   contenido comprimido, nombrado por su SHA-256
+        snapshots/<id>.json    raíz de cada respaldo (grupo -> hash de su página,
+                               del manifiesto y del índice de notas)
+        indexes/<id>.json      índice de notas de los respaldos sin páginas
+
+    Una nota que no cambia ocupa lo mismo con un respaldo que con cien: las
+    instantáneas nuevas solo añaden los objetos que no existían. El
+    manifiesto (ruta -> hash) y el índice de notas también se guardan como
+    objetos: se reparten en páginas por prefijo de ruta (o de ID) y cada
+    instantánea solo escribe las páginas de los grupos que cambiaron; las
+    demás las comparte con la anterior. La
+    retención elimina instantáneas y la recolección de basura, los objetos y
+    páginas que ya no referencia ninguna.
+
+    Como cada archivo es un objeto independiente, restaurar una sola nota
+    solo lee ese objeto, y el índice permite listar las notas de un
+    respaldo sin descomprimir ninguna.
+    """
+
+    # Instantáneas a conservar: la más reciente de cada una de las últimas
+    # N horas, N días y N semanas
+    DEFAULT_RETENTION = {"hourly": 24, "daily": 7, "weekly": 8}
+
+    # Nivel de compresión zlib de los objetos (0-9)
+    DEFAULT_COMPRESSION_LEVEL = 6
+
+    # Prefijo y extensión de los archivos de notas dentro del respaldo
+    NOTES_PREFIX = "notes/"
+    NOTE_SUFFIX = ".json"
+
+    # Caracteres del nombre de archivo que forman el grupo de su página de
+    # manifiesto (con IDs hexadecimales, hasta 256 páginas por carpeta)
+    PAGE_PREFIX_CHARS = 2
+
+    def __init__(self, data_dir, store_dir, roots=("notes", "config"),
+                 retention=None, compression_level=None):
+        """
+        Inicializa el almacén.
+
+        Args:
+            data_dir: Directorio de datos (~/NoteLite)
+            store_dir: Directorio del almacén de respaldos
+            roots: Subdirectorios de data_dir que se respaldan
+            retention: Diccionario {"hourly", "daily", "weekly"} con cuántas
+                instantáneas conservar de cada tipo
+            compression_level: Nivel de compresión zlib de los objetos
+        """
+        self.data_dir = data_dir
+        self.store_dir = store_dir
+        self.roots = tuple(roots)
+        self.retention = dict(self.DEFAULT_RETENTION, **(retention or {}))
+        self.compression_level = (self.DEFAULT_COMPRESSION_LEVEL
+                                  if compression_level is None else compression_level)
+
+        self.objects_dir = os.path.join(store_dir, "objects")
+        self.snapshots_dir = os.path.join(store_dir, "snapshots")
+        self.indexes_dir = os.path.join(store_dir, "indexes")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        os.makedirs(self.indexes_dir, exist_ok=True)
+
+    # --- Objetos ---
+
+    def _object_path(self, digest):
+        """Ruta de un objeto a partir de su hash."""
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def has_object(self, digest):
+        """Comprueba si un objeto ya está guardado."""
+        return os.path.exists(self._object_path(digest))
+
+    def put_object(self, digest, data):
+        """Guarda el contenido de un archivo si no existía ya.
+
+        Returns:
+            Bytes escritos en disco (0 si el objeto ya existía)
+        """
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = zlib.compress(data, self.compression_level)
+        temp_path = path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(temp_path, path)
+        return len(compressed)
+
+    def get_object(self, digest):
+        """Lee y descomprime un objeto."""
+        with open(self._object_path(digest), 'rb') as f:
+            return zlib.decompress(f.read())
+
+    # --- Instantáneas ---
+
+    def list_snapshots(self):
+        """Obtiene los IDs de las instantáneas, de la más antigua a la más reciente."""
+        return sorted(name[:-5] for name in os.listdir(self.snapshots_dir)
+                      if name.endswith(".json"))
+
+    def _load_snapshot_root(self, snapshot_id):
+        """Carga la raíz de una instantánea (sin leer sus páginas)."""
+        with open(os.path.join(self.snapshots_dir, f"{snapshot_id}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load_snapshot(self, snapshot_id):
+        """
+        Carga el manifiesto completo de una instantánea.
+
+        Returns:
+            Diccionario con "id", "created_at", "files" (ruta -> entrada) y,
+            en las instantáneas paginadas, "pages" (grupo -> hash de la página)
+        """
+        snapshot = self._load_snapshot_root(snapshot_id)
+        if "pages" in snapshot:
+            files = {}
+            for digest in snapshot["pages"].values():
+                files.update(self._read_page(digest))
+            snapshot["files"] = files
+        return snapshot
+
+    def _latest_snapshot_id(self):
+        """ID de la instantánea más reciente (o None si no hay)."""
+        snapshots = self.list_snapshots()
+        return snapshots[-1] if snapshots else None
+
+    def latest_snapshot(self):
+        """Carga la instantánea más reciente (o None si no hay)."""
+        snapshot_id = self._latest_snapshot_id()
+        return self.load_snapshot(snapshot_id) if snapshot_id else None
+
+    def _save_snapshot(self, snapshot):
+        """Guarda la raíz de una instantánea de forma atómica."""
+        path = os.path.join(self.snapshots_dir, f"{snapshot['id']}.json")
+        temp_path = path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temp_path, path)
+
+    # --- Páginas del manifiesto ---
+
+    def _page_key(self, rel_path):
+        """Grupo de una ruta: su carpeta y el principio del nombre del archivo."""
+        directory, _, name = rel_path.rpartition("/")
+        return f"{directory}/{name[:self.PAGE_PREFIX_CHARS]}"
+
+    def _index_page_key(self, note_id):
+        """Grupo de una nota en las páginas del índice."""
+        return note_id[:self.PAGE_PREFIX_CHARS]
+
+    def _group_pages(self, entries, page_key):
+        """Reparte un diccionario clave -> valor en grupos {grupo: {clave: valor}}."""
+        groups = {}
+        for key, value in entries.items():
+            groups.setdefault(page_key(key), {})[key] = value
+        return groups
+
+    def _put_page(self, entries):
+        """
+        Guarda una página como objeto comprimido.
+
+        Returns:
+            Tupla (hash de la página, bytes escritos o 0 si ya existía)
+        """
+        data = json.dumps(entries, ensure_ascii=False, sort_keys=True,
+                          separators=(",", ":")).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        return digest, self.put_object(digest, data)
+
+    def _read_page(self, digest):
+        """Lee una página del manifiesto."""
+        try:
+            return json.loads(self.get_object(digest).decode('utf-8'))
+        except (zlib.error, UnicodeDecodeError) as e:
+            raise ValueError(f"Página {digest} dañada: {e}")
+
+    def _save_pages(self, entries, previous_entries, previous_pages, page_key,
+                    stored, label):
+        """
+        Guarda un diccionario clave -> valor como páginas (agrupado con page_key).
+
+        Los grupos iguales a los de la instantánea anterior reutilizan su
+        página sin escribir nada; las páginas escritas se anotan en stored
+        como "<label> <grupo>".
+
+        Returns:
+            Diccionario grupo -> hash de la página
+        """
+        previous_groups = self._group_pages(previous_entries, page_key) if previous_pages else {}
+        pages = {}
+        for key, group in self._group_pages(entries, page_key).items():
+            if key in previous_pages and previous_groups.get(key) == group:
+                pages[key] = previous_pages[key]
+            else:
+                pages[key], written = self._put_page(group)
+                if written:
+                    stored[pages[key]] = f"{label} {key}"
+        return pages
+
+    def find_snapshot(self, moment):
+        """
+        Busca la instantánea vigente en un momento dado.
+
+        Returns:
+            ID de la instantánea más reciente creada no después de moment,
+            o None si no hay ninguna
+        """
+        found = None
+        for snapshot_id in self.list_snapshots():
+            try:
+                created = datetime.datetime.strptime(snapshot_id[:22], "%Y%m%d_%H%M%S_%f")
+            except ValueError:
+                continue
+            if created > moment:
+                break
+            found = snapshot_id
+        return found
+
+    def _new_snapshot_id(self, moment):
+        """ID libre (ordenable por fecha) para una nueva instantánea."""
+        base = moment.strftime("%Y%m%d_%H%M%S_%f")
+        snapshot_id, suffix = base, 1
+        while os.path.exists(os.path.join(self.snapshots_dir, f"{snapshot_id}.json")):
+            snapshot_id = f"{base}_{suffix}"
+            suffix += 1
+        return snapshot_id
+
+    def create_snapshot(self, progress=None, throttle=None):
+        """
+        Crea una instantánea de los archivos del usuario.
+
+        Solo se leen los archivos modificados desde la última instantánea y
+        solo se escriben los contenidos que el almacén no tenía.
+
+        Args:
+            progress: Callback opcional progress(fase, hechos, total), con
+                fase "scan" (total desconocido, 0) o "store"
+            throttle: job_control.Throttle opcional para limitar el ritmo y
+                permitir cancelar (lanza JobCancelled; los objetos ya escritos
+                sin instantánea se liberan en la siguiente recogida de basura)
+
+        Returns:
+            Tupla (ID de la instantánea creada o None si nada había cambiado,
+            objetos escritos por este respaldo {hash: ruta}), para verificar
+            solo lo nuevo con verify_stored
+        """
+        previous = self.latest_snapshot()
+        previous_files = previous["files"] if previous else {}
+
+        scanned = [0]
+
+        def on_file(read_bytes):
+            scanned[0] += 1
+            if throttle:
+                throttle.pause(read_bytes)
+            if progress:
+                progress("scan", scanned[0], 0)
+
+        files = build_manifest(self.data_dir, self.roots, previous_files, on_file)
+
+        # Sin cambios de contenido no hay instantánea nueva
+        if previous is not None and (
+                {path: entry["hash"] for path, entry in files.items()} ==
+                {path: entry["hash"] for path, entry in previous_files.items()}):
+            return None, {}
+
+        # Resúmenes de las notas leídas, para el índice
+        summaries = {}
+        stored = {}
+
+        pending = [rel_path for rel_path, entry in files.items()
+                   if not self.has_object(entry["hash"])]
+        for done, rel_path in enumerate(pending, 1):
+            entry = files[rel_path]
+            try:
+                with open(os.path.join(self.data_dir, *rel_path.split("/")), 'rb') as f:
+                    data = f.read()
+            except OSError:
+                # El archivo desapareció durante el respaldo
+                del files[rel_path]
+                continue
+
+            # Si cambió entre el escaneo y la lectura, vale lo que se ha leído
+            entry["hash"] = hashlib.sha256(data).hexdigest()
+            entry["size"] = len(data)
+            if self.put_object(entry["hash"], data):
+                stored[entry["hash"]] = rel_path
+            if self._note_id(rel_path):
+                summaries[entry["hash"]] = self._note_summary(data)
+
+            if throttle:
+                throttle.pause(len(data))
+            if progress:
+                progress("store", done, len(pending))
+
+        moment = datetime.datetime.now()
+        snapshot = {
+            "id": self._new_snapshot_id(moment),
+            "created_at": moment.isoformat(),
+            "files": files,
+            "pages": self._save_pages(files, previous_files,
+                                      previous.get("pages", {}) if previous else {},
+                                      self._page_key, stored, "manifiesto")
+        }
+
+        previous_index = self.load_index(previous["id"]) if previous else None
+        notes = self._build_index(snapshot, previous_index, summaries)["notes"]
+        snapshot["index_pages"] = self._save_pages(
+            notes, previous_index["notes"] if previous_index else {},
+            previous_index.get("pages", {}) if previous_index else {},
+            self._index_page_key, stored, "índice")
+
+        del snapshot["files"]
+        self._save_snapshot(snapshot)
+        return snapshot["id"], stored
+
+    def read_file(self, snapshot_id, rel_path):
+        """Obtiene el contenido de un archivo en una instantánea (leyendo solo su página)."""
+        snapshot = self._load_snapshot_root(snapshot_id)
+        if "pages" in snapshot:
+            files = self._read_page(snapshot["pages"][self._page_key(rel_path)])
+        else:
+            files = snapshot["files"]
+        return self.get_object(files[rel_path]["hash"])
+
+    def _restore_file(self, target_dir, rel_path, digest):
+        """Escribe un archivo de un respaldo en target_dir."""
+        destination = os.path.join(target_dir, *rel_path.split("/"))
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        data = self.get_object(digest)
+        temp_path = destination + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, destination)
+
+    def restore(self, target_dir, snapshot_id=None, workers=None):
+        """
+        Restaura una instantánea (por defecto la más reciente) en target_dir.
+
+        Los objetos se descomprimen y escriben en paralelo (zlib y la E/S
+        liberan el GIL).
+
+        Args:
+            target_dir: Directorio donde restaurar (se crean notes/, config/...)
+            snapshot_id: Instantánea a restaurar
+            workers: Hilos a usar (por defecto, según los procesadores)
+
+        Returns:
+            Número de archivos restaurados
+        """
+        snapshot = self.load_snapshot(snapshot_id) if snapshot_id else self.latest_snapshot()
+        if snapshot is None:
+            return 0
+
+        files = snapshot["files"]
+        workers = workers or min(8, (os.cpu_count() or 1) + 2)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # list() propaga el primer error de cualquier archivo
+            list(executor.map(lambda rel_path: self._restore_file(
+                target_dir, rel_path, files[rel_path]["hash"]), files))
+        return len(files)
+
+    # --- Índice de notas ---
+
+    def _note_id(self, rel_path):
+        """ID de la nota de una ruta del respaldo, o None si no es una nota."""
+        if (rel_path.startswith(self.NOTES_PREFIX) and rel_path.endswith(self.NOTE_SUFFIX)
+                and "/" not in rel_path[len(self.NOTES_PREFIX):]):
+            return rel_path[len(self.NOTES_PREFIX):-len(self.NOTE_SUFFIX)]
+        return None
+
+    @staticmethod
+    def _note_summary(data):
+        """Datos de una nota que se guardan en el índice."""
+        try:
+            note = json.loads(data.decode('utf-8'))
+        except (ValueError, UnicodeDecodeError):
+            return {"title": "", "updated_at": ""}
+        return {"title": note.get("title", ""), "updated_at": note.get("updated_at", "")}
+
+    def _index_path(self, snapshot_id):
+        """Ruta del índice de una instantánea."""
+        return os.path.join(self.indexes_dir, f"{snapshot_id}.json")
+
+    def _build_index(self, snapshot, previous_index=None, summaries=None):
+        """
+        Construye el índice de notas de una instantánea.
+
+        Las notas sin cambios desde el índice anterior lo reutilizan; el
+        resto se resume desde summaries o, si falta, leyendo su objeto.
+        """
+        previous_notes = previous_index["notes"] if previous_index else {}
+        summaries = summaries or {}
+
+        notes = {}
+        for rel_path, entry in snapshot["files"].items():
+            note_id = self._note_id(rel_path)
+            if note_id is None:
+                continue
+
+            old = previous_notes.get(note_id)
+            if old and old["hash"] == entry["hash"]:
+                notes[note_id] = old
+                continue
+
+            summary = summaries.get(entry["hash"])
+            if summary is None:
+                try:
+                    summary = self._note_summary(self.get_object(entry["hash"]))
+                except (OSError, zlib.error):
+                    summary = {"title": "", "updated_at": ""}
+            notes[note_id] = dict(summary, hash=entry["hash"], size=entry["size"])
+
+        return {"id": snapshot["id"], "created_at": snapshot["created_at"], "notes": notes}
+
+    def _save_index(self, index):
+        """Guarda el índice de una instantánea sin páginas de forma atómica."""
+        path = self._index_path(index["id"])
+        temp_path = path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def load_index(self, snapshot_id):
+        """
+        Carga el índice de notas de una instantánea.
+
+        Las instantáneas anteriores al índice lo obtienen la primera vez que
+        se consultan.
+
+        Returns:
+            Diccionario con "id", "created_at", "notes" (ID -> resumen) y, en
+            las instantáneas paginadas, "pages" (grupo -> hash de la página)
+        """
+        root = self._load_snapshot_root(snapshot_id)
+        if "index_pages" in root:
+            notes = {}
+            for digest in root["index_pages"].values():
+                notes.update(self._read_page(digest))
+            return {"id": root["id"], "created_at": root["created_at"],
+                    "notes": notes, "pages": root["index_pages"]}
+
+        try:
+            with open(self._index_path(snapshot_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        index = self._build_index(self.load_snapshot(snapshot_id))
+        try:
+            self._save_index(index)
+        except OSError as e:
+            print(f"Error al guardar el índice de {snapshot_id}: {e}")
+        return index
+
+    def _index_entry(self, snapshot_id, note_id):
+        """Resumen de una nota en el índice de una instantánea (leyendo solo su página)."""
+        root = self._load_snapshot_root(snapshot_id)
+        if "index_pages" in root:
+            digest = root["index_pages"].get(self._index_page_key(note_id))
+            return self._read_page(digest).get(note_id) if digest else None
+        return self.load_index(snapshot_id)["notes"].get(note_id)
+
+    def list_notes(self, snapshot_id=None):
+        """
+        Lista las notas de una instantánea (por defecto la más reciente).
+
+        Returns:
+            Lista de diccionarios {"id", "title", "updated_at", "size"}
+            ordenada por título
+        """
+        snapshot_id = snapshot_id or self._latest_snapshot_id()
+        if snapshot_id is None:
+            return []
+
+        notes = self.load_index(snapshot_id)["notes"]
+        result = [{"id": note_id, "title": info["title"],
+                   "updated_at": info["updated_at"], "size": info["size"]}
+                  for note_id, info in notes.items()]
+        result.sort(key=lambda note: (note["title"].lower(), note["id"]))
+        return result
+
+    def read_note(self, note_id, snapshot_id=None):
+        """
+        Lee una nota de una instantánea sin tocar el resto del respaldo.
+
+        Returns:
+            Datos de la nota, o None si no estaba en la instantánea
+        """
+        snapshot_id = snapshot_id or self._latest_snapshot_id()
+        if snapshot_id is None:
+            return None
+
+        info = self._index_entry(snapshot_id, note_id)
+        if info is None:
+            return None
+        return json.loads(self.get_object(info["hash"]).decode('utf-8'))
+
+    def restore_note(self, note_id, target_dir, snapshot_id=None):
+        """
+        Restaura un único archivo de nota en target_dir/notes/.
+
+        Returns:
+            True si la nota estaba en la instantánea
+        """
+        snapshot_id = snapshot_id or self._latest_snapshot_id()
+        if snapshot_id is None:
+            return False
+
+        info = self._index_entry(snapshot_id, note_id)
+        if info is None:
+            return False
+        self._restore_file(target_dir, f"{self.NOTES_PREFIX}{note_id}{self.NOTE_SUFFIX}", info["hash"])
+        return True
+
+    # --- Verificación ---
+
+    def verify_object(self, digest):
+        """
+        Comprueba un objeto: que existe, se descomprime y su hash coincide.
+
+        Returns:
+            Tupla (estado "ok", "missing" o "corrupt", bytes leídos)
+        """
+        try:
+            with open(self._object_path(digest), 'rb') as f:
+                compressed = f.read()
+        except FileNotFoundError:
+            return "missing", 0
+        except OSError:
+            return "corrupt", 0
+
+        try:
+            data = zlib.decompress(compressed)
+        except zlib.error:
+            return "corrupt", len(compressed)
+        if hashlib.sha256(data).hexdigest() != digest:
+            return "corrupt", len(compressed)
+        return "ok", len(compressed)
+
+    def verify(self, snapshot_ids=None, workers=None, progress=None, throttle=None):
+        """
+        Verifica las entradas de las instantáneas contra sus manifiestos.
+
+        Cada objeto se comprueba una sola vez aunque lo usen muchas
+        instantáneas, y cada página del manifiesto se lee una sola vez
+        aunque la compartan; las comprobaciones se reparten en un grupo de
+        hilos (zlib y hashlib liberan el GIL).
+
+        Args:
+            snapshot_ids: Instantáneas a verificar (por defecto, todas)
+            workers: Hilos a usar (por defecto, según los procesadores)
+            progress: Callback opcional progress("verify", hechos, total)
+            throttle: job_control.Throttle opcional (ritmo y cancelación)
+
+        Returns:
+            Diccionario con "snapshots" y "objects" (número comprobado),
+            "missing" y "corrupt" (listas de {"snapshot", "path", "hash"}) y
+            "damaged_snapshots" (manifiestos ilegibles)
+        """
+        snapshot_ids = self.list_snapshots() if snapshot_ids is None else list(snapshot_ids)
+        report = {"snapshots": len(snapshot_ids), "objects": 0,
+                  "missing": [], "corrupt": [], "damaged_snapshots": []}
+
+        users = {}       # hash -> [(snapshot_id, ruta)]
+        page_users = {}  # hash -> [(hash de la página, ruta)] de los archivos paginados
+        read_pages = set()
+        for snapshot_id in snapshot_ids:
+            try:
+                snapshot = self._load_snapshot_root(snapshot_id)
+                for digest in snapshot.get("pages", {}).values():
+                    if digest not in read_pages:
+                        for rel_path, entry in self._read_page(digest).items():
+                            page_users.setdefault(entry["hash"], []).append((digest, rel_path))
+                        read_pages.add(digest)
+            except (OSError, ValueError):
+                report["damaged_snapshots"].append(snapshot_id)
+                continue
+            for rel_path, entry in snapshot.get("files", {}).items():
+                users.setdefault(entry["hash"], []).append((snapshot_id, rel_path))
+            for key, digest in snapshot.get("pages", {}).items():
+                users.setdefault(digest, []).append((snapshot_id, f"manifiesto {key}"))
+            for key, digest in snapshot.get("index_pages", {}).items():
+                users.setdefault(digest, []).append((snapshot_id, f"índice {key}"))
+
+        digests = list(users.keys() | page_users.keys())
+        report["objects"] = len(digests)
+
+        def record(digest, status):
+            if status != "ok":
+                report[status].extend({"snapshot": snapshot_id, "path": rel_path, "hash": digest}
+                                      for snapshot_id, rel_path in users.get(digest, ()))
+                # Los archivos de una página, en cada instantánea que la usa
+                report[status].extend({"snapshot": snapshot_id, "path": rel_path, "hash": digest}
+                                      for page, rel_path in page_users.get(digest, ())
+                                      for snapshot_id, _ in users.get(page, ()))
+
+        self._check_objects(digests, record, workers, progress, throttle)
+        return report
+
+    def verify_stored(self, snapshot_id, stored, workers=None, progress=None, throttle=None):
+        """
+        Verifica solo los objetos que escribió un respaldo.
+
+        Tras cada respaldo basta con comprobar lo nuevo (lo demás ya se
+        comprobó cuando se escribió); la verificación completa queda para
+        verify.
+
+        Args:
+            snapshot_id: Instantánea creada por el respaldo
+            stored: Objetos escritos {hash: ruta}, como los devuelve create_snapshot
+            workers, progress, throttle: Como en verify
+
+        Returns:
+            Informe con el mismo formato que verify
+        """
+        report = {"snapshots": 1, "objects": len(stored),
+                  "missing": [], "corrupt": [], "damaged_snapshots": []}
+
+        def record(digest, status):
+            if status != "ok":
+                report[status].append({"snapshot": snapshot_id, "path": stored[digest], "hash": digest})
+
+        self._check_objects(list(stored), record, workers, progress, throttle)
+        return report
+
+    def _check_objects(self, digests, record, workers=None, progress=None, throttle=None):
+        """Comprueba objetos en un grupo de hilos y pasa cada resultado a record(hash, estado)."""
+        workers = workers or min(8, (os.cpu_count() or 1) + 2)
+        done = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {}
+            position = 0
+            while position < len(digests) or pending:
+                # Un número acotado de comprobaciones en vuelo
+                while position < len(digests) and len(pending) < workers * 4:
+                    digest = digests[position]
+                    pending[executor.submit(self.verify_object, digest)] = digest
+                    position += 1
+
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    status, read_bytes = future.result()
+                    record(pending.pop(future), status)
+                    done += 1
+                    if throttle:
+                        throttle.pause(read_bytes)
+                if progress:
+                    progress("verify", done, len(digests))
+
+    # --- Retención y recolección de basura ---
+
+    def _snapshots_to_keep(self, snapshot_ids):
+        """Aplica la política de retención a una lista de IDs (antigua -> reciente)."""
+        bucket_keys = {
+            "hourly": lambda moment: moment.strftime("%Y%m%d%H"),
+            "daily": lambda moment: moment.date(),
+            "weekly": lambda moment: moment.isocalendar()[:2],
+        }
+
+        dated = []
+        for snapshot_id in snapshot_ids:
+            try:
+                moment = datetime.datetime.strptime(snapshot_id[:15], "%Y%m%d_%H%M%S")
+            except ValueError:
+                continue
+            dated.append((moment, snapshot_id))
+        dated.sort(reverse=True)
+
+        # La más reciente siempre se conserva
+        keep = {dated[0][1]} if dated else set()
+
+        for rule, count in self.retention.items():
+            if rule not in bucket_keys or count <= 0:
+                continue
+            seen = set()
+            for moment, snapshot_id in dated:
+                bucket = bucket_keys[rule](moment)
+                if bucket in seen:
+                    continue
+                seen.add(bucket)
+                keep.add(snapshot_id)
+                if len(seen) >= count:
+                    break
+
+        return keep
+
+    def apply_retention(self):
+        """
+        Elimina las instantáneas que no conserva la política de retención.
+
+        Returns:
+            Lista de IDs eliminados
+        """
+        snapshot_ids = self.list_snapshots()
+        keep = self._snapshots_to_keep(snapshot_ids)
+
+        removed = []
+        for snapshot_id in snapshot_ids:
+            if snapshot_id in keep:
+                continue
+            try:
+                os.remove(os.path.join(self.snapshots_dir, f"{snapshot_id}.json"))
+                removed.append(snapshot_id)
+            except OSError as e:
+                print(f"Error al eliminar la instantánea {snapshot_id}: {e}")
+                continue
+            try:
+                os.remove(self._index_path(snapshot_id))
+            except OSError:
+                pass
+        return removed
+
+    def collect_garbage(self):
+        """
+        Elimina los objetos que ya no referencia ninguna instantánea.
+
+        Las páginas que comparten varias instantáneas se leen una sola vez,
+        así que el coste depende de lo que ha cambiado entre ellas y no del
+        número de instantáneas.
+
+        Returns:
+            Tupla (objetos eliminados, bytes liberados)
+        """
+        referenced = set()
+        for snapshot_id in self.list_snapshots():
+            try:
+                snapshot = self._load_snapshot_root(snapshot_id)
+                for digest in snapshot.get("pages", {}).values():
+                    if digest not in referenced:
+                        referenced.update(entry["hash"] for entry in self._read_page(digest).values())
+                        referenced.add(digest)
+            except (OSError, ValueError) as e:
+                # Ante una instantánea ilegible no se borra nada
+                print(f"Error al leer la instantánea {snapshot_id}: {e}")
+                return 0, 0
+            referenced.update(entry["hash"] for entry in snapshot.get("files", {}).values())
+            referenced.update(snapshot.get("index_pages", {}).values())
+
+        removed, freed = 0, 0
+        for prefix in os.scandir(self.objects_dir):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                if entry.name in referenced:
+                    continue
+                try:
+                    size = entry.stat().st_size
+                    os.remove(entry.path)
+                    removed += 1
+                    freed += size
+                except OSError:
+                    pass
+        return removed, freed
+
+    def prune(self):
+        """Aplica la retención y recoge los objetos huérfanos."""
+        removed = self.apply_retention()
+        if removed:
+            self.collect_garbage()
+        return removed
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Paquetes de exportación e importación para NoteLite.
+
+Un paquete es un único archivo JSONL (opcionalmente comprimido con gzip) con
+un registro por línea: cabecera, notas, etiquetas, plantillas,
+recordatorios, archivos multimedia en trozos y un cierre con los totales.
+Se escribe y se lee en una sola pasada secuencial, así que la memoria usada
+no depende del tamaño de la colección.
+"""
+
+import os
+import io
+import gzip
+import json
+import base64
+import hashlib
+import datetime
+
+
+# Identificación del formato
+BUNDLE_FORMAT = "notelite-bundle"
+BUNDLE_VERSION = 1
+
+# Tamaño de los trozos en que viajan los archivos multimedia
+MEDIA_CHUNK_SIZE = 256 * 1024
+
+# Cabecera de los archivos gzip
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+class BundleError(Exception):
+    """El archivo no es un paquete válido o está incompleto."""
+
+
+def _open_for_write(path, compress):
+    """Abre el paquete para escribir (texto UTF-8, con o sin gzip)."""
+    if compress:
+        return io.TextIOWrapper(gzip.open(path, 'wb', compresslevel=6), encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+
+def _open_for_read(path):
+    """Abre un paquete para leer, detectando si está comprimido."""
+    with open(path, 'rb') as f:
+        compressed = f.read(2) == _GZIP_MAGIC
+    if compressed:
+        return io.TextIOWrapper(gzip.open(path, 'rb'), encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+class BundleWriter:
+    """
+    Escritor de paquetes.
+
+    Uso:
+        with BundleWriter(path) as writer:
+            writer.write_note(note_id, note_data)
+            ...
+    """
+
+    def __init__(self, path, compress=None):
+        """
+        Abre el paquete para escribir.
+
+        Args:
+            path: Ruta del paquete
+            compress: Comprimir con gzip (por defecto, si la ruta acaba en .gz)
+        """
+        self.path = path
+        compress = path.endswith(".gz") if compress is None else compress
+        self.temp_path = path + ".tmp"
+        self._file = _open_for_write(self.temp_path, compress)
+        self.counts = {"notes": 0, "tags": 0, "templates": 0, "reminders": 0, "media": 0}
+        self._write({"type": "header", "format": BUNDLE_FORMAT, "version": BUNDLE_VERSION,
+                     "created_at": datetime.datetime.now().isoformat()})
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+
+    def write_note(self, note_id, note_data):
+        """Añade una nota."""
+        self._write({"type": "note", "id": note_id, "data": note_data})
+        self.counts["notes"] += 1
+
+    def write_tags(self, tags):
+        """Añade las definiciones de etiquetas ({nombre: datos})."""
+        self._write({"type": "tags", "data": tags})
+        self.counts["tags"] += len(tags)
+
+    def write_templates(self, templates):
+        """Añade las plantillas ({id: datos})."""
+        self._write({"type": "templates", "data": templates})
+        self.counts["templates"] += len(templates)
+
+    def write_reminder(self, reminder):
+        """Añade un recordatorio."""
+        self._write({"type": "reminder", "data": reminder})
+        self.counts["reminders"] += 1
+
+    def write_media(self, name, path):
+        """Añade un archivo multimedia, leído y escrito por trozos."""
+        digest = hashlib.sha256()
+        offset = 0
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(MEDIA_CHUNK_SIZE)
+                digest.update(chunk)
+                last = len(chunk) < MEDIA_CHUNK_SIZE
+                record = {"type": "media", "name": name, "offset": offset,
+                          "data": base64.b64encode(chunk).decode('ascii'), "last": last}
+                if last:
+                    record["sha256"] = digest.hexdigest()
+                self._write(record)
+                offset += len(chunk)
+                if last:
+                    break
+        self.counts["media"] += 1
+
+    def close(self):
+        """Escribe el cierre y deja el paquete en su ruta definitiva."""
+        self._write({"type": "end", "counts": self.counts})
+        self._file.close()
+        os.replace(self.temp_path, self.path)
+
+    def abort(self):
+        """Descarta un paquete a medio escribir."""
+        self._file.close()
+        try:
+            os.remove(self.temp_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def read_bundle(path, media_dir=None):
+    """
+    Recorre un paquete registro a registro.
+
+    Los archivos multimedia se reconstruyen en media_dir a medida que llegan
+    sus trozos (en un temporal que se renombra al comprobar el hash) y se
+    entregan como un único registro {"type": "media", "name", "path"}.
+
+    Yields:
+        Registros {"type": "note" | "tags" | "templates" | "reminder" | "media", ...}
+
+    Raises:
+        BundleError: Si el archivo no es un paquete o está truncado
+    """
+    with _open_for_read(path) as f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get("format") != BUNDLE_FORMAT:
+            raise BundleError("El archivo no es un paquete de NoteLite")
+        if header.get("version", 0) > BUNDLE_VERSION:
+            raise BundleError("El paquete es de una versión más reciente de NoteLite")
+
+        media_file = None
+        media_digest = None
+        finished = False
+        try:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    raise BundleError("El paquete está dañado o incompleto")
+                kind = record.get("type")
+
+                if kind == "end":
+                    finished = True
+                    break
+
+                if kind != "media":
+                    yield record
+                    continue
+
+                if media_dir is None:
+                    continue
+                # El nombre viene del paquete: nunca fuera de media_dir
+                name = os.path.basename(record["name"])
+                target = os.path.join(media_dir, name)
+                if record["offset"] == 0:
+                    os.makedirs(media_dir, exist_ok=True)
+                    media_file = open(target + ".tmp", 'wb')
+                    media_digest = hashlib.sha256()
+                if media_file is None:
+                    raise BundleError("El paquete está dañado o incompleto")
+
+                chunk = base64.b64decode(record["data"])
+                media_file.write(chunk)
+                media_digest.update(chunk)
+                if record["last"]:
+                    media_file.close()
+                    media_file = None
+                    if record.get("sha256") != media_digest.hexdigest():
+                        os.remove(target + ".tmp")
+                        raise BundleError(f"El archivo multimedia {name} está dañado")
+                    os.replace(target + ".tmp", target)
+                    yield {"type": "media", "name": name, "path": target}
+        finally:
+            if media_file is not None:
+                media_file.close()
+                os.remove(media_file.name)
+
+        if not finished:
+            raise BundleError("El paquete está incompleto")
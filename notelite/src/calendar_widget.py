@@ -21,12 +21,23 @@ class NoteCalendarWidget(QWidget):
     
     note_selected = pyqtSignal(str)  # ID de la nota seleccionada
     
-    def __init__(self, data_manager, parent=None):
+    # Rol para distinguir notas con fecha asignada de recordatorios
+    KIND_ROLE = Qt.ItemDataRole.UserRole + 1
+    
+    def __init__(self, data_manager, date_index=None, reminder_manager=None, parent=None):
         super().__init__(parent)
         self.data_manager = data_manager
-        self.date_notes = {}  # Diccionario de notas por fecha {fecha_str: [note_ids]}
+        self.reminder_manager = reminder_manager
+        
+        # Índice compartido de fechas (notas y recordatorios)
+        if date_index is None:
+            from date_index import DateIndex
+            date_index = DateIndex(data_manager, reminder_manager)
+        self.date_index = date_index
+        self._highlighted = []  # QDate resaltadas en la página actual
         
         self.setup_ui()
+        self.date_index.add_listener(self.on_index_changed)
         self.load_dated_notes()
         
     def setup_ui(self):
@@ -37,6 +48,7 @@ class NoteCalendarWidget(QWidget):
         self.calendar = QCalendarWidget()
         self.calendar.setGridVisible(True)
         self.calendar.clicked.connect(self.on_date_clicked)
+        self.calendar.currentPageChanged.connect(self.update_calendar_format)
         layout.addWidget(self.calendar)
         
         # Lista de notas para la fecha seleccionada
@@ -64,85 +76,83 @@ class NoteCalendarWidget(QWidget):
         layout.addLayout(notes_layout)
     
     def load_dated_notes(self):
-        """Carga todas las notas con fechas asignadas."""
-        self.date_notes = {}
-        
-        # Obtener todas las notas
-        all_notes = self.data_manager.get_all_notes()
-        for note_id, note_data in all_notes.items():
-            # Verificar si tiene recordatorios o fechas asignadas
-            if "reminders" in note_data:
-                for reminder in note_data["reminders"]:
-                    # Extraer solo la fecha del recordatorio (sin hora)
-                    try:
-                        reminder_date = reminder["datetime"].split()[0]  # Formato YYYY-MM-DD
-                        if reminder_date not in self.date_notes:
-                            self.date_notes[reminder_date] = []
-                        if note_id not in self.date_notes[reminder_date]:
-                            self.date_notes[reminder_date].append(note_id)
-                    except (KeyError, IndexError):
-                        pass
-            
-            # Verificar si tiene fecha asignada directamente
-            if "date" in note_data:
-                date_str = note_data["date"]
-                if date_str not in self.date_notes:
-                    self.date_notes[date_str] = []
-                if note_id not in self.date_notes[date_str]:
-                    self.date_notes[date_str].append(note_id)
-        
-        # Actualizar el formato del calendario
+        """Muestra las fechas con notas o recordatorios del mes visible."""
         self.update_calendar_format()
     
-    def update_calendar_format(self):
-        """Actualiza el formato del calendario para mostrar fechas con notas."""
-        # Restablecer formato
-        self.calendar.setDateTextFormat(QDate(), QTextCharFormat())
+    def on_index_changed(self, months):
+        """Refresca la vista si el cambio afecta al mes visible."""
+        page = (self.calendar.yearShown(), self.calendar.monthShown())
+        if months is None or page in months:
+            self.update_calendar_format()
+            self.on_date_clicked(self.calendar.selectedDate())
+    
+    def update_calendar_format(self, year=None, month=None):
+        """Actualiza el formato del calendario para mostrar fechas con notas.
+        
+        Solo se tocan los días del mes visible, que salen ya resueltos del
+        índice de fechas.
+        """
+        if year is None or month is None:
+            year, month = self.calendar.yearShown(), self.calendar.monthShown()
+        
+        # Restablecer solo los días resaltados anteriormente
+        for date in self._highlighted:
+            self.calendar.setDateTextFormat(date, QTextCharFormat())
+        self._highlighted = []
         
         # Destacar fechas con notas
         highlight_format = QTextCharFormat()
         highlight_format.setBackground(QBrush(QColor(173, 216, 230)))  # Azul claro
         
-        for date_str in self.date_notes.keys():
-            try:
-                year, month, day = map(int, date_str.split('-'))
-                date = QDate(year, month, day)
-                self.calendar.setDateTextFormat(date, highlight_format)
-            except (ValueError, IndexError):
-                pass
+        for day in self.date_index.get_month(year, month):
+            date = QDate(day.year, day.month, day.day)
+            self.calendar.setDateTextFormat(date, highlight_format)
+            self._highlighted.append(date)
     
     def on_date_clicked(self, date):
         """Manejador para cuando se hace clic en una fecha del calendario."""
-        # Convertir QDate a cadena YYYY-MM-DD
-        date_str = date.toString("yyyy-MM-dd")
-        
         # Limpiar lista de notas
         self.notes_list.clear()
         self.remove_btn.setEnabled(False)
         
-        # Verificar si hay notas para esta fecha
-        if date_str in self.date_notes and self.date_notes[date_str]:
-            for note_id in self.date_notes[date_str]:
-                note_data = self.data_manager.get_note(note_id)
-                if note_data:
-                    item = QListWidgetItem(note_data.get("title", "Sin título"))
-                    item.setData(Qt.ItemDataRole.UserRole, note_id)
-                    self.notes_list.addItem(item)
+        entry = self.date_index.get_day(datetime.date(date.year(), date.month(), date.day()))
+        
+        # Notas con la fecha asignada
+        for note_id in entry["notes"]:
+            note_data = self.data_manager.get_note(note_id)
+            if note_data:
+                item = QListWidgetItem(note_data.get("title", "Sin título"))
+                item.setData(Qt.ItemDataRole.UserRole, note_id)
+                item.setData(self.KIND_ROLE, "date")
+                self.notes_list.addItem(item)
+        
+        # Recordatorios del día
+        for moment, reminder_id in entry["reminders"]:
+            reminder = self.reminder_manager.get_reminder(reminder_id) if self.reminder_manager else None
+            if not reminder:
+                continue
+            note_data = self.data_manager.get_note(reminder["note_id"])
+            text = f"⏰ {moment.strftime('%H:%M')} {reminder['title']}"
+            if note_data:
+                text += f" ({note_data.get('title', 'Sin título')})"
+            item = QListWidgetItem(text)
+            item.setData(Qt.ItemDataRole.UserRole, reminder["note_id"])
+            item.setData(self.KIND_ROLE, "reminder")
+            self.notes_list.addItem(item)
     
     def on_note_selected(self, item):
         """Manejador para cuando se selecciona una nota de la lista."""
         note_id = item.data(Qt.ItemDataRole.UserRole)
         self.note_selected.emit(note_id)
-        self.remove_btn.setEnabled(True)
+        self.remove_btn.setEnabled(item.data(self.KIND_ROLE) == "date")
     
     def assign_note_to_date(self):
         """Abre un diálogo para asignar una nota a la fecha seleccionada."""
         date = self.calendar.selectedDate()
         date_str = date.toString("yyyy-MM-dd")
         
-        dialog = DateAssignmentDialog(self.data_manager, date_str, self)
+        dialog = DateAssignmentDialog(self.data_manager, date_str, self.reminder_manager, self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_dated_notes()
             self.on_date_clicked(date)
     
     def remove_date_assignment(self):
@@ -159,30 +169,19 @@ class NoteCalendarWidget(QWidget):
         if not note_data:
             return
             
-        # Eliminar fecha asignada
+        # Eliminar fecha asignada (el índice de fechas refresca la vista)
         if "date" in note_data and note_data["date"] == date_str:
-            note_data_copy = note_data.copy()
-            note_data_copy.pop("date", None)
-            self.data_manager.update_note(
-                note_id, 
-                note_data_copy.get("title", ""), 
-                note_data_copy.get("content", ""),
-                note_data_copy.get("type", "note"),
-                note_data_copy.get("tags", [])
-            )
-            
-            # Actualizar vistas
-            self.load_dated_notes()
-            self.on_date_clicked(date)
+            self.data_manager.set_note_date(note_id, None)
 
 
 class DateAssignmentDialog(QDialog):
     """Diálogo para asignar una nota a una fecha."""
     
-    def __init__(self, data_manager, date_str, parent=None):
+    def __init__(self, data_manager, date_str, reminder_manager=None, parent=None):
         super().__init__(parent)
         self.data_manager = data_manager
         self.date_str = date_str
+        self.reminder_manager = reminder_manager
         
         self.setWindowTitle(f"Asignar nota a {date_str}")
         self.setup_ui()
@@ -263,26 +262,19 @@ class DateAssignmentDialog(QDialog):
         
         if note_data:
             # Actualizar nota con la fecha
-            note_data_copy = note_data.copy()
-            note_data_copy["date"] = self.date_str
-            
-            # Actualizar en el gestor de datos
-            self.data_manager.update_note(
-                note_id, 
-                note_data_copy.get("title", ""), 
-                note_data_copy.get("content", ""),
-                note_data_copy.get("type", "note"),
-                note_data_copy.get("tags", [])
-            )
+            self.data_manager.set_note_date(note_id, self.date_str)
             
             # Crear recordatorio si está marcado
             if self.reminder_check.isChecked():
                 time_str = self.time_edit.time().toString("hh:mm")
                 datetime_str = f"{self.date_str} {time_str}"
                 
-                # Importar ReminderManager aquí para evitar importación circular
-                from reminder_manager import ReminderManager
-                reminder_manager = ReminderManager(self.data_manager)
+                # Usar el gestor compartido para que el aviso se programe
+                reminder_manager = self.reminder_manager
+                if reminder_manager is None:
+                    # Importar ReminderManager aquí para evitar importación circular
+                    from reminder_manager import ReminderManager
+                    reminder_manager = ReminderManager(self.data_manager)
                 
                 reminder_manager.create_reminder(
                     note_id,
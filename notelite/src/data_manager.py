@@ -10,6 +10,7 @@ import os
 import json
 import uuid
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 class DataManager:
     """Gestor de datos para almacenar y recuperar notas y listas de tareas."""
@@ -22,8 +23,15 @@ class DataManager:
         # Asegurar que los directorios existen
         self._ensure_dirs_exist()
         
+        # Tamaño y fecha de cada archivo tal como lo dejó esta instancia,
+        # para distinguir los cambios externos de los propios
+        self._file_stats = {}
+        
         # Cargar notas
         self.notes = self._load_notes()
+        
+        # Observadores de cambios en las notas
+        self._listeners = []
     
     def _ensure_dirs_exist(self):
         """Asegura que los directorios necesarios existen."""
@@ -44,6 +52,7 @@ class DataManager:
                         with open(note_path, 'r', encoding='utf-8') as f:
                             note_data = json.load(f)
                             notes[note_id] = note_data
+                        self._remember_file(note_id)
                     except Exception as e:
                         print(f"Error al cargar la nota {note_id}: {e}")
         
@@ -56,11 +65,59 @@ class DataManager:
         try:
             with open(note_path, 'w', encoding='utf-8') as f:
                 json.dump(note_data, f, ensure_ascii=False, indent=2)
+            self._remember_file(note_id)
             return True
         except Exception as e:
             print(f"Error al guardar la nota {note_id}: {e}")
             return False
     
+    def _file_stat(self, note_id):
+        """Tamaño y fecha de modificación del archivo de una nota (None si no existe)."""
+        try:
+            stat = os.stat(os.path.join(self.notes_dir, f"{note_id}.json"))
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+    
+    def _remember_file(self, note_id):
+        """Registra el archivo de una nota como leído o escrito por esta instancia."""
+        self._file_stats[note_id] = self._file_stat(note_id)
+    
+    def get_file_stat(self, note_id):
+        """Tamaño y fecha del archivo de una nota tal como se leyó o escribió (None si no se conoce)."""
+        return self._file_stats.get(note_id)
+    
+    def note_file_changed(self, note_id):
+        """Indica si el archivo de una nota cambió desde que se leyó o escribió.
+        
+        Sirve para reconocer los cambios hechos por otro programa (una
+        herramienta de sincronización, otro editor...) sin leer el archivo.
+        """
+        return self._file_stat(note_id) != self._file_stats.get(note_id)
+    
+    def add_listener(self, callback):
+        """Registra un observador de cambios en las notas.
+        
+        Args:
+            callback: Función llamada como callback(note_id, note_data) tras
+                crear o actualizar una nota, y con note_data=None al eliminarla.
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+    
+    def remove_listener(self, callback):
+        """Elimina un observador registrado con add_listener."""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+    
+    def _notify_listeners(self, note_id, note_data):
+        """Notifica un cambio en una nota a todos los observadores."""
+        for callback in list(self._listeners):
+            try:
+                callback(note_id, note_data)
+            except Exception as e:
+                print(f"Error al notificar cambio en la nota {note_id}: {e}")
+    
     def create_note(self, title, content, note_type="note"):
         """Crea una nueva nota.
         
@@ -85,9 +142,49 @@ class DataManager:
         
         self.notes[note_id] = note_data
         self._save_note_to_file(note_id, note_data)
+        self._notify_listeners(note_id, note_data)
         
         return note_id
     
+    def create_notes(self, notes_data):
+        """Crea muchas notas de una vez (por ejemplo, al importar).
+        
+        Los archivos se escriben en paralelo y los observadores reciben cada
+        nota como con create_note, pero sin que haga falta recorrer la
+        colección entera al terminar.
+        
+        Args:
+            notes_data: Lista de diccionarios con title, content y
+                opcionalmente type, tags, created_at y updated_at.
+            
+        Returns:
+            Lista de IDs de las notas creadas, en el mismo orden.
+        """
+        now = datetime.now().isoformat()
+        created = []
+        for data in notes_data:
+            note_id = str(uuid.uuid4())
+            note_data = {
+                'id': note_id,
+                'title': data.get('title', ''),
+                'content': data.get('content', ''),
+                'type': data.get('type', 'note'),
+                'created_at': data.get('created_at', now),
+                'updated_at': data.get('updated_at', now)
+            }
+            if data.get('tags'):
+                note_data['tags'] = list(data['tags'])
+            created.append((note_id, note_data))
+        
+        with ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) + 2)) as executor:
+            list(executor.map(lambda item: self._save_note_to_file(*item), created))
+        
+        for note_id, note_data in created:
+            self.notes[note_id] = note_data
+            self._notify_listeners(note_id, note_data)
+        
+        return [note_id for note_id, _ in created]
+    
     def update_note(self, note_id, title, content, note_type=None, tags=None):
         """Actualiza una nota existente.
         
@@ -117,7 +214,100 @@ class DataManager:
             note_data['tags'] = tags
         
         self.notes[note_id] = note_data
-        return self._save_note_to_file(note_id, note_data)
+        saved = self._save_note_to_file(note_id, note_data)
+        self._notify_listeners(note_id, note_data)
+        return saved
+    
+    def set_note_date(self, note_id, date_str):
+        """Asigna una fecha (YYYY-MM-DD) a una nota o la quita con None.
+        
+        Returns:
+            True si se guardó el cambio, False en caso contrario.
+        """
+        if note_id not in self.notes:
+            return False
+        
+        note_data = self.notes[note_id]
+        if date_str:
+            note_data['date'] = date_str
+        else:
+            note_data.pop('date', None)
+        
+        saved = self._save_note_to_file(note_id, note_data)
+        self._notify_listeners(note_id, note_data)
+        return saved
+    
+    def put_note(self, note_id, note_data):
+        """Guarda una nota completa con su ID (por ejemplo, restaurada de un respaldo).
+        
+        Si ya existe una nota con ese ID se reemplaza.
+        
+        Returns:
+            True si se guardó la nota, False en caso contrario.
+        """
+        note_data = dict(note_data, id=note_id)
+        self.notes[note_id] = note_data
+        saved = self._save_note_to_file(note_id, note_data)
+        self._notify_listeners(note_id, note_data)
+        return saved
+    
+    def reload_note(self, note_id):
+        """Vuelve a leer una nota de su archivo tras un cambio externo.
+        
+        Si el archivo ya no existe, la nota se quita de la colección. A
+        diferencia de put_note, no reescribe el archivo.
+        
+        Returns:
+            Datos de la nota recargada o None si ya no existe.
+        """
+        note_path = os.path.join(self.notes_dir, f"{note_id}.json")
+        try:
+            with open(note_path, 'r', encoding='utf-8') as f:
+                note_data = json.load(f)
+            self._remember_file(note_id)
+        except FileNotFoundError:
+            note_data = None
+        except Exception as e:
+            print(f"Error al cargar la nota {note_id}: {e}")
+            return self.notes.get(note_id)
+        
+        if note_data is None:
+            self._file_stats.pop(note_id, None)
+            if self.notes.pop(note_id, None) is not None:
+                self._notify_listeners(note_id, None)
+            return None
+        
+        self.notes[note_id] = note_data
+        self._notify_listeners(note_id, note_data)
+        return note_data
+    
+    def reload_changed_notes(self, note_ids=None):
+        """Recarga las notas cuyo archivo ha cambiado por fuera.
+    
+        Las notas sin cambios (incluidas las que acaba de guardar esta
+        instancia) no se leen ni se notifican.
+    
+        Args:
+            note_ids: IDs a comprobar, o None para comprobar todas las notas
+                (las de memoria y los archivos de la carpeta).
+    
+        Returns:
+            Lista de IDs recargados o eliminados.
+        """
+        if note_ids is None:
+            note_ids = set(self.notes)
+            try:
+                note_ids.update(name[:-5] for name in os.listdir(self.notes_dir)
+                                if name.endswith(".json"))
+            except OSError as e:
+                print(f"Error al leer la carpeta de notas: {e}")
+    
+        changed = []
+        for note_id in note_ids:
+            if self.note_file_changed(note_id):
+                self.reload_note(note_id)
+                changed.append(note_id)
+        return changed
     
     def get_note(self, note_id):
         """Obtiene una nota por su ID.
@@ -144,6 +334,8 @@ class DataManager:
         
         # Eliminar del diccionario en memoria
         del self.notes[note_id]
+        self._file_stats.pop(note_id, None)
+        self._notify_listeners(note_id, None)
         
         # Eliminar el archivo
         note_path = os.path.join(self.notes_dir, f"{note_id}.json")
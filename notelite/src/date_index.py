@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Índice de fechas para NoteLite.
+Reúne en un solo sitio las fechas asignadas a notas y las ocurrencias de los
+recordatorios, para que calendario, recordatorios y estadísticas consulten
+los mismos datos por rangos.
+"""
+
+import datetime
+import calendar
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict
+
+
+class DateIndex:
+    """
+    Índice de fechas mantenido de forma incremental.
+
+    Las fechas de las notas se actualizan con cada cambio notificado por el
+    DataManager y las de los recordatorios con los avisos del ReminderManager.
+    Cada mes consultado se guarda ya resuelto (días con sus notas y sus
+    recordatorios), así que volver a un mes es una búsqueda en un diccionario;
+    un cambio solo invalida los meses a los que afecta.
+    """
+
+    # Meses resueltos que se mantienen en memoria
+    MAX_CACHED_MONTHS = 48
+
+    def __init__(self, data_manager, reminder_manager=None):
+        """
+        Inicializa el índice.
+
+        Args:
+            data_manager: Gestor de datos
+            reminder_manager: Gestor de recordatorios opcional
+        """
+        self.data_manager = data_manager
+        self.reminder_manager = reminder_manager
+
+        # Fechas asignadas a notas
+        self._note_dates = {}  # note_id -> date
+        self._date_notes = {}  # date -> {note_id: None}
+        self._note_days = []   # fechas con notas, ordenadas
+
+        # Estado conocido de cada recordatorio: (mes o None si se repite, estado)
+        self._reminder_state = {}
+        self._status_counts = Counter()
+
+        # Meses resueltos: (año, mes) -> {date: {"notes": [...], "reminders": [...]}}
+        self._months = OrderedDict()
+
+        # Observadores: reciben el conjunto de meses afectados (None = todos)
+        self._listeners = []
+
+        for note_id, note_data in data_manager.get_all_notes().items():
+            self._set_note_date(note_id, self._parse_date(note_data.get("date")))
+        data_manager.add_listener(self._on_note_changed)
+
+        if reminder_manager is not None:
+            for reminder in reminder_manager.get_all_reminders():
+                self._reminder_state[reminder["id"]] = self._reminder_key(reminder)
+                self._status_counts[self._reminder_state[reminder["id"]][1]] += 1
+            reminder_manager.add_listener(self._on_reminder_changed)
+
+    # --- Observadores ---
+
+    def add_listener(self, callback):
+        """Registra un observador llamado como callback(meses) tras cada cambio.
+
+        meses es un conjunto de tuplas (año, mes), o None si pueden haber
+        cambiado todos (por ejemplo, al editar un recordatorio periódico).
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """Elimina un observador registrado con add_listener."""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify_listeners(self, months):
+        """Notifica a los observadores los meses afectados."""
+        for callback in list(self._listeners):
+            try:
+                callback(months)
+            except Exception as e:
+                print(f"Error al notificar cambio en el índice de fechas: {e}")
+
+    def _invalidate(self, months):
+        """Descarta los meses resueltos afectados y avisa a los observadores."""
+        if months is None:
+            self._months.clear()
+        else:
+            for month in months:
+                self._months.pop(month, None)
+        self._notify_listeners(months)
+
+    # --- Notas ---
+
+    @staticmethod
+    def _parse_date(value):
+        """Interpreta una fecha YYYY-MM-DD; devuelve None si no es válida."""
+        try:
+            return datetime.date.fromisoformat(value)
+        except (ValueError, TypeError):
+            return None
+
+    def _set_note_date(self, note_id, date):
+        """Cambia la fecha asignada a una nota en los índices."""
+        old_date = self._note_dates.pop(note_id, None)
+        if old_date is not None:
+            notes = self._date_notes[old_date]
+            del notes[note_id]
+            if not notes:
+                del self._date_notes[old_date]
+                del self._note_days[bisect_left(self._note_days, old_date)]
+
+        if date is not None:
+            self._note_dates[note_id] = date
+            if date not in self._date_notes:
+                self._date_notes[date] = {}
+                self._note_days.insert(bisect_left(self._note_days, date), date)
+            self._date_notes[date][note_id] = None
+
+        return old_date
+
+    def _on_note_changed(self, note_id, note_data):
+        """Actualiza el índice cuando se crea, modifica o elimina una nota."""
+        date = self._parse_date(note_data.get("date")) if note_data else None
+        old_date = self._note_dates.get(note_id)
+        if date == old_date:
+            return
+
+        self._set_note_date(note_id, date)
+        self._invalidate({(d.year, d.month) for d in (old_date, date) if d is not None})
+
+    def get_note_date(self, note_id):
+        """Obtiene la fecha asignada a una nota (o None)."""
+        return self._note_dates.get(note_id)
+
+    def get_notes_in_range(self, start, end):
+        """Obtiene (fecha, note_id) de las notas con fecha entre start y end (incluidas)."""
+        lo = bisect_left(self._note_days, start)
+        hi = bisect_right(self._note_days, end)
+        return [(date, note_id)
+                for date in self._note_days[lo:hi]
+                for note_id in self._date_notes[date]]
+
+    # --- Recordatorios ---
+
+    def _reminder_key(self, reminder):
+        """Mes afectado (None si se repite) y estado de un recordatorio."""
+        if reminder["completed"]:
+            status = "completed"
+        elif reminder["dismissed"]:
+            status = "dismissed"
+        else:
+            status = "open"
+
+        if reminder.get("repeat"):
+            return None, status
+
+        moment = self.reminder_manager.get_reminder_datetime(reminder["id"])
+        return (moment.year, moment.month) if moment else (), status
+
+    def _on_reminder_changed(self, reminder_id, reminder):
+        """Actualiza el índice cuando cambia un recordatorio."""
+        old_key = self._reminder_state.pop(reminder_id, None)
+        if old_key is not None:
+            self._status_counts[old_key[1]] -= 1
+
+        new_key = None
+        if reminder is not None:
+            new_key = self._reminder_key(reminder)
+            self._reminder_state[reminder_id] = new_key
+            self._status_counts[new_key[1]] += 1
+
+        # Un recordatorio periódico puede aparecer en cualquier mes
+        months = set()
+        for key in (old_key, new_key):
+            if key is None:
+                continue
+            if key[0] is None:
+                months = None
+                break
+            if key[0]:
+                months.add(key[0])
+
+        if months is None or months:
+            self._invalidate(months)
+
+    def get_reminder_summary(self, moment=None):
+        """
+        Resumen de recordatorios para las estadísticas.
+
+        Returns:
+            Diccionario con total, completados, pendientes y vencidos
+        """
+        moment = moment or datetime.datetime.now()
+        overdue = 0
+        if self.reminder_manager is not None:
+            overdue = len(self.reminder_manager.get_reminders_in_range(
+                end=moment, include_end=False))
+
+        return {
+            "total_reminders": len(self._reminder_state),
+            "completed_reminders": self._status_counts["completed"],
+            "pending_reminders": self._status_counts["open"] - overdue,
+            "overdue_reminders": overdue
+        }
+
+    # --- Consultas por mes y por rango ---
+
+    def _build_month(self, year, month):
+        """Resuelve todos los días con entradas de un mes."""
+        first = datetime.date(year, month, 1)
+        last = datetime.date(year, month, calendar.monthrange(year, month)[1])
+        days = {}
+
+        for date, note_id in self.get_notes_in_range(first, last):
+            days.setdefault(date, {"notes": [], "reminders": []})["notes"].append(note_id)
+
+        if self.reminder_manager is not None:
+            start = datetime.datetime.combine(first, datetime.time.min)
+            end = datetime.datetime.combine(last, datetime.time.max)
+            for moment, reminder in self.reminder_manager.get_occurrences_in_range(start, end):
+                entry = days.setdefault(moment.date(), {"notes": [], "reminders": []})
+                entry["reminders"].append((moment, reminder["id"]))
+
+        return days
+
+    def get_month(self, year, month):
+        """
+        Obtiene los días con notas o recordatorios de un mes.
+
+        Returns:
+            Diccionario {date: {"notes": [note_id], "reminders": [(datetime, reminder_id)]}}
+        """
+        key = (year, month)
+        days = self._months.get(key)
+        if days is None:
+            days = self._build_month(year, month)
+            self._months[key] = days
+            if len(self._months) > self.MAX_CACHED_MONTHS:
+                self._months.popitem(last=False)
+        else:
+            self._months.move_to_end(key)
+        return days
+
+    def get_day(self, date):
+        """Obtiene las entradas de un día ({"notes": [...], "reminders": [...]})."""
+        return self.get_month(date.year, date.month).get(date, {"notes": [], "reminders": []})
+
+    def get_range(self, start, end):
+        """
+        Obtiene los días con entradas entre start y end (fechas incluidas).
+
+        Returns:
+            Lista de tuplas (date, entradas) ordenada por fecha
+        """
+        result = []
+        year, month = start.year, start.month
+        while (year, month) <= (end.year, end.month):
+            for date, entry in sorted(self.get_month(year, month).items()):
+                if start <= date <= end:
+                    result.append((date, entry))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return result
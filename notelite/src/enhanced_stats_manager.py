@@ -18,18 +18,35 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import QTimer, Qt, pyqtSignal
 from PyQt6.QtGui import QFont, QColor, QPalette, QIcon
 
+from note_export import html_to_text
+
 class EnhancedStatsManager:
     """Gestor de estadísticas mejorado para NoteLite."""
     
-    def __init__(self, data_manager):
-        """Inicializa el gestor de estadísticas."""
+    # Segundos de cada lote de notas analizadas en segundo plano (la interfaz
+    # sigue respondiendo entre lotes)
+    PENDING_BATCH_SECONDS = 0.02
+    
+    def __init__(self, data_manager, tag_manager=None, date_index=None):
+        """Inicializa el gestor de estadísticas.
+        
+        Args:
+            data_manager: Gestor de datos
+            tag_manager: Gestor de etiquetas opcional; si se indica, sus
+                contadores en vivo sustituyen al recuento sobre todas las notas
+            date_index: Índice de fechas opcional con los recordatorios
+        """
         self.data_manager = data_manager
+        self.tag_manager = tag_manager
+        self.date_index = date_index
         self.stats_path = os.path.join(os.path.expanduser("~"), "NoteLite", "stats.json")
+        self.note_sizes_path = os.path.join(os.path.expanduser("~"), "NoteLite", "stats_notes.json")
         self.metrics = {
             "general": {
                 "total_notes": 0,
                 "total_chars": 0,
                 "total_words": 0,
+                "total_plain_chars": 0,
                 "avg_note_length": 0,
                 "last_update": "",
                 "creation_dates": {},
@@ -64,9 +81,110 @@ class EnhancedStatsManager:
         # Cargar estadísticas si existen
         self.load_stats()
         
+        # Tamaño de cada nota y totales, mantenidos de forma incremental
+        self._note_sizes = {}  # note_id -> ([tamaño, fecha del archivo], caracteres, palabras, caracteres de texto)
+        self._pending_sizes = set()  # notas sin tamaño guardado, aún por analizar
+        self._totals = [0, 0, 0]
+        self._build_note_sizes()
+        self.data_manager.add_listener(self._on_note_changed)
+        
         # Iniciar sesión
         self.start_session()
     
+    def _build_note_sizes(self):
+        """Carga el tamaño de las notas al iniciar.
+        
+        Se reutilizan los tamaños guardados de las notas cuyo archivo no ha
+        cambiado (mismo tamaño y fecha de modificación en disco). Las notas
+        nuevas o modificadas desde la última sesión no se analizan aquí: se
+        calculan por lotes en segundo plano o, como muy tarde, al leer las
+        estadísticas.
+        """
+        saved = {}
+        if os.path.exists(self.note_sizes_path):
+            try:
+                with open(self.note_sizes_path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+            except Exception as e:
+                print(f"Error al cargar tamaños de notas: {e}")
+        
+        for note_id, note_data in self.data_manager.get_all_notes().items():
+            entry = saved.get(note_id)
+            file_key = self._file_key(note_id)
+            if entry and file_key is not None and entry[0] == file_key:
+                self._add_note_size(note_id, tuple(entry))
+            else:
+                self._pending_sizes.add(note_id)
+        self._note_sizes_dirty = saved.keys() != self._note_sizes.keys()
+        
+        if self._pending_sizes:
+            QTimer.singleShot(0, self._fill_pending_sizes)
+    
+    def _fill_pending_sizes(self):
+        """Analiza un lote de notas pendientes y programa el siguiente."""
+        self._compute_pending_sizes(time.monotonic() + self.PENDING_BATCH_SECONDS)
+        if self._pending_sizes:
+            QTimer.singleShot(0, self._fill_pending_sizes)
+    
+    def _compute_pending_sizes(self, deadline=None):
+        """Calcula el tamaño de las notas pendientes (hasta deadline, si se indica)."""
+        while self._pending_sizes:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            note_id = self._pending_sizes.pop()
+            note_data = self.data_manager.get_note(note_id)
+            if note_data is not None:
+                self._add_note_size(note_id, (self._file_key(note_id),) + self._note_size(note_data))
+                self._note_sizes_dirty = True
+    
+    def save_note_sizes(self):
+        """Guarda el tamaño de cada nota ya calculado para el próximo inicio."""
+        if not self._note_sizes_dirty:
+            return
+        try:
+            with open(self.note_sizes_path + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump(self._note_sizes, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(self.note_sizes_path + ".tmp", self.note_sizes_path)
+            self._note_sizes_dirty = False
+        except Exception as e:
+            print(f"Error al guardar tamaños de notas: {e}")
+    
+    def _add_note_size(self, note_id, size):
+        """Registra el tamaño de una nota y lo suma a los totales."""
+        self._note_sizes[note_id] = size
+        for i in range(3):
+            self._totals[i] += size[i + 1]
+    
+    def _file_key(self, note_id):
+        """Tamaño y fecha del archivo de una nota, para reconocer los tamaños guardados."""
+        stat = self.data_manager.get_file_stat(note_id)
+        return list(stat) if stat is not None else None
+    
+    @staticmethod
+    def _note_size(note_data):
+        """Caracteres, palabras y caracteres de texto (sin HTML) de una nota."""
+        content = note_data.get("content", "")
+        if note_data.get("type") == "task_list":
+            try:
+                plain = "\n".join(task.get("text", "") for task in json.loads(content or "[]"))
+            except (ValueError, TypeError, AttributeError):
+                plain = content
+        else:
+            plain = html_to_text(content)
+        return len(content), len(content.split()), len(plain)
+    
+    def _on_note_changed(self, note_id, note_data):
+        """Ajusta los totales con la diferencia de tamaño de una nota."""
+        self._pending_sizes.discard(note_id)
+        old = self._note_sizes.pop(note_id, None)
+        if old is not None:
+            for i in range(3):
+                self._totals[i] -= old[i + 1]
+        if note_data is not None:
+            # El DataManager ya registró el archivo escrito o recargado
+            self._add_note_size(note_id, (self._file_key(note_id),) + self._note_size(note_data))
+        self._note_sizes_dirty = True
+    
     def load_stats(self):
         """Carga las estadísticas desde el archivo."""
         if os.path.exists(self.stats_path):
@@ -97,6 +215,8 @@ class EnhancedStatsManager:
                 json.dump(self.metrics, f, ensure_ascii=False, indent=2)
         except Exception as e:
             print(f"Error al guardar estadísticas: {e}")
+        
+        self.save_note_sizes()
     
     def start_session(self):
         """Inicia una nueva sesión de estadísticas."""
@@ -141,22 +261,18 @@ class EnhancedStatsManager:
         self.save_stats()
     
     def update_general_stats(self):
-        """Actualiza las estadísticas generales."""
-        # Contar notas totales
-        notes = self.data_manager.get_all_notes()
-        self.metrics["general"]["total_notes"] = len(notes)
+        """Actualiza las estadísticas generales (con los totales ya calculados)."""
+        # Terminar las notas que aún no se han analizado en segundo plano
+        self._compute_pending_sizes()
         
-        # Contar caracteres y palabras totales
-        total_chars = 0
-        total_words = 0
-        
-        for note_id, note_data in notes.items():
-            content = note_data.get("content", "")
-            total_chars += len(content)
-            total_words += len(content.split())
+        # Contar notas totales
+        self.metrics["general"]["total_notes"] = len(self._note_sizes)
         
+        # Caracteres y palabras totales, mantenidos al cambiar cada nota
+        total_chars, total_words, total_plain_chars = self._totals
         self.metrics["general"]["total_chars"] = total_chars
         self.metrics["general"]["total_words"] = total_words
+        self.metrics["general"]["total_plain_chars"] = total_plain_chars
         
         # Calcular longitud promedio de notas
         if self.metrics["general"]["total_notes"] > 0:
@@ -164,6 +280,13 @@ class EnhancedStatsManager:
         
     def update_tag_stats(self):
         """Actualiza las estadísticas de etiquetas."""
+        if self.tag_manager:
+            self.metrics["tags"]["tag_usage"] = self.tag_manager.get_tag_counts()
+            self.metrics["tags"]["most_used_tags"] = [
+                tag for tag, count in self.tag_manager.get_top_tags(5)
+            ]
+            return
+        
         notes = self.data_manager.get_all_notes()
         tag_usage = {}
         
@@ -184,6 +307,10 @@ class EnhancedStatsManager:
     
     def update_reminder_stats(self):
         """Actualiza las estadísticas de recordatorios."""
+        if self.date_index:
+            self.metrics["reminders"].update(self.date_index.get_reminder_summary())
+            return
+        
         notes = self.data_manager.get_all_notes()
         total_reminders = 0
         completed_reminders = 0
@@ -333,6 +460,11 @@ class EnhancedStatsWidget(QWidget):
         grid_layout.addWidget(StatsNameLabel("Longitud promedio:"), 1, 2)
         grid_layout.addWidget(self.avg_length_label, 1, 3)
         
+        # Tercera fila
+        self.total_plain_chars_label = StatsValueLabel("0")
+        grid_layout.addWidget(StatsNameLabel("Caracteres de texto:"), 2, 0)
+        grid_layout.addWidget(self.total_plain_chars_label, 2, 1)
+        
         general_layout.addLayout(grid_layout)
         
         # Separador
@@ -438,6 +570,7 @@ class EnhancedStatsWidget(QWidget):
         self.total_notes_label.setText(str(metrics["general"]["total_notes"]))
         self.total_chars_label.setText(str(metrics["general"]["total_chars"]))
         self.total_words_label.setText(str(metrics["general"]["total_words"]))
+        self.total_plain_chars_label.setText(str(metrics["general"]["total_plain_chars"]))
         self.avg_length_label.setText(f"{metrics['general']['avg_note_length']:.2f}")
         
         # Actualizar estadísticas de sesión
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Control de trabajos en segundo plano para NoteLite.
+Cancelación y limitación de ritmo (E/S y CPU) para tareas largas como los
+respaldos, de modo que no compitan con la interfaz.
+"""
+
+import time
+import threading
+
+
+class JobCancelled(Exception):
+    """Se lanza dentro de un trabajo cuando se ha pedido su cancelación."""
+
+
+class Throttle:
+    """
+    Limitador de ritmo para trabajos en segundo plano.
+
+    El trabajo llama a pause() tras cada unidad (por ejemplo, cada archivo)
+    indicando los bytes procesados. Se duerme lo necesario para no superar
+    max_bytes_per_second y para no usar más de cpu_fraction del tiempo, y se
+    lanza JobCancelled si se ha pedido cancelar. Las esperas se hacen sobre el
+    evento de cancelación, así que cancelar es inmediato.
+    """
+
+    def __init__(self, max_bytes_per_second=None, cpu_fraction=None, cancel_event=None):
+        """
+        Inicializa el limitador.
+
+        Args:
+            max_bytes_per_second: Límite de E/S (None = sin límite)
+            cpu_fraction: Fracción del tiempo que puede trabajar, entre 0 y 1
+                (None = sin límite)
+            cancel_event: threading.Event que indica cancelación
+        """
+        self.max_bytes_per_second = max_bytes_per_second
+        self.cpu_fraction = cpu_fraction
+        self.cancel_event = cancel_event or threading.Event()
+
+        self._started = time.monotonic()
+        self._bytes = 0
+        self._busy_since = self._started
+
+    def cancel(self):
+        """Pide la cancelación del trabajo."""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        """Indica si se ha pedido la cancelación."""
+        return self.cancel_event.is_set()
+
+    def _wait(self, seconds):
+        """Espera, interrumpible por la cancelación."""
+        if seconds > 0 and self.cancel_event.wait(seconds):
+            raise JobCancelled()
+
+    def pause(self, processed_bytes=0):
+        """Cede tiempo según los límites y comprueba la cancelación."""
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+        now = time.monotonic()
+
+        # CPU: descansar en proporción al tiempo trabajado desde la última pausa
+        if self.cpu_fraction and 0 < self.cpu_fraction < 1:
+            busy = now - self._busy_since
+            self._wait(busy * (1 - self.cpu_fraction) / self.cpu_fraction)
+
+        # E/S: no adelantarse al ritmo máximo permitido
+        self._bytes += processed_bytes
+        if self.max_bytes_per_second:
+            ahead = self._bytes / self.max_bytes_per_second - (time.monotonic() - self._started)
+            self._wait(ahead)
+
+        self._busy_since = time.monotonic()
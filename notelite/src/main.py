@@ -7,6 +7,7 @@ NoteLite - Una aplicación de notas moderna y ligera con temas retro.
 
 import sys
 import os
+import json
 import random
 import datetime
 import time
@@ -31,8 +32,12 @@ from multimedia_manager import MultimediaManager, MediaInsertDialog
 from markdown_manager import RetroMarkdownManager, MarkdownEditorHelper
 from template_dialog import TemplatesDialog
 from tag_manager import TagManager, TagSelectorWidget, TagFilterWidget
-from reminder_manager import ReminderManager, ReminderListWidget, ReminderDialog, ReminderNotificationDialog
+from reminder_manager import (ReminderManager, ReminderListWidget, ReminderDialog,
+                              ReminderNotificationDialog, MissedRemindersDialog)
 from calendar_widget import NoteCalendarWidget
+from date_index import DateIndex
+from notes_watcher import NotesWatcher
+from reminder_store import ProcessLock, APP_LOCK_NAME
 from resizable_note import ResizableNoteEditor, FormattingToolbar, StickyNoteWindow, create_sticky_note
 
 class NoteLiteApp(QMainWindow):
@@ -52,18 +57,26 @@ class NoteLiteApp(QMainWindow):
         self.data_manager = DataManager()
         self.templates_manager = TemplateManager(self.data_manager)
         self.stats_manager = StatsManager(self.data_manager)
-        self.enhanced_stats_manager = EnhancedStatsManager(self.data_manager)  # Estadísticas mejoradas
+        self.tag_manager = TagManager(self.data_manager)
+        self.reminder_manager = ReminderManager(self.data_manager)
+        
+        # Mientras la aplicación esté abierta avisa ella; reminderd solo espera
+        self.app_lock = ProcessLock(os.path.join(self.reminder_manager.reminders_dir, APP_LOCK_NAME))
+        self.app_lock.acquire()
+        
+        self.date_index = DateIndex(self.data_manager, self.reminder_manager)  # Fechas de notas y recordatorios
+        self.enhanced_stats_manager = EnhancedStatsManager(
+            self.data_manager, self.tag_manager, self.date_index)  # Estadísticas mejoradas
         self.multimedia_manager = MultimediaManager()
         self.markdown_manager = RetroMarkdownManager(self.theme_manager)
         self.markdown_helper = MarkdownEditorHelper()
-        self.tag_manager = TagManager(self.data_manager)
-        self.reminder_manager = ReminderManager(self.data_manager)
         
         # Diccionario para llevar registro de sticky notes abiertas
         self.sticky_notes = {}
         
         # Configurar callback para notificaciones de recordatorios
         self.reminder_manager.set_notification_callback(self.show_reminder_notification)
+        self.reminder_manager.set_missed_callback(self.show_missed_reminders)
         
         # Variables de sesión
         self.session_start_time = time.time()
@@ -80,11 +93,19 @@ class NoteLiteApp(QMainWindow):
         # Iniciar carga de notas
         self.load_notes()
         
+        # Recargar las notas que cambien otros programas (sincronización, otros editores)
+        self.notes_watcher = NotesWatcher(self.data_manager)
+        self.notes_watcher.notes_changed.connect(self.on_notes_changed_externally)
+        self.notes_watcher.start()
+        
         # Añadir efectos retro
         self.setup_retro_effects()
         
         # Registrar inicio de sesión
         self.stats_manager.record_app_launch()
+        
+        # Avisos vencidos con la aplicación cerrada (cuando ya se muestra la ventana)
+        QTimer.singleShot(0, self.reminder_manager.run_catch_up)
 
     def setup_ui(self):
         """Configura la interfaz de usuario."""
@@ -179,7 +200,7 @@ class NoteLiteApp(QMainWindow):
         left_tabs.addTab(self.navigation_panel, "Notas")
         
         # Tab de calendario
-        self.calendar_widget = NoteCalendarWidget(self.data_manager)
+        self.calendar_widget = NoteCalendarWidget(self.data_manager, self.date_index, self.reminder_manager)
         self.calendar_widget.note_selected.connect(self.open_note)
         left_tabs.addTab(self.calendar_widget, "Calendario")
         
@@ -378,7 +399,6 @@ class NoteLiteApp(QMainWindow):
         # Convertir a lista si es necesario
         if isinstance(old_content, str) and old_content:
             try:
-                import json
                 old_content = json.loads(old_content)
             except:
                 old_content = []
@@ -573,11 +593,8 @@ class NoteLiteApp(QMainWindow):
         note_data = self.data_manager.get_note(note_id)
         note_tags = note_data.get("tags", []) if note_data else []
         
-        # Obtener todas las etiquetas disponibles
-        all_tags = self.tag_manager.get_all_tags()
-        
-        # Añadir opciones para cada etiqueta
-        for tag_name in sorted(all_tags.keys()):
+        # Añadir opciones para cada etiqueta disponible
+        for tag_name in self.tag_manager.get_sorted_tag_names():
             tag_action = tags_menu.addAction(tag_name)
             tag_action.setCheckable(True)
             tag_action.setChecked(tag_name in note_tags)
@@ -589,7 +606,8 @@ class NoteLiteApp(QMainWindow):
             tag_action.toggled.connect(make_toggle_function(tag_name, note_id))
             
             # Agregar icono si está disponible
-            pixmap = self.tag_manager.create_tag_pixmap(tag_name)
+            pixmap = self.tag_manager.create_tag_pixmap(
+                tag_name, device_pixel_ratio=self.devicePixelRatioF())
             if pixmap:
                 tag_action.setIcon(QIcon(pixmap))
         
@@ -658,6 +676,54 @@ class NoteLiteApp(QMainWindow):
             if current_widget and hasattr(current_widget, 'note_id') and current_widget.note_id == note_id:
                 current_widget.set_title(name.strip())
     
+    def on_notes_changed_externally(self, note_ids):
+        """Actualiza el árbol y el editor con las notas que cambiaron por fuera."""
+        rows = {}
+        for i in range(self.tree_model.rowCount()):
+            item = self.tree_model.item(i)
+            rows[item.data(Qt.ItemDataRole.UserRole)] = item
+        
+        current_widget = self.editor_container.currentWidget()
+        current_id = getattr(current_widget, 'note_id', None)
+        
+        for note_id in note_ids:
+            note_data = self.data_manager.get_note(note_id)
+            item = rows.get(note_id)
+            if note_data is None:
+                if item is not None:
+                    self.tree_model.removeRow(item.row())
+                if note_id == current_id:
+                    self.editor_container.removeWidget(current_widget)
+                    current_widget.deleteLater()
+            elif item is None:
+                self.add_note_to_tree(note_id, note_data.get('title', 'Sin título'),
+                                      note_data.get('type', 'note'))
+            else:
+                item.setText(note_data.get('title', 'Sin título'))
+                item.setData(note_data.get('type', 'note'), Qt.ItemDataRole.UserRole + 1)
+            
+            # Mostrar la versión nueva de la nota abierta (si el editor ya la
+            # muestra no se reabre, para no perder el cursor ni el deshacer)
+            if (note_data is not None and note_id == current_id
+                    and not self._editor_shows_note(current_widget, note_data)):
+                self.open_note(note_id)
+        
+        self.show_status_message(f"{len(note_ids)} notas actualizadas desde el disco")
+    
+    def _editor_shows_note(self, editor, note_data):
+        """Indica si el editor abierto ya muestra el título y el contenido de la nota."""
+        if editor.title != note_data.get('title', ''):
+            return False
+        content = note_data.get('content', '')
+        if isinstance(editor, TaskListWidget):
+            if note_data.get('type') != 'task_list':
+                return False
+            try:
+                return json.loads(content) == editor.tasks
+            except (TypeError, ValueError):
+                return False
+        return note_data.get('type', 'note') != 'task_list' and editor.content == content
+    
     def on_tags_changed(self, tags):
         """Maneja cambios en las etiquetas de una nota."""
         # Esta señal ya actualiza los datos de la nota, solo necesitamos mostrar un mensaje
@@ -715,7 +781,9 @@ class NoteLiteApp(QMainWindow):
         if not ok or not name.strip():
             return
             
-        name = name.strip().lower()
+        name = self.tag_manager.normalize_tag_name(name.lower())
+        if not name:
+            return
         
         # Verificar si ya existe
         if name in self.tag_manager.get_all_tags():
@@ -754,44 +822,54 @@ class NoteLiteApp(QMainWindow):
         
         dialog = ReminderNotificationDialog(reminder, self)
         
-        # Sobrescribir métodos para manejar las acciones
-        original_dismiss = dialog.dismiss_reminder
-        original_complete = dialog.complete_reminder
-        original_snooze = dialog.snooze_reminder
+        # Mostrar diálogo
+        dialog.setWindowTitle(f"Recordatorio: {note_title}")
+        dialog.exec()
         
-        def dismiss_reminder_override():
+        # Aplicar la acción elegida (reprograma el recordatorio si hace falta)
+        if dialog.action == "dismiss":
             self.reminder_manager.update_reminder(reminder["id"], dismissed=True)
-            original_dismiss()
-            self.reminder_list.update_reminders_list()  # Actualizar lista si está visible
-            
-        def complete_reminder_override():
+        elif dialog.action == "complete":
             self.reminder_manager.update_reminder(reminder["id"], completed=True)
-            original_complete()
-            self.reminder_list.update_reminders_list()  # Actualizar lista si está visible
-            
-        def snooze_reminder_override():
-            # Esta función es llamada después de que el usuario elige un tiempo
-            times = {"5 minutos": 5, "15 minutos": 15, "30 minutos": 30, "1 hora": 60, "3 horas": 180}
-            choice = dialog.sender().text()
-            minutes = times.get(choice, 15)  # Por defecto 15 minutos
-            
-            # Calcular nueva fecha y hora
-            now = datetime.datetime.now()
-            new_time = now + datetime.timedelta(minutes=minutes)
-            
-            # Actualizar recordatorio
-            self.reminder_manager.update_reminder(reminder["id"], datetime_str=new_time.isoformat())
-            original_snooze()
-            self.reminder_list.update_reminders_list()  # Actualizar lista si está visible
-            
-        # Reemplazar métodos
-        dialog.dismiss_reminder = dismiss_reminder_override
-        dialog.complete_reminder = complete_reminder_override
-        dialog.snooze_reminder = snooze_reminder_override
+        elif dialog.action == "snooze":
+            self.reminder_manager.snooze_reminder(reminder["id"], dialog.snooze_minutes)
+        else:
+            return
         
-        # Mostrar diálogo
-        dialog.setWindowTitle(f"Recordatorio: {note_title}")
+        self.reminder_list.update_reminders_list()  # Actualizar lista si está visible
+    
+    def show_missed_reminders(self, missed):
+        """Muestra en un único diálogo los recordatorios perdidos."""
+        note_titles = {}
+        for item in missed:
+            note_id = item["reminder"]["note_id"]
+            note_data = self.data_manager.get_note(note_id)
+            if note_data:
+                note_titles[note_id] = note_data.get("title", "Nota")
+        
+        dialog = MissedRemindersDialog(missed, note_titles, self)
         dialog.exec()
+        
+        # Las acciones solo afectan a los simples: los periódicos ya avanzaron
+        for item in missed:
+            reminder = item["reminder"]
+            if reminder["repeat"]:
+                continue
+            if dialog.action == "dismiss":
+                self.reminder_manager.update_reminder(reminder["id"], dismissed=True)
+            elif dialog.action == "complete":
+                self.reminder_manager.update_reminder(reminder["id"], completed=True)
+        
+        self.reminder_list.update_reminders_list()
+    
+    def closeEvent(self, event):
+        """Registra el cierre para el repaso de avisos del próximo inicio."""
+        self.notes_watcher.stop()
+        self.enhanced_stats_manager.save_note_sizes()
+        self.reminder_manager.save_state()
+        self.reminder_manager.compact()
+        self.app_lock.release()
+        super().closeEvent(event)
             
     def load_notes(self, raw=False):
         """Carga las notas existentes.
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Exportación de notas para NoteLite.
+Convierte las notas a JSON, texto o HTML y las escribe en paralelo, un
+archivo por nota, con nombres únicos derivados de los títulos.
+"""
+
+import os
+import re
+import html
+import json
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+# Formatos de exportación y su extensión
+EXPORT_FORMATS = {"json": ".json", "txt": ".txt", "html": ".html"}
+
+# Caracteres no válidos en nombres de archivo (en algún sistema)
+_INVALID_CHARS = str.maketrans({char: "_" for char in '<>:"/\\|?*'})
+
+# Nombres reservados en Windows
+_RESERVED_NAMES = {"con", "prn", "aux", "nul",
+                   *(f"com{i}" for i in range(1, 10)), *(f"lpt{i}" for i in range(1, 10))}
+
+
+# Secciones cuyo contenido no es texto
+_SKIP_RE = re.compile(r"<(head|style|script|title)\b[^>]*>.*?</\1\s*>", re.S | re.I)
+
+# Etiquetas, comentarios y declaraciones
+_TAG_RE = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9]*)\b[^>]*>|<!--.*?-->|<![^>]*>", re.S)
+
+# Etiquetas que empiezan una línea nueva
+_BLOCK_TAGS = {"p", "div", "br", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "ul", "ol", "pre"}
+
+
+def _replace_tag(match):
+    """Sustituto de una etiqueta al pasar a texto."""
+    tag = (match.group(2) or "").lower()
+    if tag == "li":
+        return "" if match.group(1) else "\n- "
+    return "\n" if tag in _BLOCK_TAGS else ""
+
+
+def html_to_text(html_content):
+    """Convierte contenido HTML a texto plano en tiempo lineal."""
+    if "<" not in html_content and "&" not in html_content:
+        return html_content
+
+    text = _SKIP_RE.sub("", html_content)
+    text = _TAG_RE.sub(_replace_tag, text)
+    return html.unescape(text)
+
+
+def safe_filename(title, default="Nota sin título", max_length=120):
+    """Convierte un título en un nombre de archivo válido (sin extensión)."""
+    name = (title or "").translate(_INVALID_CHARS)
+    name = "".join(char for char in name if char >= " ").strip().rstrip(".")
+    name = name[:max_length].strip() or default
+    if name.lower() in _RESERVED_NAMES:
+        name = f"_{name}"
+    return name
+
+
+def unique_filenames(titles, extension):
+    """
+    Asigna a cada título un nombre de archivo distinto.
+
+    Los nombres repetidos (sin distinguir mayúsculas, como en Windows y macOS)
+    reciben un sufijo " (2)", " (3)"...
+
+    Returns:
+        Lista de nombres de archivo en el mismo orden que titles
+    """
+    used = set()
+    next_counter = {}  # nombre base -> siguiente sufijo a probar
+    names = []
+    for title in titles:
+        base = safe_filename(title)
+        key = base.lower()
+        name, counter = f"{base}{extension}", next_counter.get(key, 2)
+        while name.lower() in used:
+            name = f"{base} ({counter}){extension}"
+            counter += 1
+        next_counter[key] = counter
+        used.add(name.lower())
+        names.append(name)
+    return names
+
+
+def render_note(note_data, format):
+    """Genera el contenido exportado de una nota en el formato indicado."""
+    title = note_data.get('title', 'Sin título')
+
+    if format == "json":
+        return json.dumps(note_data, ensure_ascii=False, indent=2)
+
+    if format == "txt":
+        return (f"Título: {title}\n"
+                f"Fecha: {note_data.get('updated_at', '')}\n"
+                f"\n{html_to_text(note_data.get('content', ''))}")
+
+    if format == "html":
+        return (f"<html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title></head>"
+                f"<body>"
+                f"<h1>{html.escape(title)}</h1>"
+                f"<p><em>Fecha: {html.escape(note_data.get('updated_at', ''))}</em></p>"
+                f"{note_data.get('content', '')}"
+                f"</body></html>")
+
+    raise ValueError(f"Formato de exportación desconocido: {format}")
+
+
+def _write_note(path, note_data, format):
+    """Genera y escribe una nota exportada."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(render_note(note_data, format))
+
+
+def export_notes(notes, export_dir, format="json", progress=None, workers=None):
+    """
+    Exporta notas a export_dir, un archivo por nota.
+
+    Los nombres se asignan antes de empezar (por título, o por ID en JSON) y
+    las notas se generan y escriben en un grupo de hilos, con un número
+    acotado de trabajos en vuelo.
+
+    Args:
+        notes: Diccionario {note_id: note_data}
+        export_dir: Directorio de destino
+        format: "json", "txt" o "html"
+        progress: Callback opcional progress(hechos, total)
+        workers: Hilos a usar (por defecto, según los procesadores)
+
+    Returns:
+        Número de notas exportadas
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportación desconocido: {format}")
+    os.makedirs(export_dir, exist_ok=True)
+
+    items = sorted(notes.items(), key=lambda item: (item[1].get('title', '').lower(), item[0]))
+    if format == "json":
+        names = [f"{note_id}.json" for note_id, _ in items]
+    else:
+        names = unique_filenames([note_data.get('title', '') for _, note_data in items],
+                                 EXPORT_FORMATS[format])
+
+    total = len(items)
+    workers = workers or min(8, (os.cpu_count() or 1) + 2)
+    max_pending = workers * 4
+    done = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for (note_id, note_data), name in zip(items, names):
+            if len(pending) >= max_pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    future.result()
+                done += len(finished)
+                if progress:
+                    progress(done, total)
+            pending.add(executor.submit(_write_note, os.path.join(export_dir, name),
+                                        note_data, format))
+
+        for future in pending:
+            future.result()
+        done += len(pending)
+        if progress and total:
+            progress(done, total)
+
+    return total
@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Importación masiva de notas para NoteLite.
+Importa carpetas de archivos Markdown, texto y HTML, y exportaciones ENEX
+(XML de Evernote). Los archivos se interpretan en un grupo de procesos y las
+notas entran en el DataManager por lotes.
+"""
+
+import os
+import re
+import html
+import datetime
+import xml.etree.ElementTree as etree
+from concurrent.futures import ProcessPoolExecutor
+
+import markdown
+
+
+# Extensiones importables y su tipo
+IMPORT_EXTENSIONS = {
+    ".md": "markdown", ".markdown": "markdown",
+    ".txt": "text",
+    ".html": "html", ".htm": "html",
+    ".enex": "enex",
+}
+
+# Por debajo de este número de archivos no compensa arrancar procesos
+MIN_FILES_FOR_POOL = 200
+
+# Notas que se escriben en cada lote
+BATCH_SIZE = 500
+
+_MD_TITLE_RE = re.compile(r"^\s{0,3}#\s+(.+?)\s*#*\s*$", re.M)
+_HTML_TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>|<h1[^>]*>(.*?)</h1>", re.S | re.I)
+_HTML_BODY_RE = re.compile(r"<body[^>]*>(.*)</body>", re.S | re.I)
+_TAG_RE = re.compile(r"<[^>]+>")
+_EN_NOTE_RE = re.compile(r"<en-note[^>]*>(.*)</en-note>", re.S)
+
+# Separador de etiquetas jerárquicas de TagManager y su sustituto en las
+# etiquetas de Evernote, que son planas ("TCP/IP" no es "TCP" > "IP")
+_TAG_SEPARATOR = "/"
+_ENEX_TAG_SEPARATOR = "\u2215"
+
+
+def _text_to_html(text):
+    """Convierte texto plano en párrafos HTML."""
+    return "".join(f"<p>{html.escape(line)}</p>" if line else "<p><br></p>"
+                   for line in text.splitlines())
+
+
+def _file_times(path):
+    """Fechas de creación y modificación (ISO) de un archivo."""
+    stat = os.stat(path)
+    created = getattr(stat, "st_birthtime", None) or min(stat.st_ctime, stat.st_mtime)
+    return (datetime.datetime.fromtimestamp(created).isoformat(),
+            datetime.datetime.fromtimestamp(stat.st_mtime).isoformat())
+
+
+def parse_file(path):
+    """
+    Interpreta un archivo Markdown, de texto o HTML como nota.
+
+    Se ejecuta en los procesos del grupo, así que solo recibe y devuelve
+    datos simples.
+
+    Returns:
+        Diccionario con title, content, created_at y updated_at, o None si
+        no se pudo leer
+    """
+    kind = IMPORT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            text = f.read()
+        created_at, updated_at = _file_times(path)
+    except OSError as e:
+        print(f"Error al leer {path}: {e}")
+        return None
+
+    title = os.path.splitext(os.path.basename(path))[0]
+    if kind == "markdown":
+        match = _MD_TITLE_RE.search(text)
+        if match:
+            title = match.group(1)
+        content = markdown.markdown(text, extensions=['tables', 'fenced_code'])
+    elif kind == "html":
+        match = _HTML_TITLE_RE.search(text)
+        if match:
+            found = html.unescape(_TAG_RE.sub("", match.group(1) or match.group(2))).strip()
+            title = found or title
+        body = _HTML_BODY_RE.search(text)
+        content = body.group(1) if body else text
+    else:
+        content = _text_to_html(text)
+
+    return {"title": title, "content": content, "type": "note",
+            "created_at": created_at, "updated_at": updated_at}
+
+
+def _parse_enex_date(value):
+    """Convierte una fecha ENEX (20240131T120000Z) a ISO, o None."""
+    try:
+        moment = datetime.datetime.strptime(value or "", "%Y%m%dT%H%M%SZ")
+    except ValueError:
+        return None
+    moment = moment.replace(tzinfo=datetime.timezone.utc).astimezone()
+    return moment.replace(tzinfo=None).isoformat()
+
+
+def _enex_tag_name(text):
+    """Nombre de etiqueta de NoteLite para una etiqueta de Evernote (None si está vacía).
+
+    Se compactan los espacios y la barra se sustituye por una barra de
+    división, de modo que el nombre ya está normalizado y TagManager lo
+    define tal cual, sin crear una jerarquía.
+    """
+    name = " ".join((text or "").split()).replace(_TAG_SEPARATOR, _ENEX_TAG_SEPARATOR)
+    return name or None
+
+
+def parse_enex(path):
+    """
+    Recorre las notas de una exportación ENEX sin cargarla entera.
+
+    Yields:
+        Diccionarios de nota como los de parse_file (más tags)
+    """
+    for _, element in etree.iterparse(path, events=("end",)):
+        if element.tag != "note":
+            continue
+
+        content = element.findtext("content") or ""
+        match = _EN_NOTE_RE.search(content)
+        now = datetime.datetime.now().isoformat()
+        note = {
+            "title": element.findtext("title") or "Nota importada",
+            "content": match.group(1) if match else content,
+            "type": "note",
+            "created_at": _parse_enex_date(element.findtext("created")) or now,
+            "updated_at": _parse_enex_date(element.findtext("updated")) or now,
+        }
+        tags = []
+        for tag in element.findall("tag"):
+            name = _enex_tag_name(tag.text)
+            if name and name not in tags:
+                tags.append(name)
+        if tags:
+            note["tags"] = tags
+
+        element.clear()
+        yield note
+
+
+def find_importable_files(source):
+    """Lista los archivos importables de una carpeta (o el propio archivo)."""
+    if os.path.isfile(source):
+        return [source] if os.path.splitext(source)[1].lower() in IMPORT_EXTENSIONS else []
+
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(source):
+        dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+        for name in filenames:
+            if os.path.splitext(name)[1].lower() in IMPORT_EXTENSIONS:
+                paths.append(os.path.join(dirpath, name))
+    paths.sort()
+    return paths
+
+
+def _parsed_notes(paths, workers):
+    """Interpreta los archivos (en paralelo si son muchos), en orden."""
+    if len(paths) < MIN_FILES_FOR_POOL or workers == 1:
+        yield from map(parse_file, paths)
+        return
+
+    try:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    except (OSError, NotImplementedError) as e:
+        # Sin multiprocesamiento disponible: en este proceso
+        print(f"Importando sin procesos auxiliares: {e}")
+        yield from map(parse_file, paths)
+        return
+
+    with executor:
+        chunksize = max(1, min(256, len(paths) // ((workers or os.cpu_count() or 1) * 8)))
+        yield from executor.map(parse_file, paths, chunksize=chunksize)
+
+
+def import_notes(source, data_manager, progress=None, workers=None, on_tags=None):
+    """
+    Importa una carpeta (o un archivo) en el DataManager.
+
+    Args:
+        source: Carpeta con archivos .md, .txt, .html o .enex, o uno de ellos
+        data_manager: Gestor de datos
+        progress: Callback opcional progress(hechos, total); el total cuenta
+            archivos, y cada exportación ENEX suma sus notas al avanzar
+        workers: Procesos a usar (por defecto, uno por procesador)
+        on_tags: Callback opcional on_tags(nombres) con las etiquetas de cada
+            lote, llamado antes de crear sus notas para que se puedan dar de
+            alta las que no existan
+
+    Returns:
+        Lista de IDs de las notas creadas
+    """
+    paths = find_importable_files(source)
+    enex_paths = [path for path in paths if path.lower().endswith(".enex")]
+    file_paths = [path for path in paths if not path.lower().endswith(".enex")]
+
+    total = len(paths)
+    done = 0
+    created = []
+    batch = []
+
+    def flush():
+        if on_tags:
+            tag_names = {tag for note in batch for tag in note.get("tags", ())}
+            if tag_names:
+                on_tags(tag_names)
+        created.extend(data_manager.create_notes(batch))
+        batch.clear()
+
+    for note in _parsed_notes(file_paths, workers):
+        done += 1
+        if note is not None:
+            batch.append(note)
+        if len(batch) >= BATCH_SIZE:
+            flush()
+            if progress:
+                progress(done, total)
+
+    for path in enex_paths:
+        try:
+            for note in parse_enex(path):
+                batch.append(note)
+                if len(batch) >= BATCH_SIZE:
+                    flush()
+                    if progress:
+                        progress(done, total)
+        except (OSError, etree.ParseError) as e:
+            print(f"Error al importar {path}: {e}")
+        done += 1
+
+    if batch:
+        flush()
+    if progress:
+        progress(done, total)
+    return created
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Fusión a tres bandas de notas para NoteLite.
+Combina dos versiones de una nota modificada en dos dispositivos a partir de
+la última versión común, para que la sincronización solo tenga que crear una
+copia de conflicto cuando los cambios chocan de verdad.
+"""
+
+import json
+from difflib import SequenceMatcher
+
+
+# Campo ausente en una versión (distinto de un campo con valor None)
+_MISSING = object()
+
+
+def _matches(base, other):
+    """Posición en other de cada elemento de base que no cambió."""
+    matches = {}
+    matcher = SequenceMatcher(None, base, other, autojunk=False)
+    for base_start, other_start, size in matcher.get_matching_blocks():
+        for offset in range(size):
+            matches[base_start + offset] = other_start + offset
+    return matches
+
+
+def merge_sequences(base, local, remote):
+    """
+    Fusiona dos secuencias derivadas de base (por ejemplo, listas de líneas).
+
+    Las zonas que solo cambió un lado se toman de ese lado y las que
+    cambiaron los dos igual, de cualquiera. Si los dos lados cambiaron de
+    forma distinta la misma zona, hay conflicto.
+
+    Returns:
+        Lista fusionada, o None si hay conflicto
+    """
+    local_matches = _matches(base, local)
+    remote_matches = _matches(base, remote)
+
+    merged = []
+    base_pos = local_pos = remote_pos = 0
+    for index in range(len(base) + 1):
+        # Elementos de base que siguen en su sitio en los dos lados (y el final)
+        if index < len(base):
+            if index not in local_matches or index not in remote_matches:
+                continue
+            local_end, remote_end = local_matches[index], remote_matches[index]
+            if local_end < local_pos or remote_end < remote_pos:
+                continue
+        else:
+            local_end, remote_end = len(local), len(remote)
+
+        base_chunk = base[base_pos:index]
+        local_chunk = local[local_pos:local_end]
+        remote_chunk = remote[remote_pos:remote_end]
+        if local_chunk == base_chunk:
+            merged.extend(remote_chunk)
+        elif remote_chunk == base_chunk or local_chunk == remote_chunk:
+            merged.extend(local_chunk)
+        else:
+            return None
+
+        if index < len(base):
+            merged.append(base[index])
+        base_pos, local_pos, remote_pos = index + 1, local_end + 1, remote_end + 1
+
+    return merged
+
+
+def merge_text(base, local, remote):
+    """
+    Fusiona un texto por líneas (el HTML del editor tiene un bloque por línea).
+
+    Returns:
+        Texto fusionado, o None si hay conflicto
+    """
+    merged = merge_sequences(base.splitlines(keepends=True),
+                             local.splitlines(keepends=True),
+                             remote.splitlines(keepends=True))
+    return None if merged is None else "".join(merged)
+
+
+def _merge_value(base, local, remote):
+    """Fusión a tres bandas de un valor indivisible.
+
+    Returns:
+        Tupla (éxito, valor)
+    """
+    if local == remote or remote == base:
+        return True, local
+    if local == base:
+        return True, remote
+    return False, None
+
+
+def merge_tasks(base, local, remote):
+    """
+    Fusiona dos listas de tareas tarea a tarea.
+
+    El orden y los textos se fusionan como una secuencia (una tarea por
+    elemento) y el estado de cada tarea por separado, así que marcar una
+    tarea en un dispositivo y añadir otra en el otro no es un conflicto.
+
+    Returns:
+        Lista de tareas fusionada, o None si hay conflicto
+    """
+    texts = merge_sequences([task.get("text", "") for task in base],
+                            [task.get("text", "") for task in local],
+                            [task.get("text", "") for task in remote])
+    if texts is None:
+        return None
+
+    def states(tasks):
+        result = {}
+        for task in tasks:
+            result.setdefault(task.get("text", ""), task.get("completed", False))
+        return result
+
+    base_states, local_states, remote_states = states(base), states(local), states(remote)
+
+    merged = []
+    for text in texts:
+        in_local, in_remote = text in local_states, text in remote_states
+        if in_local and in_remote:
+            ok, completed = _merge_value(base_states.get(text, False),
+                                         local_states[text], remote_states[text])
+            if not ok:
+                # Solo puede pasar con una tarea nueva en los dos lados
+                completed = local_states[text] or remote_states[text]
+        else:
+            completed = local_states[text] if in_local else remote_states[text]
+        merged.append({"text": text, "completed": completed})
+    return merged
+
+
+def _merge_tags(base, local, remote):
+    """Fusiona etiquetas como conjuntos: se aplican altas y bajas de ambos lados."""
+    base, local, remote = set(base or []), set(local or []), set(remote or [])
+    merged = (base & local & remote) | (local - base) | (remote - base)
+    return sorted(merged)
+
+
+def _merge_content(note_type, base, local, remote):
+    """Fusiona el contenido de una nota según su tipo."""
+    if note_type == "task_list":
+        try:
+            tasks = merge_tasks(json.loads(base or "[]"), json.loads(local or "[]"),
+                                json.loads(remote or "[]"))
+        except (ValueError, TypeError, AttributeError):
+            return None
+        return None if tasks is None else json.dumps(tasks)
+    return merge_text(base or "", local or "", remote or "")
+
+
+def merge_notes(base, local, remote):
+    """
+    Fusiona a tres bandas dos versiones de una nota.
+
+    Cada campo se fusiona por separado: el contenido por líneas (o por
+    tareas en las listas de tareas), las etiquetas como conjuntos, la fecha
+    de modificación tomando la más reciente y el resto como valores enteros.
+
+    Args:
+        base: Diccionario de la última versión común
+        local: Diccionario de la versión local
+        remote: Diccionario de la versión remota
+
+    Returns:
+        Diccionario de la nota fusionada, o None si no se puede fusionar
+    """
+    merged = {}
+    for key in dict.fromkeys(list(local) + list(remote) + list(base)):
+        values = [note.get(key, _MISSING) for note in (base, local, remote)]
+        ok, value = _merge_value(*values)
+        if not ok:
+            base_value, local_value, remote_value = (
+                None if item is _MISSING else item for item in values)
+            if key == "content":
+                note_type = local.get("type") or remote.get("type") or "note"
+                value = _merge_content(note_type, base_value, local_value, remote_value)
+                ok = value is not None
+            elif key == "tags":
+                ok, value = True, _merge_tags(base_value, local_value, remote_value)
+            elif key == "updated_at":
+                ok, value = True, max(local_value or "", remote_value or "")
+            if not ok:
+                return None
+        if value is not _MISSING:
+            merged[key] = value
+    return merged
+
+
+def merge_note_files(base_data, local_data, remote_data):
+    """
+    Fusiona tres versiones del archivo JSON de una nota.
+
+    Returns:
+        Bytes del archivo fusionado, o None si no se puede fusionar
+    """
+    try:
+        base, local, remote = (json.loads(data.decode('utf-8'))
+                               for data in (base_data, local_data, remote_data))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not all(isinstance(note, dict) for note in (base, local, remote)):
+        return None
+
+    merged = merge_notes(base, local, remote)
+    if merged is None:
+        return None
+    return json.dumps(merged, ensure_ascii=False, indent=2).encode('utf-8')
@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Vigilancia de la carpeta de notas para NoteLite.
+Detecta los cambios que otros programas (una herramienta de sincronización,
+otro editor...) hacen en ~/NoteLite/notes y recarga solo las notas
+afectadas, para que la aplicación no siga mostrando ni vuelva a guardar una
+versión antigua. Usa inotify en Linux y, si no está disponible, comprueba la
+carpeta periódicamente.
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import threading
+import ctypes
+import ctypes.util
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+# Eventos de inotify que interesan (ver inotify(7))
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+               | IN_DELETE_SELF | IN_MOVE_SELF)
+
+# Cabecera de cada evento: wd, mask, cookie, len
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _note_id(filename):
+    """ID de la nota de un archivo de la carpeta (None si no es una nota)."""
+    if filename.endswith(".json") and not filename.startswith("."):
+        return filename[:-5]
+    return None
+
+
+class _InotifyBackend:
+    """Eventos de la carpeta mediante inotify (llamado a través de ctypes)."""
+
+    def __init__(self, notes_dir):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify solo está disponible en Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("La biblioteca C no ofrece inotify")
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        # La carpeta vigilada se borró o se movió: hay que volver a abrirla
+        self.watch_lost = False
+        if libc.inotify_add_watch(self.fd, os.fsencode(notes_dir), _WATCH_MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, os.strerror(error))
+
+    def read(self, timeout):
+        """
+        Espera eventos como mucho timeout segundos.
+
+        Returns:
+            Conjunto de IDs de nota afectados, o None si hay que revisar toda
+            la carpeta (se perdieron eventos)
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return set()
+            raise
+
+        changed = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].split(b"\0", 1)[0]
+            offset += length
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                self.watch_lost = True
+                return None
+            if mask & IN_Q_OVERFLOW:
+                return None
+            note_id = _note_id(os.fsdecode(name))
+            if note_id:
+                changed.add(note_id)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _PollingBackend:
+    """Cambios de la carpeta comparando el tamaño y la fecha de sus archivos."""
+
+    def __init__(self, notes_dir, interval, stop_event):
+        self.notes_dir = notes_dir
+        self.interval = interval
+        self.stop_event = stop_event
+        self.snapshot = self._scan()
+        self.next_poll = time.monotonic() + interval
+
+    def _scan(self):
+        snapshot = {}
+        try:
+            with os.scandir(self.notes_dir) as entries:
+                for entry in entries:
+                    note_id = _note_id(entry.name)
+                    if note_id:
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        snapshot[note_id] = (stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            # La carpeta no existe (borrada o aún sin crear): sin notas
+            pass
+        except OSError as e:
+            print(f"Error al revisar la carpeta de notas: {e}")
+        return snapshot
+
+    def read(self, timeout):
+        """Espera a la próxima revisión (o timeout) y devuelve los IDs cambiados."""
+        wait = max(0, min(timeout, self.next_poll - time.monotonic()))
+        if self.stop_event.wait(wait) or time.monotonic() < self.next_poll:
+            return set()
+
+        self.next_poll = time.monotonic() + self.interval
+        snapshot = self._scan()
+        changed = {note_id for note_id in snapshot.keys() | self.snapshot.keys()
+                   if snapshot.get(note_id) != self.snapshot.get(note_id)}
+        self.snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+class NotesWatcher(QObject):
+    """
+    Vigila la carpeta de notas y recarga las que cambian por fuera.
+
+    Los eventos se agrupan hasta que la carpeta lleva DEBOUNCE_SECONDS sin
+    cambios (una sincronización escribe muchos archivos seguidos) y después,
+    en el hilo de la interfaz, DataManager.reload_changed_notes recarga solo
+    las notas cuyo archivo ya no es el que escribió la aplicación. Los
+    observadores del DataManager (etiquetas, fechas...) reciben cada nota
+    recargada y notes_changed avisa a la interfaz.
+    """
+
+    # Señal con los IDs de las notas recargadas o eliminadas
+    notes_changed = pyqtSignal(list)
+
+    # IDs detectados en el hilo de vigilancia (None: revisar todas)
+    _changes_detected = pyqtSignal(object)
+
+    # Segundos sin eventos antes de recargar
+    DEBOUNCE_SECONDS = 0.3
+
+    # Espera máxima si los eventos no paran
+    MAX_DELAY_SECONDS = 2.0
+
+    # Intervalo de revisión sin inotify
+    POLL_INTERVAL_SECONDS = 2.0
+
+    def __init__(self, data_manager, use_inotify=True):
+        """
+        Inicializa el vigilante.
+
+        Args:
+            data_manager: Gestor de datos cuyas notas se vigilan
+            use_inotify: Usar inotify si está disponible (si no, revisión periódica)
+        """
+        super().__init__()
+        self.data_manager = data_manager
+        self.use_inotify = use_inotify
+        self.backend_name = None
+        self._backend = None
+        self._waiting_for_dir = False
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._changes_detected.connect(self._apply_changes)
+
+    def start(self):
+        """Empieza a vigilar la carpeta en un hilo aparte."""
+        if self._thread is not None:
+            return
+
+        self._stop_event.clear()
+        self._backend = self._open_backend()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _open_backend(self):
+        """Abre inotify sobre la carpeta de notas o, si no se puede, la revisión periódica."""
+        notes_dir = self.data_manager.notes_dir
+        # Sin carpeta no hay nada que vigilar con inotify: se revisa hasta que exista
+        self._waiting_for_dir = self.use_inotify and not os.path.isdir(notes_dir)
+        if self.use_inotify and not self._waiting_for_dir:
+            try:
+                backend = _InotifyBackend(notes_dir)
+                self.backend_name = "inotify"
+                return backend
+            except (OSError, AttributeError) as e:
+                print(f"Vigilando las notas sin inotify: {e}")
+        self.backend_name = "polling"
+        return _PollingBackend(notes_dir, self.POLL_INTERVAL_SECONDS, self._stop_event)
+
+    def stop(self):
+        """Deja de vigilar la carpeta."""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self._backend.close()
+        self._backend = None
+
+    def _run(self):
+        """Bucle del hilo de vigilancia: agrupa los eventos y los envía."""
+        pending = set()
+        rescan = False
+        first_event = last_event = 0.0
+
+        while not self._stop_event.is_set():
+            timeout = self.DEBOUNCE_SECONDS if pending or rescan else 0.5
+            try:
+                changed = self._backend.read(timeout)
+            except OSError as e:
+                print(f"Error al vigilar la carpeta de notas: {e}")
+                self._stop_event.wait(self.POLL_INTERVAL_SECONDS)
+                continue
+
+            if getattr(self._backend, "watch_lost", False) or (
+                    self._waiting_for_dir and os.path.isdir(self.data_manager.notes_dir)):
+                # La carpeta se borró o se movió y el kernel quitó la vigilancia
+                # (o vuelve a existir): se vigila la carpeta actual, o se revisa
+                # periódicamente mientras no exista, y se revisan todas las notas
+                self._backend.close()
+                self._backend = self._open_backend()
+                changed = None
+
+            now = time.monotonic()
+            if changed is None or changed:
+                if not pending and not rescan:
+                    first_event = now
+                last_event = now
+                if changed is None:
+                    rescan = True
+                else:
+                    pending |= changed
+
+            if (pending or rescan) and (now - last_event >= self.DEBOUNCE_SECONDS
+                                        or now - first_event >= self.MAX_DELAY_SECONDS):
+                self._changes_detected.emit(None if rescan else pending)
+                pending = set()
+                rescan = False
+
+    def _apply_changes(self, note_ids):
+        """Recarga las notas cambiadas (en el hilo de la interfaz)."""
+        changed = self.data_manager.reload_changed_notes(note_ids)
+        if changed:
+            self.notes_changed.emit(changed)
@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Motor de recurrencias para NoteLite.
+Reglas de repetición al estilo RRULE (intervalos, días de la semana, n-ésimo
+día de la semana del mes, fin por fecha o por número de repeticiones y
+excepciones) que generan las ocurrencias de forma perezosa.
+"""
+
+import calendar
+import datetime
+
+
+class RecurrenceRule:
+    """
+    Regla de recurrencia para recordatorios.
+
+    Las ocurrencias se calculan a partir de una fecha de inicio (dtstart) y
+    solo se generan las que se piden, de modo que una serie infinita nunca se
+    materializa: consultar una ventana salta directamente al primer periodo
+    que puede contenerla.
+    """
+
+    FREQUENCIES = ("daily", "weekly", "monthly", "yearly")
+    WEEKDAY_CODES = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+    # Periodos máximos a recorrer buscando una ocurrencia (protege frente a
+    # reglas que nunca producen fechas, como el día 31 de cada febrero)
+    MAX_EMPTY_PERIODS = 5000
+
+    def __init__(self, freq, interval=1, weekdays=None, week_number=None,
+                 month_days=None, until=None, count=None, exdates=None):
+        """
+        Crea una regla de recurrencia.
+
+        Args:
+            freq: Frecuencia ('daily', 'weekly', 'monthly' o 'yearly')
+            interval: Cada cuántos periodos se repite (1 = todos)
+            weekdays: Días de la semana (0 = lunes ... 6 = domingo). En reglas
+                semanales indica qué días; en diarias filtra; en mensuales,
+                junto con week_number, el n-ésimo día de la semana del mes
+            week_number: Posición del día de la semana en el mes (1..5, o -1
+                para el último). Solo para reglas mensuales
+            month_days: Días del mes (1..31, o negativos desde el final).
+                Solo para reglas mensuales
+            until: Fecha límite (incluida) o None
+            count: Número total de ocurrencias o None
+            exdates: Fechas excluidas de la serie
+        """
+        if freq not in self.FREQUENCIES:
+            raise ValueError(f"Frecuencia no soportada: {freq}")
+
+        self.freq = freq
+        self.interval = max(1, int(interval))
+        self.weekdays = sorted(set(weekdays or []))
+        self.week_number = week_number
+        self.month_days = list(month_days or [])
+        self.until = until
+        self.count = count
+        self.exdates = set(exdates or [])
+
+    @classmethod
+    def from_repeat(cls, repeat):
+        """
+        Crea una regla a partir del campo 'repeat' de un recordatorio.
+
+        Acepta los valores clásicos ('daily', 'weekly', 'monthly', 'yearly'),
+        un diccionario generado con to_dict() o None.
+
+        Returns:
+            RecurrenceRule o None si el recordatorio no se repite
+        """
+        if not repeat:
+            return None
+        if isinstance(repeat, str):
+            return cls(repeat)
+        if isinstance(repeat, dict):
+            return cls.from_dict(repeat)
+        raise ValueError(f"Repetición no válida: {repeat!r}")
+
+    @classmethod
+    def from_dict(cls, data):
+        """Crea una regla a partir de su representación serializable."""
+        def parse(value):
+            return datetime.datetime.fromisoformat(value) if value else None
+
+        return cls(
+            data["freq"],
+            interval=data.get("interval", 1),
+            weekdays=[cls.WEEKDAY_CODES.index(code) for code in data.get("weekdays", [])],
+            week_number=data.get("week_number"),
+            month_days=data.get("month_days"),
+            until=parse(data.get("until")),
+            count=data.get("count"),
+            exdates=[parse(value) for value in data.get("exdates", [])]
+        )
+
+    def to_dict(self):
+        """Devuelve una representación serializable en JSON."""
+        data = {"freq": self.freq, "interval": self.interval}
+        if self.weekdays:
+            data["weekdays"] = [self.WEEKDAY_CODES[day] for day in self.weekdays]
+        if self.week_number is not None:
+            data["week_number"] = self.week_number
+        if self.month_days:
+            data["month_days"] = self.month_days
+        if self.until is not None:
+            data["until"] = self.until.isoformat()
+        if self.count is not None:
+            data["count"] = self.count
+        if self.exdates:
+            data["exdates"] = sorted(value.isoformat() for value in self.exdates)
+        return data
+
+    def to_repeat(self):
+        """Devuelve el valor para el campo 'repeat' (cadena si la regla es simple)."""
+        if self.to_dict() == {"freq": self.freq, "interval": 1}:
+            return self.freq
+        return self.to_dict()
+
+    # --- Generación de ocurrencias ---
+
+    def _period_index(self, dtstart, moment):
+        """Primer periodo que puede contener ocurrencias posteriores a moment."""
+        if moment <= dtstart:
+            return 0
+
+        if self.freq == "daily":
+            elapsed = (moment.date() - dtstart.date()).days
+        elif self.freq == "weekly":
+            elapsed = (moment.date() - dtstart.date()).days // 7
+        elif self.freq == "monthly":
+            elapsed = (moment.year - dtstart.year) * 12 + moment.month - dtstart.month
+        else:
+            elapsed = moment.year - dtstart.year
+
+        return max(0, elapsed // self.interval)
+
+    def _period_start(self, dtstart, index):
+        """Primer día del periodo con el índice indicado."""
+        start = dtstart.date()
+
+        if self.freq == "daily":
+            return start + datetime.timedelta(days=index * self.interval)
+        if self.freq == "weekly":
+            week_start = start - datetime.timedelta(days=start.weekday())
+            return week_start + datetime.timedelta(weeks=index * self.interval)
+        if self.freq == "monthly":
+            months = start.month - 1 + index * self.interval
+            return datetime.date(start.year + months // 12, months % 12 + 1, 1)
+        return datetime.date(start.year + index * self.interval, 1, 1)
+
+    def _period_dates(self, dtstart, period_start):
+        """Fechas candidatas (ordenadas) de un periodo."""
+        if self.freq == "daily":
+            if self.weekdays and period_start.weekday() not in self.weekdays:
+                return []
+            return [period_start]
+
+        if self.freq == "weekly":
+            weekdays = self.weekdays or [dtstart.weekday()]
+            return [period_start + datetime.timedelta(days=day) for day in weekdays]
+
+        year, month = period_start.year, period_start.month
+
+        if self.freq == "yearly":
+            month = dtstart.month
+
+        days_in_month = calendar.monthrange(year, month)[1]
+
+        if self.freq == "monthly" and self.weekdays:
+            # Todos los días del mes que caen en los días de la semana indicados
+            days = [day for day in range(1, days_in_month + 1)
+                    if datetime.date(year, month, day).weekday() in self.weekdays]
+            if self.week_number is not None:
+                # n-ésimo de cada día de la semana (p. ej. segundo martes)
+                selected = []
+                for weekday in self.weekdays:
+                    matching = [day for day in days
+                                if datetime.date(year, month, day).weekday() == weekday]
+                    position = self.week_number - 1 if self.week_number > 0 else self.week_number
+                    if -len(matching) <= position < len(matching):
+                        selected.append(matching[position])
+                days = sorted(selected)
+        elif self.freq == "monthly" and self.month_days:
+            days = set()
+            for day in self.month_days:
+                actual = day if day > 0 else days_in_month + day + 1
+                if 1 <= actual <= days_in_month:
+                    days.add(actual)
+            days = sorted(days)
+        else:
+            # Mismo día que dtstart; si el mes es más corto, su último día
+            # (sin arrastrar el ajuste a los meses siguientes)
+            days = [min(dtstart.day, days_in_month)]
+
+        return [datetime.date(year, month, day) for day in days]
+
+    def iter_occurrences(self, dtstart, after=None, inclusive=True):
+        """
+        Genera las ocurrencias de la serie en orden, de forma perezosa.
+
+        Args:
+            dtstart: Fecha y hora de inicio de la serie
+            after: Si se indica, solo se generan las ocurrencias a partir de él
+            inclusive: Si es False, excluye una ocurrencia igual a after
+        """
+        # Con count hay que contar desde el principio; si no, se salta
+        # directamente al periodo que contiene 'after'
+        index = 0 if self.count is not None or after is None else self._period_index(dtstart, after)
+        produced = 0
+        empty_periods = 0
+
+        while True:
+            period_start = self._period_start(dtstart, index)
+            index += 1
+
+            if self.until is not None and period_start > self.until.date():
+                return
+
+            found = False
+            for date in self._period_dates(dtstart, period_start):
+                occurrence = datetime.datetime.combine(date, dtstart.timetz())
+                if occurrence < dtstart:
+                    continue
+                if self.until is not None and occurrence > self.until:
+                    return
+
+                found = True
+                produced += 1
+                if self.count is not None and produced > self.count:
+                    return
+
+                if occurrence in self.exdates:
+                    continue
+                if after is not None and (occurrence < after or (occurrence == after and not inclusive)):
+                    continue
+                yield occurrence
+
+            empty_periods = 0 if found else empty_periods + 1
+            if empty_periods > self.MAX_EMPTY_PERIODS:
+                return
+
+    def between(self, dtstart, start, end):
+        """Devuelve las ocurrencias con start <= fecha <= end."""
+        occurrences = []
+        for occurrence in self.iter_occurrences(dtstart, after=start):
+            if occurrence > end:
+                break
+            occurrences.append(occurrence)
+        return occurrences
+
+    def next_after(self, dtstart, moment):
+        """Devuelve la primera ocurrencia estrictamente posterior a moment (o None)."""
+        return next(self.iter_occurrences(dtstart, after=moment, inclusive=False), None)
+
+    def describe(self):
+        """Descripción breve de la regla en español."""
+        units = {
+            "daily": ("día", "días"),
+            "weekly": ("semana", "semanas"),
+            "monthly": ("mes", "meses"),
+            "yearly": ("año", "años"),
+        }
+        singular, plural = units[self.freq]
+        text = f"Cada {singular}" if self.interval == 1 else f"Cada {self.interval} {plural}"
+
+        if self.weekdays:
+            names = ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"]
+            days = ", ".join(names[day] for day in self.weekdays)
+            if self.week_number is not None:
+                ordinal = "último" if self.week_number == -1 else f"{self.week_number}º"
+                text += f", el {ordinal} {days}"
+            else:
+                text += f" ({days})"
+        elif self.month_days:
+            text += ", días " + ", ".join(str(day) for day in self.month_days)
+
+        if self.until is not None:
+            text += f" hasta el {self.until.strftime('%d/%m/%Y')}"
+        if self.count is not None:
+            text += f", {self.count} veces"
+        return text
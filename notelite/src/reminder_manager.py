@@ -6,192 +6,57 @@ Gestor de recordatorios para NoteLite.
 Permite crear, editar y gestionar recordatorios asociados a notas.
 """
 
-import os
-import json
-import time
 import datetime
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                             QDateTimeEdit, QLineEdit, QListWidget, QListWidgetItem,
-                            QPushButton, QDialog, QMessageBox, QCheckBox, QComboBox)
-from PyQt6.QtCore import Qt, pyqtSignal, QDateTime, QTimer, QSize
+                            QPushButton, QDialog, QMessageBox, QCheckBox, QComboBox,
+                            QSpinBox, QDateEdit)
+from PyQt6.QtCore import Qt, pyqtSignal, QDateTime, QDate, QTimer, QSize
 from PyQt6.QtGui import QIcon, QPixmap
-import winsound
+try:
+    import winsound
+except ImportError:
+    # Solo existe en Windows; en otros sistemas no hay aviso sonoro
+    winsound = None
 
+from recurrence import RecurrenceRule
+from reminder_store import ReminderStore
 
-class ReminderManager:
+
+class ReminderManager(ReminderStore):
     """
     Gestor para manejar recordatorios asociados a notas.
+    
+    Añade al almacén un único QTimer de disparo único armado para el
+    recordatorio más próximo, y el aviso sonoro en Windows.
     """
     
+    # Intervalo máximo del temporizador: se rearma al menos cada hora para
+    # tolerar cambios de hora del sistema o suspensiones del equipo
+    MAX_TIMER_INTERVAL_MS = 60 * 60 * 1000
+    
     def __init__(self, data_manager):
         """Inicializa el gestor de recordatorios."""
         self.data_manager = data_manager
-        self.reminders_dir = os.path.join(os.path.expanduser("~"), "NoteLite", "reminders")
-        
-        # Asegurar que el directorio existe
-        os.makedirs(self.reminders_dir, exist_ok=True)
         
-        # Cargar recordatorios
-        self.reminders = self._load_reminders()
-        
-        # Timer para comprobar recordatorios
+        # Timer de disparo único armado para el próximo recordatorio
+        # (se crea antes de cargar porque la carga ya programa el primero)
         self.check_timer = QTimer()
+        self.check_timer.setSingleShot(True)
         self.check_timer.timeout.connect(self.check_due_reminders)
-        self.check_timer.start(60000)  # Comprobar cada minuto
         
-        # Callback para notificaciones
-        self.notification_callback = None
+        super().__init__()
     
-    def _load_reminders(self):
-        """Carga los recordatorios guardados."""
-        reminders_file = os.path.join(self.reminders_dir, "reminders.json")
-        
-        if os.path.exists(reminders_file):
-            try:
-                with open(reminders_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error al cargar recordatorios: {e}")
-                return []
-        else:
-            return []
-    
-    def _save_reminders(self):
-        """Guarda los recordatorios en disco."""
-        reminders_file = os.path.join(self.reminders_dir, "reminders.json")
-        
-        try:
-            with open(reminders_file, 'w', encoding='utf-8') as f:
-                json.dump(self.reminders, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as e:
-            print(f"Error al guardar recordatorios: {e}")
-            return False
-    
-    def create_reminder(self, note_id, title, datetime_str, description="", repeat=None):
-        """
-        Crea un nuevo recordatorio.
-        
-        Args:
-            note_id: ID de la nota asociada
-            title: Título del recordatorio
-            datetime_str: Fecha y hora del recordatorio (ISO format)
-            description: Descripción opcional
-            repeat: Intervalo de repetición (None, 'daily', 'weekly', 'monthly')
-            
-        Returns:
-            ID del recordatorio creado
-        """
-        # Generar ID único
-        reminder_id = str(int(time.time()))
-        
-        # Crear recordatorio
-        reminder = {
-            "id": reminder_id,
-            "note_id": note_id,
-            "title": title,
-            "datetime": datetime_str,
-            "description": description,
-            "repeat": repeat,
-            "completed": False,
-            "dismissed": False
-        }
-        
-        self.reminders.append(reminder)
-        self._save_reminders()
-        
-        return reminder_id
-    
-    def update_reminder(self, reminder_id, title=None, datetime_str=None, 
-                       description=None, repeat=None, completed=None, dismissed=None):
-        """Actualiza un recordatorio existente."""
-        for reminder in self.reminders:
-            if reminder["id"] == reminder_id:
-                if title is not None:
-                    reminder["title"] = title
-                if datetime_str is not None:
-                    reminder["datetime"] = datetime_str
-                if description is not None:
-                    reminder["description"] = description
-                if repeat is not None:
-                    reminder["repeat"] = repeat
-                if completed is not None:
-                    reminder["completed"] = completed
-                if dismissed is not None:
-                    reminder["dismissed"] = dismissed
-                
-                self._save_reminders()
-                return True
-                
-        return False
-    
-    def delete_reminder(self, reminder_id):
-        """Elimina un recordatorio."""
-        for i, reminder in enumerate(self.reminders):
-            if reminder["id"] == reminder_id:
-                del self.reminders[i]
-                self._save_reminders()
-                return True
-                
-        return False
-    
-    def get_reminder(self, reminder_id):
-        """Obtiene un recordatorio por su ID."""
-        for reminder in self.reminders:
-            if reminder["id"] == reminder_id:
-                return reminder
-                
-        return None
-    
-    def get_all_reminders(self):
-        """Obtiene todos los recordatorios."""
-        return self.reminders
-    
-    def get_reminders_for_note(self, note_id):
-        """Obtiene todos los recordatorios asociados a una nota."""
-        return [r for r in self.reminders if r["note_id"] == note_id]
-    
-    def get_upcoming_reminders(self, days=7):
-        """Obtiene los recordatorios próximos."""
-        now = datetime.datetime.now()
-        end_date = now + datetime.timedelta(days=days)
-        
-        upcoming = []
-        for reminder in self.reminders:
-            if reminder["completed"] or reminder["dismissed"]:
-                continue
-                
-            try:
-                reminder_date = datetime.datetime.fromisoformat(reminder["datetime"])
-                if now <= reminder_date <= end_date:
-                    upcoming.append(reminder)
-            except:
-                continue
-                
-        return upcoming
-    
-    def check_due_reminders(self):
-        """Comprueba si hay recordatorios pendientes."""
-        now = datetime.datetime.now()
-        now_str = now.strftime("%Y-%m-%d %H:%M")
+    def _arm_timer(self):
+        """Arma el temporizador para el recordatorio más próximo."""
+        next_due = self.next_due_time()
+        if next_due is None:
+            self.check_timer.stop()
+            return
         
-        for reminder in self.reminders:
-            if reminder["completed"] or reminder["dismissed"]:
-                continue
-                
-            try:
-                reminder_date = datetime.datetime.fromisoformat(reminder["datetime"])
-                reminder_str = reminder_date.strftime("%Y-%m-%d %H:%M")
-                
-                # Si es hora del recordatorio
-                if reminder_str == now_str:
-                    self._handle_due_reminder(reminder)
-                    
-                    # Si es un recordatorio recurrente, programar el siguiente
-                    if reminder["repeat"]:
-                        self._schedule_next_occurrence(reminder)
-            except:
-                continue
+        delay = (next_due - datetime.datetime.now()).total_seconds()
+        delay_ms = min(max(int(delay * 1000), 0), self.MAX_TIMER_INTERVAL_MS)
+        self.check_timer.start(delay_ms)
     
     def _handle_due_reminder(self, reminder):
         """Maneja un recordatorio que ha llegado su hora."""
@@ -202,67 +67,16 @@ class ReminderManager:
             # En sistemas que no sean Windows, ignorar
             pass
         
-        # Llamar al callback de notificación si existe
-        if self.notification_callback:
-            self.notification_callback(reminder)
-    
-    def _schedule_next_occurrence(self, reminder):
-        """Programa la siguiente ocurrencia de un recordatorio recurrente."""
-        repeat_type = reminder["repeat"]
-        
-        try:
-            current_date = datetime.datetime.fromisoformat(reminder["datetime"])
-            
-            if repeat_type == "daily":
-                next_date = current_date + datetime.timedelta(days=1)
-            elif repeat_type == "weekly":
-                next_date = current_date + datetime.timedelta(days=7)
-            elif repeat_type == "monthly":
-                # Intentar sumar un mes
-                month = current_date.month + 1
-                year = current_date.year
-                if month > 12:
-                    month = 1
-                    year += 1
-                    
-                day = min(current_date.day, 28)  # Evitar problemas con febrero
-                next_date = current_date.replace(year=year, month=month, day=day)
-            else:
-                return  # Tipo de repetición desconocido
-            
-            # Actualizar fecha del recordatorio
-            reminder["datetime"] = next_date.isoformat()
-            self._save_reminders()
-            
-        except Exception as e:
-            print(f"Error al programar repetición: {e}")
-    
-    def set_notification_callback(self, callback):
-        """Establece el callback a llamar cuando un recordatorio está pendiente."""
-        self.notification_callback = callback
-    
-    def get_overdue_reminders(self):
-        """Obtiene recordatorios vencidos pero no completados."""
-        now = datetime.datetime.now()
-        
-        overdue = []
-        for reminder in self.reminders:
-            if reminder["completed"] or reminder["dismissed"]:
-                continue
-                
-            try:
-                reminder_date = datetime.datetime.fromisoformat(reminder["datetime"])
-                if reminder_date < now:
-                    overdue.append(reminder)
-            except:
-                continue
-                
-        return overdue
+        super()._handle_due_reminder(reminder)
 
 
 class ReminderDialog(QDialog):
     """Diálogo para crear o editar un recordatorio."""
     
+    REPEAT_OPTIONS = ["No repetir", "Diariamente", "Semanalmente", "Mensualmente",
+                      "Anualmente", "Días laborables", "Mensual (mismo día de la semana)"]
+    WORKDAYS = [0, 1, 2, 3, 4]
+    
     def __init__(self, reminder_manager, note_id=None, reminder_id=None, parent=None):
         super().__init__(parent)
         self.reminder_manager = reminder_manager
@@ -321,18 +135,31 @@ class ReminderDialog(QDialog):
         # Repetir
         layout.addWidget(QLabel("Repetir:"))
         self.repeat_combo = QComboBox()
-        self.repeat_combo.addItems(["No repetir", "Diariamente", "Semanalmente", "Mensualmente"])
-        
-        if self.reminder and self.reminder["repeat"]:
-            if self.reminder["repeat"] == "daily":
-                self.repeat_combo.setCurrentIndex(1)
-            elif self.reminder["repeat"] == "weekly":
-                self.repeat_combo.setCurrentIndex(2)
-            elif self.reminder["repeat"] == "monthly":
-                self.repeat_combo.setCurrentIndex(3)
-                
+        self.repeat_combo.addItems(self.REPEAT_OPTIONS)
         layout.addWidget(self.repeat_combo)
         
+        # Intervalo y fecha de fin de la repetición
+        repeat_options_layout = QHBoxLayout()
+        repeat_options_layout.addWidget(QLabel("Cada:"))
+        self.interval_spin = QSpinBox()
+        self.interval_spin.setRange(1, 99)
+        repeat_options_layout.addWidget(self.interval_spin)
+        
+        self.until_checkbox = QCheckBox("Hasta:")
+        repeat_options_layout.addWidget(self.until_checkbox)
+        self.until_input = QDateEdit()
+        self.until_input.setCalendarPopup(True)
+        self.until_input.setDisplayFormat("dd/MM/yyyy")
+        self.until_input.setDate(QDate.currentDate().addMonths(1))
+        self.until_input.setEnabled(False)
+        self.until_checkbox.toggled.connect(self.until_input.setEnabled)
+        repeat_options_layout.addWidget(self.until_input)
+        layout.addLayout(repeat_options_layout)
+        
+        self.repeat_combo.currentIndexChanged.connect(self.on_repeat_changed)
+        self.load_repeat()
+        self.on_repeat_changed(self.repeat_combo.currentIndex())
+        
         # Si es un recordatorio existente, mostrar opciones de completado y descartado
         if self.reminder:
             self.completed_checkbox = QCheckBox("Marcar como completado")
@@ -356,6 +183,76 @@ class ReminderDialog(QDialog):
         
         layout.addLayout(buttons_layout)
     
+    def load_repeat(self):
+        """Carga en los controles la repetición del recordatorio existente."""
+        if not self.reminder or not self.reminder["repeat"]:
+            return
+        
+        try:
+            rule = RecurrenceRule.from_repeat(self.reminder["repeat"])
+        except (ValueError, KeyError, TypeError):
+            return
+        
+        if rule.freq == "weekly" and rule.weekdays == self.WORKDAYS:
+            index = 5
+        elif rule.freq == "monthly" and rule.weekdays:
+            index = 6
+        else:
+            index = RecurrenceRule.FREQUENCIES.index(rule.freq) + 1
+        
+        self.repeat_combo.setCurrentIndex(index)
+        self.interval_spin.setValue(rule.interval)
+        if rule.until is not None:
+            self.until_checkbox.setChecked(True)
+            self.until_input.setDate(QDate(rule.until.year, rule.until.month, rule.until.day))
+    
+    def on_repeat_changed(self, index):
+        """Habilita las opciones de repetición solo si se repite."""
+        self.interval_spin.setEnabled(index > 0)
+        self.until_checkbox.setEnabled(index > 0)
+        self.until_input.setEnabled(index > 0 and self.until_checkbox.isChecked())
+    
+    def build_rule(self, dt):
+        """Construye la regla de recurrencia elegida (o None si no se repite)."""
+        index = self.repeat_combo.currentIndex()
+        if index == 0:
+            return None
+        
+        options = {"interval": self.interval_spin.value()}
+        if self.until_checkbox.isChecked():
+            until = self.until_input.date()
+            options["until"] = datetime.datetime(until.year(), until.month(), until.day(), 23, 59)
+        
+        if index == 5:
+            rule = RecurrenceRule("weekly", weekdays=self.WORKDAYS, **options)
+        elif index == 6:
+            # n-ésimo día de la semana de la fecha elegida (o el último del mes)
+            last_week = (dt + datetime.timedelta(days=7)).month != dt.month
+            week_number = -1 if last_week else (dt.day - 1) // 7 + 1
+            rule = RecurrenceRule("monthly", weekdays=[dt.weekday()],
+                                  week_number=week_number, **options)
+        else:
+            rule = RecurrenceRule(RecurrenceRule.FREQUENCIES[index - 1], **options)
+        
+        # Conservar lo que el diálogo no muestra (número de repeticiones, días
+        # del mes, fechas excluidas) para no reiniciar la serie al editarla
+        existing = self._existing_rule()
+        if existing is not None and existing.freq == rule.freq and existing.weekdays == rule.weekdays:
+            rule.count = existing.count
+            rule.exdates = existing.exdates
+            if not rule.weekdays:
+                rule.month_days = existing.month_days
+        return rule
+    
+    def _existing_rule(self):
+        """Regla de repetición guardada del recordatorio que se edita (o None)."""
+        if not self.reminder or not self.reminder.get("repeat"):
+            return None
+        try:
+            return RecurrenceRule.from_repeat(self.reminder["repeat"])
+        except (ValueError, KeyError, TypeError):
+            return None
+    
     def save_reminder(self):
         """Guarda el recordatorio."""
         title = self.title_input.text().strip()
@@ -377,15 +274,9 @@ class ReminderDialog(QDialog):
         # Descripción
         description = self.description_input.text()
         
-        # Repetición
-        repeat_index = self.repeat_combo.currentIndex()
-        repeat = None
-        if repeat_index == 1:
-            repeat = "daily"
-        elif repeat_index == 2:
-            repeat = "weekly"
-        elif repeat_index == 3:
-            repeat = "monthly"
+        # Repetición ("" = no repetir)
+        rule = self.build_rule(dt)
+        repeat = rule.to_repeat() if rule else ""
         
         if self.reminder_id:
             # Actualizar recordatorio existente
@@ -398,7 +289,7 @@ class ReminderDialog(QDialog):
         else:
             # Crear nuevo recordatorio
             success = bool(self.reminder_manager.create_reminder(
-                self.note_id, title, dt_str, description, repeat
+                self.note_id, title, dt_str, description, repeat or None
             ))
         
         if success:
@@ -474,11 +365,8 @@ class ReminderListWidget(QWidget):
             # Establecer texto
             title = reminder["title"]
             
-            try:
-                dt = datetime.datetime.fromisoformat(reminder["datetime"])
-                date_str = dt.strftime("%d/%m/%Y %H:%M")
-            except:
-                date_str = "Fecha no válida"
+            dt = self.reminder_manager.get_reminder_datetime(reminder["id"])
+            date_str = dt.strftime("%d/%m/%Y %H:%M") if dt else "Fecha no válida"
             
             # Estado
             status = ""
@@ -594,10 +482,18 @@ class ReminderListWidget(QWidget):
 class ReminderNotificationDialog(QDialog):
     """Diálogo para mostrar notificaciones de recordatorios."""
     
+    # Opciones para posponer: texto -> minutos
+    SNOOZE_OPTIONS = {"5 minutos": 5, "15 minutos": 15, "30 minutos": 30,
+                      "1 hora": 60, "3 horas": 180}
+    
     def __init__(self, reminder, parent=None):
         super().__init__(parent)
         self.reminder = reminder
         
+        # Acción elegida por el usuario: "dismiss", "complete", "snooze" o None
+        self.action = None
+        self.snooze_minutes = 0
+        
         self.setWindowTitle("Recordatorio")
         self.setup_ui()
         
@@ -656,23 +552,108 @@ class ReminderNotificationDialog(QDialog):
     
     def dismiss_reminder(self):
         """Descarta el recordatorio."""
-        # Esta función será sobrescrita por la ventana principal
+        # La ventana principal aplica la acción elegida al cerrar el diálogo
+        self.action = "dismiss"
         self.accept()
     
     def complete_reminder(self):
         """Marca el recordatorio como completado."""
-        # Esta función será sobrescrita por la ventana principal
+        self.action = "complete"
         self.accept()
     
     def snooze_reminder(self):
         """Pospone el recordatorio."""
         # Mostrar diálogo para elegir tiempo
         from PyQt6.QtWidgets import QInputDialog
-        times = ["5 minutos", "15 minutos", "30 minutos", "1 hora", "3 horas"]
+        times = list(self.SNOOZE_OPTIONS.keys())
         choice, ok = QInputDialog.getItem(
             self, "Posponer", "Posponer por:", times, 1, False
         )
         
         if ok:
-            # Esta función será sobrescrita por la ventana principal
+            self.action = "snooze"
+            self.snooze_minutes = self.SNOOZE_OPTIONS.get(choice, 15)
             self.accept()
+
+
+class MissedRemindersDialog(QDialog):
+    """Diálogo con el resumen de los recordatorios que vencieron sin avisar."""
+    
+    def __init__(self, missed, note_titles=None, parent=None):
+        super().__init__(parent)
+        self.missed = missed
+        self.note_titles = note_titles or {}
+        
+        # Acción elegida para los recordatorios simples: "dismiss", "complete" o None
+        self.action = None
+        
+        self.setWindowTitle("Recordatorios perdidos")
+        self.setMinimumWidth(420)
+        self.setup_ui()
+        
+        # Un único aviso sonoro para todo el resumen
+        try:
+            winsound.PlaySound("SystemExclamation", winsound.SND_ALIAS)
+        except:
+            pass
+    
+    def setup_ui(self):
+        """Configura la interfaz del diálogo."""
+        layout = QVBoxLayout(self)
+        
+        total = sum(len(item["occurrences"]) for item in self.missed)
+        header = QLabel(f"{total} avisos vencieron mientras NoteLite no estaba activo")
+        font = header.font()
+        font.setBold(True)
+        header.setFont(font)
+        layout.addWidget(header)
+        
+        self.missed_list = QListWidget()
+        for item in self.missed:
+            reminder = item["reminder"]
+            occurrences = item["occurrences"]
+            text = f"{occurrences[0].strftime('%d/%m/%Y %H:%M')} - {reminder['title']}"
+            if len(occurrences) > 1:
+                text += f" (x{len(occurrences)})"
+            
+            note_title = self.note_titles.get(reminder["note_id"])
+            if note_title:
+                text += f" [{note_title}]"
+            if reminder["repeat"]:
+                text += " 🔄"
+            
+            list_item = QListWidgetItem(text)
+            list_item.setData(Qt.ItemDataRole.UserRole, reminder["id"])
+            self.missed_list.addItem(list_item)
+        layout.addWidget(self.missed_list)
+        
+        note = QLabel("Los recordatorios periódicos ya se han programado para su próxima fecha.")
+        note.setWordWrap(True)
+        layout.addWidget(note)
+        
+        # Botones
+        buttons_layout = QHBoxLayout()
+        
+        dismiss_btn = QPushButton("Descartar todos")
+        dismiss_btn.clicked.connect(self.dismiss_all)
+        buttons_layout.addWidget(dismiss_btn)
+        
+        complete_btn = QPushButton("Completar todos")
+        complete_btn.clicked.connect(self.complete_all)
+        buttons_layout.addWidget(complete_btn)
+        
+        close_btn = QPushButton("Mantener pendientes")
+        close_btn.clicked.connect(self.reject)
+        buttons_layout.addWidget(close_btn)
+        
+        layout.addLayout(buttons_layout)
+    
+    def dismiss_all(self):
+        """Descarta los recordatorios simples del resumen."""
+        self.action = "dismiss"
+        self.accept()
+    
+    def complete_all(self):
+        """Marca como completados los recordatorios simples del resumen."""
+        self.action = "complete"
+        self.accept()
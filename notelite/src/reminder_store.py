@@ -0,0 +1,816 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Almacén de recordatorios para NoteLite.
+Carga, índices, persistencia y planificación de recordatorios sin depender de
+PyQt, para compartirlo entre la aplicación y el servicio reminderd.
+"""
+
+import os
+import json
+import uuid
+import heapq
+import itertools
+import datetime
+from bisect import bisect_left, bisect_right
+
+from recurrence import RecurrenceRule
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# Cerrojo que mantiene la aplicación de escritorio mientras está abierta
+APP_LOCK_NAME = "app.lock"
+
+
+def default_reminders_dir():
+    """Directorio de datos de recordatorios por defecto."""
+    return os.path.join(os.path.expanduser("~"), "NoteLite", "reminders")
+
+
+class ProcessLock:
+    """
+    Cerrojo de archivo entre procesos.
+    
+    Lo mantiene la aplicación mientras está abierta (y reminderd mientras se
+    ejecuta), de modo que otro proceso puede saber si sigue viva aunque haya
+    terminado de forma inesperada: el sistema libera el cerrojo al morir.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+    
+    def acquire(self):
+        """Intenta tomar el cerrojo sin esperar. Devuelve True si se consigue."""
+        if self._file is not None:
+            return True
+        
+        lock_file = open(self.path, 'a+')
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return False
+        
+        # Dejar constancia del proceso que lo tiene (solo informativo)
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._file = lock_file
+        return True
+    
+    def release(self):
+        """Libera el cerrojo si se tenía."""
+        if self._file is None:
+            return
+        
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+        self._file.close()
+        self._file = None
+    
+    def is_held_elsewhere(self):
+        """Comprueba si otro proceso tiene el cerrojo."""
+        if self._file is not None:
+            return False
+        if not self.acquire():
+            return True
+        self.release()
+        return False
+
+
+class ReminderStore:
+    """
+    Almacén de recordatorios sin dependencias de interfaz.
+    
+    Los recordatorios pendientes se guardan en un montículo ordenado por fecha;
+    quien use el almacén solo tiene que despertar en next_due_time() y llamar a
+    check_due_reminders(), de modo que no hay trabajo entre recordatorios.
+    
+    Las consultas usan índices en memoria: por ID, por nota y una lista
+    ordenada de fechas ya interpretadas, para servir rangos en O(log n + k).
+    
+    Los cambios se añaden a un diario (reminders.log, una línea JSON por
+    cambio) en lugar de reescribir todo reminders.json; el diario se compacta
+    en una instantánea cuando crece demasiado y al cerrar la aplicación.
+    """
+    
+    # Retraso a partir del cual un aviso se considera perdido (equipo
+    # suspendido o aplicación bloqueada) y se agrupa en el resumen
+    MISSED_GRACE = datetime.timedelta(minutes=5)
+    
+    # Entradas del diario a partir de las cuales se compacta (como mínimo;
+    # con muchos recordatorios se permite un diario tan largo como la lista)
+    COMPACT_THRESHOLD = 500
+    
+    def __init__(self, reminders_dir=None):
+        """
+        Inicializa el almacén de recordatorios.
+        
+        Args:
+            reminders_dir: Directorio de datos (por defecto ~/NoteLite/reminders)
+        """
+        self.reminders_dir = reminders_dir or default_reminders_dir()
+        
+        # Asegurar que el directorio existe
+        os.makedirs(self.reminders_dir, exist_ok=True)
+        self.reminders_file = os.path.join(self.reminders_dir, "reminders.json")
+        self.log_file = os.path.join(self.reminders_dir, "reminders.log")
+        
+        # Callbacks para notificaciones y para el resumen de avisos perdidos
+        self.notification_callback = None
+        self.missed_callback = None
+        
+        # Observadores de cambios en los recordatorios
+        self._listeners = []
+        
+        self.reload()
+    
+    def reload(self):
+        """(Re)carga los recordatorios de disco y reconstruye índices y planificación."""
+        # Cargar recordatorios (instantánea + diario) y estado de la última ejecución
+        self._log_entries = 0
+        self._log_damaged = False
+        self.reminders = self._load_reminders()
+        if self._log_damaged or self._log_entries > self.COMPACT_THRESHOLD:
+            self._save_reminders()
+        self._state = self._load_state()
+        
+        # Índices de consulta
+        self._by_id = {}      # reminder_id -> recordatorio
+        self._by_note = {}    # note_id -> {reminder_id: None} (en orden de creación)
+        self._parsed = {}     # reminder_id -> datetime interpretado (o None)
+        self._time_keys = []  # fechas ordenadas ...
+        self._time_ids = []   # ... y los IDs correspondientes
+        self._recurring = set()  # IDs de recordatorios que se repiten
+        self._rules = {}      # reminder_id -> RecurrenceRule (caché)
+        for reminder in self.reminders:
+            self._index_reminder(reminder)
+        
+        # Planificación: montículo de (fecha, secuencia, id) con borrado perezoso
+        self._schedule_heap = []
+        self._schedule_seq = itertools.count()
+        self._scheduled = {}  # reminder_id -> secuencia de la entrada vigente
+        
+        for reminder in self.reminders:
+            self._schedule_reminder(reminder)
+        self._arm_timer()
+    
+    def _load_reminders(self):
+        """Carga los recordatorios: la instantánea y después el diario."""
+        reminders = []
+        if os.path.exists(self.reminders_file):
+            try:
+                with open(self.reminders_file, 'r', encoding='utf-8') as f:
+                    reminders = json.load(f)
+            except Exception as e:
+                print(f"Error al cargar recordatorios: {e}")
+                reminders = []
+        
+        if not os.path.exists(self.log_file):
+            return reminders
+        
+        # Reproducir el diario sobre la instantánea (conservando el orden)
+        by_id = {reminder["id"]: reminder for reminder in reminders}
+        try:
+            with open(self.log_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Línea incompleta por un cierre inesperado: se ignora
+                        # (y se compacta para no escribir a continuación)
+                        self._log_damaged = True
+                        continue
+                    
+                    if entry.get("op") == "put":
+                        by_id[entry["reminder"]["id"]] = entry["reminder"]
+                    elif entry.get("op") == "del":
+                        by_id.pop(entry["id"], None)
+                    self._log_entries += 1
+        except Exception as e:
+            print(f"Error al leer el diario de recordatorios: {e}")
+        
+        return list(by_id.values())
+    
+    def _append_log(self, entry):
+        """Añade un cambio al diario y compacta si ha crecido demasiado."""
+        try:
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._log_entries += 1
+        except Exception as e:
+            print(f"Error al escribir el diario de recordatorios: {e}")
+            # Sin diario, guardar al menos la lista completa
+            return self._save_reminders()
+        
+        if self._log_entries > max(self.COMPACT_THRESHOLD, len(self.reminders)):
+            return self._save_reminders()
+        return True
+    
+    def _log_put(self, reminder):
+        """Registra en el diario el estado actual de un recordatorio."""
+        return self._append_log({"op": "put", "reminder": reminder})
+    
+    def _log_delete(self, reminder_id):
+        """Registra en el diario el borrado de un recordatorio."""
+        return self._append_log({"op": "del", "id": reminder_id})
+    
+    def _save_reminders(self):
+        """Guarda la instantánea completa de los recordatorios y vacía el diario.
+        
+        La instantánea se escribe en un archivo temporal y se sustituye de una
+        vez, de modo que un cierre inesperado nunca deja un JSON a medias.
+        """
+        temp_file = self.reminders_file + ".tmp"
+        
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.reminders, f, ensure_ascii=False, indent=2)
+            os.replace(temp_file, self.reminders_file)
+            
+            if os.path.exists(self.log_file):
+                os.remove(self.log_file)
+            self._log_entries = 0
+            return True
+        except Exception as e:
+            print(f"Error al guardar recordatorios: {e}")
+            return False
+    
+    def compact(self):
+        """Compacta el diario en la instantánea si tiene cambios pendientes."""
+        if self._log_entries:
+            return self._save_reminders()
+        return True
+    
+    def add_listener(self, callback):
+        """Registra un observador de cambios en los recordatorios.
+        
+        Args:
+            callback: Función llamada como callback(reminder_id, reminder) tras
+                crear o modificar un recordatorio, y con reminder=None al eliminarlo.
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+    
+    def remove_listener(self, callback):
+        """Elimina un observador registrado con add_listener."""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+    
+    def _notify_listeners(self, reminder_id, reminder):
+        """Notifica un cambio en un recordatorio a todos los observadores."""
+        for callback in list(self._listeners):
+            try:
+                callback(reminder_id, reminder)
+            except Exception as e:
+                print(f"Error al notificar cambio en el recordatorio {reminder_id}: {e}")
+    
+    def _load_state(self):
+        """Carga el estado del gestor (momento de la última ejecución)."""
+        state_file = os.path.join(self.reminders_dir, "state.json")
+        
+        if os.path.exists(state_file):
+            try:
+                with open(state_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Error al cargar estado de recordatorios: {e}")
+        return {}
+    
+    def save_state(self, moment=None):
+        """Registra hasta qué momento se han procesado los recordatorios."""
+        moment = moment or datetime.datetime.now()
+        self._state["last_run"] = moment.isoformat()
+        state_file = os.path.join(self.reminders_dir, "state.json")
+        
+        try:
+            with open(state_file, 'w', encoding='utf-8') as f:
+                json.dump(self._state, f, ensure_ascii=False, indent=2)
+            return True
+        except Exception as e:
+            print(f"Error al guardar estado de recordatorios: {e}")
+            return False
+    
+    @staticmethod
+    def _repeat_key(repeat):
+        """Forma comparable de un campo 'repeat' ("weekly" y su diccionario coinciden)."""
+        try:
+            rule = RecurrenceRule.from_repeat(repeat)
+        except (ValueError, KeyError, TypeError):
+            return repeat
+        return rule.to_dict() if rule else None
+    
+    @staticmethod
+    def _parse_datetime(value):
+        """Interpreta una fecha ISO; devuelve None si no es válida."""
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except (ValueError, TypeError):
+            return None
+    
+    def _index_reminder(self, reminder):
+        """Añade un recordatorio a los índices de consulta."""
+        reminder_id = reminder["id"]
+        self._by_id[reminder_id] = reminder
+        self._by_note.setdefault(reminder["note_id"], {})[reminder_id] = None
+        if reminder.get("repeat"):
+            self._recurring.add(reminder_id)
+        self._index_time(reminder)
+    
+    def _index_time(self, reminder):
+        """Añade la fecha interpretada de un recordatorio al índice temporal."""
+        reminder_date = self._parse_datetime(reminder["datetime"])
+        self._parsed[reminder["id"]] = reminder_date
+        if reminder_date is not None:
+            i = bisect_right(self._time_keys, reminder_date)
+            self._time_keys.insert(i, reminder_date)
+            self._time_ids.insert(i, reminder["id"])
+    
+    def _unindex_reminder(self, reminder):
+        """Elimina un recordatorio de los índices de consulta."""
+        reminder_id = reminder["id"]
+        self._by_id.pop(reminder_id, None)
+        self._recurring.discard(reminder_id)
+        self._rules.pop(reminder_id, None)
+        
+        note_reminders = self._by_note.get(reminder["note_id"])
+        if note_reminders is not None:
+            note_reminders.pop(reminder_id, None)
+            if not note_reminders:
+                del self._by_note[reminder["note_id"]]
+        
+        self._unindex_time(reminder_id)
+    
+    def _unindex_time(self, reminder_id):
+        """Elimina un recordatorio del índice temporal."""
+        reminder_date = self._parsed.pop(reminder_id, None)
+        if reminder_date is not None:
+            i = bisect_left(self._time_keys, reminder_date)
+            while self._time_ids[i] != reminder_id:
+                i += 1
+            del self._time_keys[i]
+            del self._time_ids[i]
+    
+    def create_reminder(self, note_id, title, datetime_str, description="", repeat=None):
+        """
+        Crea un nuevo recordatorio.
+        
+        Args:
+            note_id: ID de la nota asociada
+            title: Título del recordatorio
+            datetime_str: Fecha y hora del recordatorio (ISO format)
+            description: Descripción opcional
+            repeat: Repetición: None, 'daily', 'weekly', 'monthly', 'yearly' o
+                una regla serializada con RecurrenceRule.to_dict()
+            
+        Returns:
+            ID del recordatorio creado
+        """
+        # Generar ID único (varios recordatorios pueden crearse en el mismo segundo)
+        reminder_id = str(uuid.uuid4())
+        
+        # Crear recordatorio
+        reminder = {
+            "id": reminder_id,
+            "note_id": note_id,
+            "title": title,
+            "datetime": datetime_str,
+            "description": description,
+            "repeat": repeat,
+            "completed": False,
+            "dismissed": False
+        }
+        
+        # Inicio de la serie: las ocurrencias se calculan siempre desde aquí
+        if repeat:
+            reminder["repeat_start"] = datetime_str
+        
+        self.reminders.append(reminder)
+        self._index_reminder(reminder)
+        self._log_put(reminder)
+        self._notify_listeners(reminder_id, reminder)
+        
+        self._schedule_reminder(reminder)
+        self._arm_timer()
+        
+        return reminder_id
+    
+    def put_reminder(self, reminder):
+        """
+        Guarda un recordatorio completo con su ID (por ejemplo, importado).
+        
+        Si ya existe uno con ese ID se reemplaza.
+        
+        Returns:
+            ID del recordatorio
+        """
+        reminder = dict(reminder)
+        reminder.setdefault("description", "")
+        reminder.setdefault("repeat", None)
+        reminder.setdefault("completed", False)
+        reminder.setdefault("dismissed", False)
+        reminder_id = reminder["id"]
+        
+        existing = self._by_id.get(reminder_id)
+        if existing is not None:
+            self._unindex_reminder(existing)
+            self.reminders[self.reminders.index(existing)] = reminder
+        else:
+            self.reminders.append(reminder)
+        
+        self._index_reminder(reminder)
+        self._log_put(reminder)
+        self._notify_listeners(reminder_id, reminder)
+        
+        self._schedule_reminder(reminder)
+        self._arm_timer()
+        return reminder_id
+    
+    def update_reminder(self, reminder_id, title=None, datetime_str=None, 
+                       description=None, repeat=None, completed=None, dismissed=None):
+        """Actualiza un recordatorio existente.
+        
+        Pasar una regla de repetición distinta (una cadena vacía para no
+        repetir) reinicia la serie en la fecha del recordatorio; volver a
+        pasar la misma regla o cambiar solo la fecha (por ejemplo al posponer)
+        mantiene el inicio de la serie.
+        """
+        reminder = self._by_id.get(reminder_id)
+        if reminder is None:
+            return False
+        
+        if title is not None:
+            reminder["title"] = title
+        if datetime_str is not None and datetime_str != reminder["datetime"]:
+            self._unindex_time(reminder_id)
+            reminder["datetime"] = datetime_str
+            self._index_time(reminder)
+        if description is not None:
+            reminder["description"] = description
+        if repeat is not None and self._repeat_key(repeat) != self._repeat_key(reminder.get("repeat")):
+            reminder["repeat"] = repeat or None
+            self._rules.pop(reminder_id, None)
+            if reminder["repeat"]:
+                reminder["repeat_start"] = reminder["datetime"]
+                self._recurring.add(reminder_id)
+            else:
+                reminder.pop("repeat_start", None)
+                self._recurring.discard(reminder_id)
+        if completed is not None:
+            reminder["completed"] = completed
+        if dismissed is not None:
+            reminder["dismissed"] = dismissed
+        
+        self._log_put(reminder)
+        self._notify_listeners(reminder_id, reminder)
+        
+        self._schedule_reminder(reminder)
+        self._arm_timer()
+        return True
+    
+    def delete_reminder(self, reminder_id):
+        """Elimina un recordatorio."""
+        reminder = self._by_id.get(reminder_id)
+        if reminder is None:
+            return False
+        
+        self._unindex_reminder(reminder)
+        self.reminders.remove(reminder)
+        self._log_delete(reminder_id)
+        self._notify_listeners(reminder_id, None)
+        
+        self._scheduled.pop(reminder_id, None)
+        self._arm_timer()
+        return True
+    
+    def get_reminder(self, reminder_id):
+        """Obtiene un recordatorio por su ID."""
+        return self._by_id.get(reminder_id)
+    
+    def get_reminder_datetime(self, reminder_id):
+        """Obtiene la fecha ya interpretada de un recordatorio (o None)."""
+        return self._parsed.get(reminder_id)
+    
+    def get_all_reminders(self):
+        """Obtiene todos los recordatorios."""
+        return self.reminders
+    
+    def get_reminders_for_note(self, note_id):
+        """Obtiene todos los recordatorios asociados a una nota."""
+        return [self._by_id[r] for r in self._by_note.get(note_id, ())]
+    
+    def get_reminders_in_range(self, start=None, end=None, include_closed=False,
+                               include_end=True):
+        """Obtiene los recordatorios cuya fecha está en un rango, ordenados por fecha.
+        
+        Args:
+            start: Fecha inicial (incluida) o None para no acotar
+            end: Fecha final o None para no acotar
+            include_closed: Si es True, incluye completados y descartados
+            include_end: Si es False, excluye los recordatorios en la fecha final
+            
+        Returns:
+            Lista de recordatorios
+        """
+        lo = bisect_left(self._time_keys, start) if start is not None else 0
+        if end is None:
+            hi = len(self._time_keys)
+        elif include_end:
+            hi = bisect_right(self._time_keys, end)
+        else:
+            hi = bisect_left(self._time_keys, end)
+        
+        result = []
+        for reminder_id in self._time_ids[lo:hi]:
+            reminder = self._by_id[reminder_id]
+            if include_closed or not (reminder["completed"] or reminder["dismissed"]):
+                result.append(reminder)
+        return result
+    
+    def get_upcoming_reminders(self, days=7):
+        """Obtiene los recordatorios próximos."""
+        now = datetime.datetime.now()
+        end_date = now + datetime.timedelta(days=days)
+        return self.get_reminders_in_range(now, end_date)
+    
+    def snooze_reminder(self, reminder_id, minutes=15):
+        """Pospone un recordatorio los minutos indicados a partir de ahora."""
+        new_time = datetime.datetime.now() + datetime.timedelta(minutes=minutes)
+        return self.update_reminder(reminder_id, datetime_str=new_time.isoformat())
+    
+    def _schedule_reminder(self, reminder):
+        """(Re)programa un recordatorio en el montículo si sigue pendiente.
+        
+        Las entradas anteriores del mismo recordatorio quedan obsoletas y se
+        descartan al llegar a la cima del montículo.
+        """
+        self._scheduled.pop(reminder["id"], None)
+        
+        if reminder["completed"] or reminder["dismissed"]:
+            return
+        
+        reminder_date = self._parsed.get(reminder["id"])
+        if reminder_date is None:
+            return
+        
+        # Igual que antes, no se avisa de recordatorios de minutos ya pasados
+        current_minute = datetime.datetime.now().replace(second=0, microsecond=0)
+        if reminder_date < current_minute:
+            return
+        
+        seq = next(self._schedule_seq)
+        heapq.heappush(self._schedule_heap, (reminder_date, seq, reminder["id"]))
+        self._scheduled[reminder["id"]] = seq
+    
+    def _is_current_entry(self, entry):
+        """Comprueba si una entrada del montículo sigue vigente."""
+        return self._scheduled.get(entry[2]) == entry[1]
+    
+    def next_due_time(self):
+        """Fecha del próximo recordatorio programado (o None si no hay)."""
+        # Descartar entradas obsoletas de la cima
+        while self._schedule_heap and not self._is_current_entry(self._schedule_heap[0]):
+            heapq.heappop(self._schedule_heap)
+        
+        return self._schedule_heap[0][0] if self._schedule_heap else None
+    
+    def _arm_timer(self):
+        """Avisa de que la planificación ha cambiado.
+        
+        El almacén no tiene temporizador propio; las subclases lo redefinen
+        para despertar en next_due_time().
+        """
+    
+    def pop_due_reminders(self, now=None):
+        """Saca de la planificación los recordatorios vencidos y devuelve sus IDs."""
+        now = now or datetime.datetime.now()
+        due = []
+        while self._schedule_heap and self._schedule_heap[0][0] <= now:
+            entry = heapq.heappop(self._schedule_heap)
+            if self._is_current_entry(entry):
+                del self._scheduled[entry[2]]
+                due.append(entry[2])
+        return due
+    
+    def check_due_reminders(self, now=None):
+        """Dispara todos los recordatorios cuya hora ya ha llegado.
+        
+        Se ejecuta cuando vence el temporizador; como se comparan fechas (y no
+        el minuto exacto), un bucle de eventos ocupado retrasa el aviso pero
+        nunca lo pierde.
+        """
+        now = now or datetime.datetime.now()
+        
+        # Extraer primero todos los vencidos: los avisos pueden abrir diálogos
+        # modales que modifiquen la planificación mientras se muestran
+        due = self.pop_due_reminders(now)
+        
+        # Los que llegan con mucho retraso (equipo suspendido) van al resumen
+        missed = []
+        for reminder_id in due:
+            reminder = self.get_reminder(reminder_id)
+            if not reminder or reminder["completed"] or reminder["dismissed"]:
+                continue
+            
+            if self.missed_callback and now - self._parsed[reminder_id] > self.MISSED_GRACE:
+                missed.append(self._collect_missed(reminder, now))
+                continue
+            
+            self._handle_due_reminder(reminder)
+            
+            # Si es un recordatorio recurrente, programar el siguiente
+            if reminder["repeat"]:
+                self._schedule_next_occurrence(reminder)
+        
+        self.save_state(now)
+        if missed:
+            self.missed_callback(missed)
+        
+        self._arm_timer()
+    
+    def _collect_missed(self, reminder, now):
+        """Reúne las ocurrencias perdidas de un recordatorio vencido.
+        
+        Los recurrentes avanzan hasta su próxima ocurrencia futura; los
+        simples quedan pendientes (vencidos) hasta que el usuario decida.
+        
+        Returns:
+            Diccionario con el recordatorio y la lista de fechas perdidas
+        """
+        pending = self._parsed[reminder["id"]]
+        occurrences = [pending]
+        
+        rule = self.get_recurrence_rule(reminder["id"])
+        series_start = self._get_series_start(reminder)
+        if rule is not None and series_start is not None:
+            occurrences.extend(date for date in rule.between(series_start, pending, now)
+                               if pending < date < now)
+            self._schedule_next_occurrence(reminder)
+        
+        return {"reminder": reminder, "occurrences": occurrences}
+    
+    def run_catch_up(self):
+        """
+        Procesa los recordatorios que vencieron sin nadie que avisara.
+        
+        Recorre una sola vez el índice temporal desde la última ejecución,
+        adelanta las series recurrentes y entrega todos los avisos perdidos
+        de una vez al callback de resumen, en lugar de un diálogo por aviso.
+        
+        Returns:
+            Lista de diccionarios {"reminder", "occurrences"}
+        """
+        now = datetime.datetime.now()
+        last_run = self._parse_datetime(self._state.get("last_run"))
+        
+        candidates = self.get_reminders_in_range(last_run, now, include_end=False)
+        
+        # Series atascadas antes de la última ejecución: también hay que avanzarlas
+        if last_run is not None:
+            for reminder_id in self._recurring:
+                pending = self._parsed.get(reminder_id)
+                reminder = self._by_id[reminder_id]
+                if (pending is not None and pending < last_run
+                        and not reminder["completed"] and not reminder["dismissed"]):
+                    candidates.append(reminder)
+        
+        missed = [self._collect_missed(reminder, now) for reminder in candidates]
+        missed.sort(key=lambda item: item["occurrences"][0])
+        
+        self.save_state(now)
+        if missed and self.missed_callback:
+            self.missed_callback(missed)
+        
+        self._arm_timer()
+        return missed
+    
+    def _handle_due_reminder(self, reminder):
+        """Maneja un recordatorio que ha llegado su hora."""
+        # Llamar al callback de notificación si existe
+        if self.notification_callback:
+            self.notification_callback(reminder)
+    
+    def get_recurrence_rule(self, reminder_id):
+        """Obtiene la regla de recurrencia de un recordatorio (o None)."""
+        if reminder_id not in self._recurring:
+            return None
+        
+        if reminder_id not in self._rules:
+            try:
+                rule = RecurrenceRule.from_repeat(self._by_id[reminder_id]["repeat"])
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"Regla de repetición no válida en {reminder_id}: {e}")
+                rule = None
+            self._rules[reminder_id] = rule
+        
+        return self._rules[reminder_id]
+    
+    def _get_series_start(self, reminder):
+        """Fecha de inicio de la serie de un recordatorio recurrente."""
+        return (self._parse_datetime(reminder.get("repeat_start"))
+                or self._parsed.get(reminder["id"]))
+    
+    def get_occurrences_in_range(self, start, end, include_closed=False):
+        """
+        Obtiene todas las ocurrencias de recordatorios en un rango.
+        
+        Los recordatorios simples salen del índice temporal y las series se
+        expanden solo dentro de la ventana pedida, así que consultar un mes
+        cuesta lo mismo aunque haya cientos de series infinitas.
+        
+        Args:
+            start: Fecha inicial (incluida)
+            end: Fecha final (incluida)
+            include_closed: Si es True, incluye completados y descartados
+            
+        Returns:
+            Lista de tuplas (fecha, recordatorio) ordenada por fecha
+        """
+        occurrences = [
+            (self._parsed[reminder["id"]], reminder)
+            for reminder in self.get_reminders_in_range(start, end, include_closed)
+            if reminder["id"] not in self._recurring
+        ]
+        
+        for reminder_id in self._recurring:
+            reminder = self._by_id[reminder_id]
+            if not include_closed and (reminder["completed"] or reminder["dismissed"]):
+                continue
+            
+            rule = self.get_recurrence_rule(reminder_id)
+            series_start = self._get_series_start(reminder)
+            if rule is None or series_start is None:
+                continue
+            
+            dates = rule.between(series_start, start, end)
+            
+            # La ocurrencia pendiente puede estar pospuesta fuera de la regla
+            pending = self._parsed.get(reminder_id)
+            if pending is not None and start <= pending <= end and pending not in dates:
+                dates.append(pending)
+            
+            occurrences.extend((date, reminder) for date in dates)
+        
+        occurrences.sort(key=lambda item: item[0])
+        return occurrences
+    
+    def _schedule_next_occurrence(self, reminder):
+        """Programa la siguiente ocurrencia de un recordatorio recurrente.
+        
+        Si el aviso llegó tarde, se salta directamente a la primera ocurrencia
+        futura. Cuando la serie termina (por fecha o por número de
+        repeticiones), el recordatorio se marca como completado.
+        """
+        rule = self.get_recurrence_rule(reminder["id"])
+        series_start = self._get_series_start(reminder)
+        current_date = self._parsed.get(reminder["id"])
+        if rule is None or series_start is None or current_date is None:
+            return
+        
+        try:
+            next_date = rule.next_after(series_start, max(current_date, datetime.datetime.now()))
+            
+            if next_date is None:
+                reminder["completed"] = True
+            else:
+                # Actualizar fecha del recordatorio
+                self._unindex_time(reminder["id"])
+                reminder["datetime"] = next_date.isoformat()
+                self._index_time(reminder)
+            
+            self._log_put(reminder)
+            self._notify_listeners(reminder["id"], reminder)
+            self._schedule_reminder(reminder)
+            
+        except Exception as e:
+            print(f"Error al programar repetición: {e}")
+    
+    def set_notification_callback(self, callback):
+        """Establece el callback a llamar cuando un recordatorio está pendiente."""
+        self.notification_callback = callback
+    
+    def set_missed_callback(self, callback):
+        """Establece el callback que recibe juntos los avisos perdidos."""
+        self.missed_callback = callback
+    
+    def get_overdue_reminders(self):
+        """Obtiene recordatorios vencidos pero no completados."""
+        return self.get_reminders_in_range(end=datetime.datetime.now(), include_end=False)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Servicio de recordatorios sin interfaz para NoteLite.
+
+Carga solo el almacén de recordatorios (sin PyQt ni el resto de la
+aplicación), duerme hasta el próximo aviso y lo entrega a un comando local o
+abre la aplicación de escritorio para que lo muestre. Mientras la aplicación
+está abierta es ella quien avisa y el servicio se limita a esperar.
+
+Uso:
+    python -m notelite.reminderd [--command "notify-send {title} {description}"]
+"""
+
+import os
+import sys
+import time
+import shlex
+import argparse
+import datetime
+import subprocess
+
+from reminder_store import ReminderStore, ProcessLock, default_reminders_dir, APP_LOCK_NAME
+
+
+# Cerrojo del propio servicio (uno por usuario)
+DAEMON_LOCK_NAME = "reminderd.lock"
+
+
+class ReminderDaemon:
+    """Bucle del servicio: dormir hasta el próximo aviso y entregarlo."""
+
+    # Espera máxima entre comprobaciones: acota el retraso al detectar cambios
+    # hechos por la aplicación o el cierre de esta
+    MAX_SLEEP_SECONDS = 60
+
+    def __init__(self, reminders_dir=None, command=None, max_sleep=None):
+        """
+        Inicializa el servicio.
+
+        Args:
+            reminders_dir: Directorio de datos de recordatorios
+            command: Plantilla de comando para cada aviso, con los campos
+                {title}, {description}, {datetime}, {note_id} e {id}. Si no se
+                indica, se abre la aplicación de escritorio
+            max_sleep: Segundos máximos entre comprobaciones
+        """
+        self.reminders_dir = reminders_dir or default_reminders_dir()
+        self.command = command
+        self.max_sleep = max_sleep or self.MAX_SLEEP_SECONDS
+        self.app_lock = ProcessLock(os.path.join(self.reminders_dir, APP_LOCK_NAME))
+
+        self.store = ReminderStore(self.reminders_dir)
+        self.store.set_notification_callback(self.deliver)
+        self.store.set_missed_callback(self.deliver_missed)
+        self._signature = self._files_signature()
+        
+        # Hasta dónde se han entregado avisos: al recargar no se repiten
+        self._processed_until = None
+
+    def _files_signature(self):
+        """Tamaño y fecha de modificación de los archivos del almacén."""
+        signature = []
+        for path in (self.store.reminders_file, self.store.log_file):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                signature.append(None)
+        return signature
+
+    def _reload_if_changed(self):
+        """Recarga el almacén si otro proceso lo ha modificado."""
+        signature = self._files_signature()
+        if signature != self._signature:
+            self.store.reload()
+            self._signature = signature
+            if self._processed_until is not None:
+                self.store.pop_due_reminders(self._processed_until)
+
+    def app_running(self):
+        """Comprueba si la aplicación de escritorio está abierta."""
+        return self.app_lock.is_held_elsewhere()
+
+    # --- Entrega de avisos ---
+
+    def run_command(self, fields):
+        """Ejecuta el comando configurado con los campos del aviso."""
+        try:
+            args = [arg.format_map(fields) for arg in shlex.split(self.command)]
+            subprocess.run(args, timeout=60, check=False)
+        except (OSError, ValueError, KeyError, subprocess.SubprocessError) as e:
+            print(f"Error al ejecutar el comando de aviso: {e}")
+
+    def deliver(self, reminder):
+        """Entrega un aviso al comando configurado."""
+        self.run_command({
+            "id": reminder["id"],
+            "note_id": reminder["note_id"],
+            "title": reminder["title"],
+            "description": reminder.get("description", ""),
+            "datetime": reminder["datetime"],
+        })
+
+    def deliver_missed(self, missed):
+        """Entrega en un único aviso los recordatorios perdidos."""
+        total = sum(len(item["occurrences"]) for item in missed)
+        titles = ", ".join(item["reminder"]["title"] for item in missed)
+        self.run_command({
+            "id": "",
+            "note_id": "",
+            "title": f"{total} recordatorios perdidos",
+            "description": titles,
+            "datetime": datetime.datetime.now().isoformat(),
+        })
+
+    def launch_app(self):
+        """Abre la aplicación de escritorio, que muestra los avisos pendientes."""
+        main_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+        try:
+            subprocess.Popen([sys.executable, main_script],
+                             cwd=os.path.dirname(main_script),
+                             start_new_session=True)
+        except OSError as e:
+            print(f"Error al abrir NoteLite: {e}")
+
+    # --- Bucle principal ---
+
+    def process(self):
+        """
+        Procesa los avisos vencidos.
+
+        Con comando, el servicio avisa y avanza las series como haría la
+        aplicación. Sin comando, abre la aplicación y le deja los avisos: su
+        repaso de inicio los muestra juntos.
+        """
+        if self.app_running():
+            return
+
+        next_due = self.store.next_due_time()
+        if next_due is None or next_due > datetime.datetime.now():
+            return
+
+        self._processed_until = datetime.datetime.now()
+        if self.command:
+            self.store.check_due_reminders(self._processed_until)
+        else:
+            # La aplicación los mostrará en su repaso de inicio
+            self.store.pop_due_reminders(self._processed_until)
+            self.launch_app()
+            # Esperar a que la aplicación tome su cerrojo antes de volver a mirar
+            for _ in range(30):
+                time.sleep(1)
+                if self.app_running():
+                    break
+
+    def seconds_until_next(self):
+        """Segundos a dormir hasta el próximo aviso (acotados)."""
+        next_due = self.store.next_due_time()
+        if next_due is None:
+            return self.max_sleep
+
+        delay = (next_due - datetime.datetime.now()).total_seconds()
+        return min(max(delay, 0.5), self.max_sleep)
+
+    def run(self, once=False):
+        """Ejecuta el servicio hasta que se interrumpa (o una vez con once)."""
+        # Los avisos perdidos con todo cerrado se entregan al empezar
+        if self.command and not self.app_running():
+            self._processed_until = datetime.datetime.now()
+            self.store.run_catch_up()
+
+        while True:
+            self._reload_if_changed()
+            self.process()
+            if once:
+                return
+            time.sleep(self.seconds_until_next())
+
+
+def main(argv=None):
+    """Punto de entrada del servicio."""
+    parser = argparse.ArgumentParser(
+        prog="python -m notelite.reminderd",
+        description="Servicio de recordatorios de NoteLite sin interfaz gráfica")
+    parser.add_argument("--command",
+                        help="Comando por aviso; admite {title}, {description}, "
+                             "{datetime}, {note_id} e {id}. Sin él, se abre NoteLite")
+    parser.add_argument("--dir", dest="reminders_dir",
+                        help="Directorio de recordatorios (por defecto ~/NoteLite/reminders)")
+    parser.add_argument("--max-sleep", type=float, default=None,
+                        help="Segundos máximos entre comprobaciones")
+    parser.add_argument("--once", action="store_true",
+                        help="Procesar los avisos vencidos y salir")
+    args = parser.parse_args(argv)
+
+    reminders_dir = args.reminders_dir or default_reminders_dir()
+    os.makedirs(reminders_dir, exist_ok=True)
+
+    # Un solo servicio por usuario
+    daemon_lock = ProcessLock(os.path.join(reminders_dir, DAEMON_LOCK_NAME))
+    if not daemon_lock.acquire():
+        print("reminderd ya se está ejecutando")
+        return 1
+
+    try:
+        ReminderDaemon(reminders_dir, args.command, args.max_sleep).run(once=args.once)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon_lock.release()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
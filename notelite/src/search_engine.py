@@ -16,8 +16,10 @@ class SearchEngine:
     Implementa funciones de búsqueda por texto, etiquetas, y filtros avanzados.
     """
     
-    def __init__(self, data_manager):
+    def __init__(self, data_manager, tag_manager=None):
         self.data_manager = data_manager
+        # Si se proporciona, se usan sus contadores de etiquetas en vivo
+        self.tag_manager = tag_manager
     
     def search(self, query=None, tags=None, date_from=None, date_to=None, 
                 note_type=None, sort_by="updated_at", sort_order="desc"):
@@ -36,8 +38,13 @@ class SearchEngine:
         Returns:
             Lista de notas que coinciden con los criterios
         """
-        # Obtener todas las notas
-        all_notes = self.data_manager.get_all_notes()
+        # Obtener todas las notas (o, con TagManager, solo las de las etiquetas
+        # buscadas, a partir de su índice de subárboles)
+        if tags and self.tag_manager:
+            all_notes = self._notes_with_tags(tags)
+            tags = None
+        else:
+            all_notes = self.data_manager.get_all_notes()
         results = []
         
         for note_id, note_data in all_notes.items():
@@ -57,6 +64,19 @@ class SearchEngine:
         
         return results
     
+    def _notes_with_tags(self, tags):
+        """Notas que tienen todas las etiquetas (o alguna descendiente) según el TagManager."""
+        notes = None
+        for tag in tags:
+            tagged = self.tag_manager.get_notes_with_tag(tag)
+            if notes is None:
+                notes = tagged
+            else:
+                notes = {note_id: note for note_id, note in notes.items() if note_id in tagged}
+            if not notes:
+                break
+        return notes
+    
     def _matches_filters(self, note, query=None, tags=None, date_from=None, date_to=None, note_type=None) -> bool:
         """Comprueba si una nota coincide con los filtros aplicados."""
         # Filtro por tipo de nota
@@ -116,8 +136,10 @@ class SearchEngine:
         note_tags = note.get('tags', [])
         
         # Verificar si todas las etiquetas buscadas están en la nota
+        # (una etiqueta anidada como "trabajo/clienteA" cuenta para "trabajo")
         for tag in tags:
-            if tag not in note_tags:
+            prefix = tag + '/'
+            if not any(t == tag or t.startswith(prefix) for t in note_tags):
                 return False
                 
         return True
@@ -173,6 +195,9 @@ class SearchEngine:
         Returns:
             Lista de tuplas (etiqueta, frecuencia) ordenadas por frecuencia
         """
+        if self.tag_manager:
+            return self.tag_manager.get_top_tags()
+        
         all_notes = self.data_manager.get_all_notes()
         tag_counts = {}
         
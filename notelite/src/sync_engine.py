@@ -0,0 +1,585 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Sincronización en dos sentidos para NoteLite.
+Sincroniza las notas con un destino remoto comparando manifiestos de hash y
+fecha de ambos lados, de modo que solo se copian los cambios. El destino
+puede ser cualquier carpeta local o montada (una unidad de red, una carpeta
+de Dropbox...) o un servidor WebDAV (ver sync_http.py).
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from backup_archive import build_manifest
+from note_merge import merge_note_files
+
+
+# Carpeta de metadatos de sincronización dentro del destino
+REMOTE_META_DIR = ".notelite-sync"
+
+# Tamaño de bloque al copiar archivos
+COPY_BLOCK_SIZE = 1024 * 1024
+
+
+class SyncLockError(Exception):
+    """Otro dispositivo está sincronizando con el mismo destino."""
+
+
+def _copy_with_hash(source, destination):
+    """Copia un archivo abierto en otro calculando su SHA-256.
+
+    Returns:
+        Tupla (hash, bytes copiados)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    for block in iter(lambda: source.read(COPY_BLOCK_SIZE), b""):
+        digest.update(block)
+        destination.write(block)
+        size += len(block)
+    return digest.hexdigest(), size
+
+
+class FolderTransport:
+    """
+    Destino de sincronización en una carpeta local o montada.
+
+    Todos los destinos ofrecen las mismas operaciones: leer, escribir y
+    borrar archivos por ruta relativa, subir y bajar archivos enteros, y
+    leer y guardar el manifiesto y el cerrojo remotos.
+    """
+
+    # Copias simultáneas (un disco no gana mucho con más)
+    max_concurrency = 2
+
+    # Segundos tras los que se considera abandonado el cerrojo remoto
+    LOCK_STALE_SECONDS = 300
+
+    def __init__(self, remote_dir):
+        """
+        Inicializa el destino.
+
+        Args:
+            remote_dir: Carpeta con la que sincronizar
+        """
+        self.remote_dir = remote_dir
+        self.key = os.path.abspath(remote_dir)
+        self.meta_dir = os.path.join(remote_dir, REMOTE_META_DIR)
+        self.manifest_file = os.path.join(self.meta_dir, "manifest.json")
+        self.lock_file = os.path.join(self.meta_dir, "lock")
+
+    def _path(self, rel_path):
+        return os.path.join(self.remote_dir, *rel_path.split("/"))
+
+    # --- Archivos ---
+
+    def get(self, rel_path):
+        """Lee un archivo remoto completo."""
+        with open(self._path(rel_path), 'rb') as f:
+            return f.read()
+
+    def put(self, rel_path, data):
+        """Escribe un archivo remoto de forma atómica.
+
+        Returns:
+            Campos adicionales para su entrada del manifiesto
+        """
+        path = self._path(rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".sync.tmp", 'wb') as f:
+            f.write(data)
+        os.replace(path + ".sync.tmp", path)
+        return {}
+
+    def delete(self, rel_path, entry=None):
+        """Borra un archivo remoto (si existe)."""
+        try:
+            os.remove(self._path(rel_path))
+        except FileNotFoundError:
+            pass
+
+    def upload(self, rel_path, local_path, old_entry=None):
+        """
+        Sube un archivo local.
+
+        Returns:
+            Tupla (hash, tamaño, campos adicionales del manifiesto)
+        """
+        path = self._path(rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(local_path, 'rb') as source, open(path + ".sync.tmp", 'wb') as destination:
+            digest, size = _copy_with_hash(source, destination)
+        os.replace(path + ".sync.tmp", path)
+        return digest, size, {}
+
+    def download(self, rel_path, entry, destination):
+        """Baja un archivo remoto a un archivo abierto.
+
+        Returns:
+            Tupla (hash, bytes bajados)
+        """
+        with open(self._path(rel_path), 'rb') as source:
+            return _copy_with_hash(source, destination)
+
+    # --- Manifiesto y cerrojo ---
+
+    def load_manifest(self):
+        """Carga el manifiesto remoto ({ruta: entrada}), vacío si no hay."""
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get("files", {})
+        except FileNotFoundError:
+            return {}
+
+    def save_manifest(self, files, device):
+        """Guarda el manifiesto remoto de una vez."""
+        os.makedirs(self.meta_dir, exist_ok=True)
+        temp_file = f"{self.manifest_file}.{device}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({"files": files}, f, ensure_ascii=False)
+        os.replace(temp_file, self.manifest_file)
+
+    def collect_garbage(self, files):
+        """Libera los datos que ya no usa el manifiesto (en una carpeta no hay)."""
+
+    def acquire_lock(self, device):
+        """Toma el cerrojo del destino (un archivo creado en exclusiva)."""
+        os.makedirs(self.meta_dir, exist_ok=True)
+        for _ in range(2):
+            try:
+                fd = os.open(self.lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                with os.fdopen(fd, 'w') as f:
+                    f.write(device)
+                return
+            except FileExistsError:
+                try:
+                    age = time.time() - os.path.getmtime(self.lock_file)
+                except OSError:
+                    continue
+                if age < self.LOCK_STALE_SECONDS:
+                    break
+                # Cerrojo de una sincronización que no terminó
+                try:
+                    os.remove(self.lock_file)
+                except OSError:
+                    pass
+        raise SyncLockError("Otro dispositivo está sincronizando con esta carpeta")
+
+    def release_lock(self):
+        """Libera el cerrojo del destino."""
+        try:
+            os.remove(self.lock_file)
+        except OSError:
+            pass
+
+    def close(self):
+        """Libera los recursos del destino."""
+
+
+class SyncEngine:
+    """
+    Sincronización en dos sentidos entre data_dir y un destino remoto.
+
+    Cada lado tiene su manifiesto: el local se obtiene escaneando con la
+    caché de tamaño y fecha (solo se leen los archivos modificados) y el
+    remoto se guarda en el propio destino (.notelite-sync/manifest.json) y
+    se lee y se escribe de una vez, así que no hace falta recorrerlo.
+    Comparando ambos con la base (el estado acordado en la última
+    sincronización) se sabe qué lado cambió cada archivo: solo se copian
+    esos, varios a la vez, y los borrados viajan como lápidas en el
+    manifiesto remoto para que los demás dispositivos los apliquen.
+
+    De cada nota se guarda localmente su versión base, de modo que si cambió
+    en los dos lados se puede fusionar a tres bandas.
+    """
+
+    # Días que se conservan las lápidas en el manifiesto remoto
+    TOMBSTONE_DAYS = 90
+
+    def __init__(self, data_dir, transport, state_dir, roots=("notes",)):
+        """
+        Inicializa la sincronización.
+
+        Args:
+            data_dir: Directorio de datos (~/NoteLite)
+            transport: Destino remoto (FolderTransport, WebDAVTransport...)
+            state_dir: Directorio donde guardar el estado local de sincronización
+            roots: Subdirectorios de data_dir que se sincronizan
+        """
+        self.data_dir = data_dir
+        self.transport = transport
+        self.roots = tuple(roots)
+
+        # Un estado por destino remoto
+        remote_key = hashlib.sha1(transport.key.encode('utf-8')).hexdigest()[:12]
+        os.makedirs(state_dir, exist_ok=True)
+        self.state_file = os.path.join(state_dir, f"sync_state_{remote_key}.json")
+        self.base_dir = os.path.join(state_dir, f"base_{remote_key}")
+        os.makedirs(self.base_dir, exist_ok=True)
+        self.state = self._load_state()
+
+    # --- Estado local ---
+
+    def _load_state(self):
+        """Carga el estado: dispositivo, base acordada y caché del escaneo local."""
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Error al cargar estado de sincronización: {e}")
+        return {"device": uuid.uuid4().hex, "base": {}, "local": {}}
+
+    def _save_state(self):
+        """Guarda el estado local de forma atómica."""
+        temp_file = self.state_file + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(temp_file, self.state_file)
+
+    # --- Versiones base ---
+
+    @staticmethod
+    def _mergeable(rel_path):
+        """Indica si un archivo se puede fusionar (y merece guardar su base)."""
+        return rel_path.endswith(".json")
+
+    def _save_base(self, digest, data):
+        """Guarda el contenido de una versión base (nombrado por su hash)."""
+        path = os.path.join(self.base_dir, digest)
+        if not os.path.exists(path):
+            self._write(path, data)
+
+    def _load_base(self, digest):
+        """Lee una versión base (None si no se tiene)."""
+        try:
+            return self._read(os.path.join(self.base_dir, digest))
+        except (OSError, TypeError):
+            return None
+
+    def _prune_base(self, base):
+        """Elimina las versiones base que ya no usa ningún archivo."""
+        referenced = set(base.values())
+        for name in os.listdir(self.base_dir):
+            if name not in referenced:
+                try:
+                    os.remove(os.path.join(self.base_dir, name))
+                except OSError:
+                    pass
+
+    # --- Archivos locales ---
+
+    @staticmethod
+    def _read(path):
+        """Lee un archivo completo."""
+        with open(path, 'rb') as f:
+            return f.read()
+
+    @staticmethod
+    def _write(path, data):
+        """Escribe un archivo de forma atómica."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".sync.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def _local_path(self, rel_path):
+        return os.path.join(self.data_dir, *rel_path.split("/"))
+
+    def _local_unchanged(self, rel_path, entry):
+        """Comprueba que un archivo local sigue como se escaneó (o ausente si entry es None)."""
+        try:
+            stat = os.stat(self._local_path(rel_path))
+        except OSError:
+            return entry is None
+        return (entry is not None and stat.st_size == entry["size"]
+                and stat.st_mtime_ns == entry["mtime"])
+
+    def _remote_entry(self, digest, size, deleted=False, extra=None):
+        """Entrada del manifiesto remoto para un archivo subido o borrado."""
+        entry = {"hash": None if deleted else digest, "size": 0 if deleted else size,
+                 "deleted": deleted, "device": self.state["device"],
+                 "modified_at": datetime.datetime.now().isoformat()}
+        entry.update(extra or {})
+        return entry
+
+    # --- Conflictos ---
+
+    def resolve_conflict(self, rel_path, base_data, local_data, remote_data):
+        """
+        Resuelve un archivo modificado en los dos lados.
+
+        Las notas se fusionan a tres bandas con su versión base. Si no hay
+        base o los cambios chocan, se conserva la versión remota en su ruta y
+        la local pasa a una copia de conflicto, para que ningún cambio se
+        pierda.
+
+        Returns:
+            Tupla (contenido final, lista de (ruta, contenido) de copias de
+            conflicto a crear; vacía si se ha fusionado)
+        """
+        if base_data is not None and self._mergeable(rel_path):
+            merged = merge_note_files(base_data, local_data, remote_data)
+            if merged is not None:
+                return merged, []
+
+        copy_path = self._conflict_path(rel_path)
+        return remote_data, [(copy_path, self._conflict_copy(copy_path, local_data))]
+
+    def _conflict_path(self, rel_path):
+        """Ruta libre para la copia de conflicto de un archivo."""
+        directory, name = rel_path.rsplit("/", 1) if "/" in rel_path else ("", rel_path)
+        if directory.split("/")[0] == "notes" and name.endswith(".json"):
+            # Una nota nueva, con su propio ID
+            name = f"{uuid.uuid4()}.json"
+        else:
+            stem, ext = os.path.splitext(name)
+            name = f"{stem} (conflicto {datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}){ext}"
+        return f"{directory}/{name}" if directory else name
+
+    @staticmethod
+    def _conflict_copy(copy_path, data):
+        """Prepara el contenido de una copia de conflicto (las notas cambian de ID y título)."""
+        try:
+            note = json.loads(data.decode('utf-8'))
+        except (ValueError, UnicodeDecodeError):
+            return data
+        if not isinstance(note, dict):
+            return data
+        note["id"] = os.path.splitext(copy_path.rsplit("/", 1)[-1])[0]
+        note["title"] = f"{note.get('title', '')} (conflicto)"
+        return json.dumps(note, ensure_ascii=False, indent=2).encode('utf-8')
+
+    # --- Transferencias ---
+
+    def _push(self, rel_path, old_entry):
+        """Sube un archivo local. Returns: (ruta, hash, tamaño, extra, contenido base)."""
+        digest, size, extra = self.transport.upload(rel_path, self._local_path(rel_path), old_entry)
+        data = self._read(self._local_path(rel_path)) if self._mergeable(rel_path) else None
+        if data is not None and hashlib.sha256(data).hexdigest() != digest:
+            data = None
+        return rel_path, digest, size, extra, data
+
+    def _pull(self, rel_path, entry):
+        """Baja un archivo remoto. Returns: (ruta, hash, tamaño, contenido base)."""
+        path = self._local_path(rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".sync.tmp"
+        try:
+            with open(temp_path, 'wb') as destination:
+                digest, size = self.transport.download(rel_path, entry, destination)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        data = self._read(path) if self._mergeable(rel_path) else None
+        return rel_path, digest, size, data
+
+    # --- Sincronización ---
+
+    def sync(self, on_plan=None):
+        """
+        Sincroniza en los dos sentidos.
+
+        Args:
+            on_plan: Callback opcional on_plan(archivos, bytes) con lo que se
+                va a transferir, llamado antes de empezar las copias
+
+        Returns:
+            Diccionario con las rutas afectadas: "pushed" y "pulled" (copiadas
+            en cada sentido), "deleted_remote" y "deleted_local" (borrados
+            propagados), "merged" (cambiados en los dos lados y fusionados),
+            "conflicts" (cambiados en los dos lados sin fusión posible) y
+            "created_local" (copias de conflicto creadas localmente); además
+            "bytes_sent" y "bytes_received"
+        """
+        result = {"pushed": [], "pulled": [], "deleted_remote": [], "deleted_local": [],
+                  "merged": [], "conflicts": [], "created_local": [],
+                  "bytes_sent": 0, "bytes_received": 0}
+        device = self.state["device"]
+
+        self.transport.acquire_lock(device)
+        try:
+            local = build_manifest(self.data_dir, self.roots, self.state.get("local"))
+            remote = self.transport.load_manifest()
+            base = self.state.get("base", {})
+            remote_changed = False
+
+            # 1. Decidir qué hacer con cada archivo
+            pushes, pulls, conflicts = [], [], []
+            for rel_path in sorted(set(local) | set(remote) | set(base)):
+                local_entry = local.get(rel_path)
+                remote_entry = remote.get(rel_path)
+                local_hash = local_entry["hash"] if local_entry else None
+                remote_hash = remote_entry["hash"] if remote_entry and not remote_entry.get("deleted") else None
+                base_hash = base.get(rel_path)
+
+                if local_hash == remote_hash:
+                    # Ya coinciden (o ambos lo borraron)
+                    if local_hash is None:
+                        base.pop(rel_path, None)
+                    elif local_hash != base_hash:
+                        base[rel_path] = local_hash
+                        if self._mergeable(rel_path):
+                            self._save_base(local_hash, self._read(self._local_path(rel_path)))
+                elif local_hash == base_hash:
+                    # Solo cambió el lado remoto
+                    if not self._local_unchanged(rel_path, local_entry):
+                        # Se ha editado durante la sincronización: la próxima vez
+                        continue
+                    if remote_hash is None:
+                        os.remove(self._local_path(rel_path))
+                        base.pop(rel_path, None)
+                        result["deleted_local"].append(rel_path)
+                    else:
+                        pulls.append((rel_path, remote_entry))
+                elif remote_hash == base_hash:
+                    # Solo cambió el lado local
+                    if local_hash is None:
+                        self.transport.delete(rel_path, remote_entry)
+                        remote[rel_path] = self._remote_entry(None, 0, deleted=True)
+                        base.pop(rel_path, None)
+                        result["deleted_remote"].append(rel_path)
+                        remote_changed = True
+                    else:
+                        pushes.append((rel_path, local_entry, remote_entry))
+                else:
+                    # Cambió en los dos lados
+                    if self._local_unchanged(rel_path, local_entry):
+                        conflicts.append((rel_path, base_hash, local_hash, remote_hash))
+
+            if on_plan:
+                on_plan(len(pushes) + len(pulls) + len(conflicts),
+                        sum(entry["size"] for _, entry, _ in pushes)
+                        + sum(entry.get("size", 0) for _, entry in pulls))
+
+            # 2. Copias, varias a la vez
+            with ThreadPoolExecutor(max_workers=max(1, self.transport.max_concurrency)) as executor:
+                push_jobs = [executor.submit(self._push, rel_path, remote_entry)
+                             for rel_path, _, remote_entry in pushes]
+                pull_jobs = [executor.submit(self._pull, rel_path, entry) for rel_path, entry in pulls]
+
+                try:
+                    for job in push_jobs:
+                        rel_path, digest, size, extra, data = job.result()
+                        remote[rel_path] = self._remote_entry(digest, size, extra=extra)
+                        base[rel_path] = digest
+                        if data is not None:
+                            self._save_base(digest, data)
+                        result["pushed"].append(rel_path)
+                        result["bytes_sent"] += size
+                        remote_changed = True
+
+                    for job in pull_jobs:
+                        rel_path, digest, size, data = job.result()
+                        base[rel_path] = digest
+                        if data is not None:
+                            self._save_base(digest, data)
+                        result["pulled"].append(rel_path)
+                        result["bytes_received"] += size
+                finally:
+                    # Lo ya subido queda en el manifiesto aunque algo falle
+                    if remote_changed:
+                        self._save_manifest(remote)
+                        remote_changed = False
+
+            # 3. Conflictos, uno a uno
+            for rel_path, base_hash, local_hash, remote_hash in conflicts:
+                final_hash, data = self._resolve(rel_path, base_hash, local_hash, remote_hash,
+                                                 remote, result)
+                base[rel_path] = final_hash
+                if self._mergeable(rel_path):
+                    self._save_base(final_hash, data)
+                remote_changed = True
+
+            if remote_changed:
+                self._save_manifest(remote)
+
+            # Con el manifiesto ya guardado, liberar los datos que no usa
+            try:
+                self.transport.collect_garbage(remote)
+            except OSError as e:
+                print(f"Error al limpiar el destino de sincronización: {e}")
+        finally:
+            self.transport.release_lock()
+
+        if any(result[key] for key in ("pushed", "pulled", "deleted_remote", "deleted_local",
+                                       "merged", "conflicts")):
+            self._prune_base(base)
+        self.state["base"] = base
+        # Caché del escaneo local para la próxima vez (sin lo que haya cambiado)
+        self.state["local"] = {
+            rel_path: entry for rel_path, entry in local.items()
+            if rel_path not in result["pulled"] and rel_path not in result["deleted_local"]}
+        self._save_state()
+        return result
+
+    def _save_manifest(self, files):
+        """Guarda el manifiesto remoto, descartando las lápidas caducadas."""
+        limit = (datetime.datetime.now() - datetime.timedelta(days=self.TOMBSTONE_DAYS)).isoformat()
+        files = {path: entry for path, entry in files.items()
+                 if not entry.get("deleted") or entry.get("modified_at", "") >= limit}
+        self.transport.save_manifest(files, self.state["device"])
+
+    def _resolve(self, rel_path, base_hash, local_hash, remote_hash, remote, result):
+        """Aplica resolve_conflict a un archivo cambiado en los dos lados.
+
+        Returns:
+            Tupla (hash final, contenido final)
+        """
+        local_data = self._read(self._local_path(rel_path)) if local_hash else None
+        remote_data = self.transport.get(rel_path) if remote_hash else None
+        if remote_data is not None:
+            result["bytes_received"] += len(remote_data)
+
+        if local_data is None or remote_data is None:
+            # Borrado en un lado y modificado en el otro: gana la modificación
+            data = local_data if local_data is not None else remote_data
+            copies = []
+        else:
+            data, copies = self.resolve_conflict(rel_path, self._load_base(base_hash),
+                                                 local_data, remote_data)
+
+        final_hash = hashlib.sha256(data).hexdigest()
+        if final_hash != local_hash:
+            self._write(self._local_path(rel_path), data)
+            result["pulled"].append(rel_path)
+        if final_hash != remote_hash:
+            extra = self.transport.put(rel_path, data)
+            remote[rel_path] = self._remote_entry(final_hash, len(data), extra=extra)
+            result["pushed"].append(rel_path)
+            result["bytes_sent"] += len(data)
+        result["conflicts" if copies else "merged"].append(rel_path)
+
+        # Las copias de conflicto se crean en local y se suben en la próxima sincronización
+        for copy_path, copy_data in copies:
+            self._write(self._local_path(copy_path), copy_data)
+            result["created_local"].append(copy_path)
+
+        return final_hash, data
+
+
+class FolderSync(SyncEngine):
+    """Sincronización en dos sentidos con una carpeta local o montada."""
+
+    def __init__(self, data_dir, remote_dir, state_dir, roots=("notes",)):
+        """
+        Inicializa la sincronización.
+
+        Args:
+            data_dir: Directorio de datos (~/NoteLite)
+            remote_dir: Carpeta con la que sincronizar
+            state_dir: Directorio donde guardar el estado local de sincronización
+            roots: Subdirectorios de data_dir que se sincronizan
+        """
+        self.remote_dir = remote_dir
+        super().__init__(data_dir, FolderTransport(remote_dir), state_dir, roots)
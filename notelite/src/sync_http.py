@@ -0,0 +1,398 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Sincronización por HTTP/WebDAV para NoteLite.
+Destino de sincronización (ver sync_engine.py) en un servidor WebDAV o HTTP
+sencillo que admita GET, PUT, DELETE, MKCOL y PROPFIND. Las conexiones se
+reutilizan entre peticiones, el manifiesto viaja entero en una sola petición
+y los archivos grandes se suben por trozos que se pueden reanudar.
+"""
+
+import json
+import time
+import queue
+import base64
+import hashlib
+import threading
+import http.client
+import xml.etree.ElementTree as etree
+from urllib.parse import urlsplit, quote, unquote
+
+from sync_engine import REMOTE_META_DIR, SyncLockError
+
+
+# Los archivos mayores se suben por trozos de este tamaño
+CHUNK_SIZE = 1024 * 1024
+
+# Métodos que se pueden repetir sin riesgo si la conexión falla
+_SAFE_METHODS = {"GET", "HEAD", "PROPFIND", "OPTIONS"}
+
+# Una conexión libre durante más tiempo puede haberla cerrado el servidor:
+# las peticiones que no se pueden repetir abren otra
+IDLE_REUSE_SECONDS = 2
+
+# Errores de una conexión reutilizada que el servidor ya había cerrado
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                            ConnectionResetError, ConnectionAbortedError, BrokenPipeError)
+
+
+class WebDAVError(OSError):
+    """El servidor respondió con un error."""
+
+    def __init__(self, method, path, status):
+        super().__init__(f"{method} {path}: error {status} del servidor")
+        self.status = status
+
+
+class ConnectionPool:
+    """
+    Conexiones HTTP persistentes a un servidor.
+
+    Cada petición toma una conexión libre (o abre una nueva, hasta
+    max_connections) y la devuelve al terminar, de modo que las transferencias
+    consecutivas no pagan otra vez la conexión TCP ni la negociación TLS.
+    """
+
+    def __init__(self, base_url, max_connections=4, username=None, password=None, timeout=30):
+        """
+        Inicializa el grupo de conexiones.
+
+        Args:
+            base_url: URL del servidor (http:// o https://)
+            max_connections: Conexiones simultáneas como máximo
+            username: Usuario para autenticación básica (opcional)
+            password: Contraseña para autenticación básica
+            timeout: Segundos de espera de cada operación de red
+        """
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"URL de sincronización no válida: {base_url}")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.timeout = timeout
+        self.max_connections = max_connections
+
+        self.headers = {}
+        if username:
+            credentials = f"{username}:{password or ''}".encode('utf-8')
+            self.headers["Authorization"] = f"Basic {base64.b64encode(credentials).decode('ascii')}"
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def _connect(self):
+        """Abre una conexión nueva."""
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method, path, body=None, headers=None, idempotent=None):
+        """
+        Hace una petición con una conexión del grupo.
+
+        Si una conexión reutilizada resulta estar cerrada por el servidor, la
+        petición se repite una vez con una conexión nueva, pero solo si
+        repetirla no tiene efectos (idempotent). Las demás no se envían por
+        conexiones que llevan tiempo libres, que son las que el servidor
+        suele cerrar.
+
+        Args:
+            idempotent: Se puede repetir sin riesgo (por defecto, solo las
+                lecturas: GET, HEAD, PROPFIND y OPTIONS)
+
+        Returns:
+            Tupla (estado, cabeceras, cuerpo)
+        """
+        all_headers = dict(self.headers)
+        all_headers.update(headers or {})
+        if idempotent is None:
+            idempotent = method in _SAFE_METHODS
+
+        with self._slots:
+            try:
+                connection, released_at = self._idle.get_nowait()
+                reused = True
+                if not idempotent and time.monotonic() - released_at > IDLE_REUSE_SECONDS:
+                    connection.close()
+                    connection, reused = self._connect(), False
+            except queue.Empty:
+                connection, reused = self._connect(), False
+
+            while True:
+                try:
+                    connection.request(method, path, body=body, headers=all_headers)
+                    response = connection.getresponse()
+                    data = response.read()
+                    break
+                except _STALE_CONNECTION_ERRORS:
+                    connection.close()
+                    if not (reused and idempotent):
+                        raise
+                    connection, reused = self._connect(), False
+                except BaseException:
+                    connection.close()
+                    raise
+
+            if response.will_close:
+                connection.close()
+            else:
+                self._idle.put((connection, time.monotonic()))
+        return response.status, response.headers, data
+
+    def close(self):
+        """Cierra las conexiones libres."""
+        while True:
+            try:
+                self._idle.get_nowait()[0].close()
+            except queue.Empty:
+                break
+
+
+class WebDAVTransport:
+    """
+    Destino de sincronización en un servidor WebDAV.
+
+    Los archivos se guardan con la misma estructura que en local. Los
+    mayores de CHUNK_SIZE se guardan en cambio por trozos en
+    .notelite-sync/chunks/<hash>/, y su entrada del manifiesto indica cuántos
+    hay: al reanudar una subida interrumpida solo se envían los trozos que
+    faltan. Los archivos con el mismo contenido comparten sus trozos, que se
+    borran cuando ya no los usa ninguno (collect_garbage).
+    """
+
+    # Segundos tras los que se considera abandonado el cerrojo remoto
+    LOCK_STALE_SECONDS = 300
+
+    def __init__(self, base_url, username=None, password=None, max_connections=4):
+        """
+        Inicializa el destino.
+
+        Args:
+            base_url: URL de la carpeta del servidor con la que sincronizar
+            username: Usuario (opcional)
+            password: Contraseña
+            max_connections: Transferencias simultáneas como máximo
+        """
+        self.base_url = base_url.rstrip("/") + "/"
+        self.key = self.base_url
+        self.max_concurrency = max_connections
+        self.pool = ConnectionPool(self.base_url, max_connections, username, password)
+        self.prefix = urlsplit(self.base_url).path
+
+        self._collections = set()
+        self._collections_lock = threading.Lock()
+
+    # --- Peticiones ---
+
+    def _url_path(self, rel_path):
+        return self.prefix + quote(rel_path)
+
+    def _request(self, method, rel_path, body=None, headers=None, expected=(200, 201, 204),
+                 idempotent=None):
+        """Hace una petición y comprueba el estado de la respuesta."""
+        status, response_headers, data = self.pool.request(method, self._url_path(rel_path),
+                                                           body, headers, idempotent)
+        if status not in expected:
+            raise WebDAVError(method, rel_path, status)
+        return status, data
+
+    def _ensure_collections(self, rel_path):
+        """Crea (una sola vez por sesión) las carpetas que contienen rel_path."""
+        parts = rel_path.split("/")[:-1]
+        for index in range(1, len(parts) + 1):
+            collection = "/".join(parts[:index])
+            with self._collections_lock:
+                if collection in self._collections:
+                    continue
+            # 405: ya existía
+            self._request("MKCOL", collection + "/", expected=(200, 201, 405))
+            with self._collections_lock:
+                self._collections.add(collection)
+
+    def _list(self, rel_dir):
+        """
+        Lista una carpeta remota con PROPFIND.
+
+        Returns:
+            Diccionario {nombre: tamaño} (vacío si la carpeta no existe)
+        """
+        body = (b'<?xml version="1.0" encoding="utf-8"?>'
+                b'<propfind xmlns="DAV:"><prop><getcontentlength/><resourcetype/></prop></propfind>')
+        status, data = self._request("PROPFIND", rel_dir.rstrip("/") + "/", body,
+                                     {"Depth": "1", "Content-Type": "application/xml"},
+                                     expected=(207, 404))
+        if status == 404:
+            return {}
+
+        listing = {}
+        own_path = unquote(self._url_path(rel_dir.rstrip("/") + "/")).rstrip("/")
+        for response in etree.fromstring(data).iter("{DAV:}response"):
+            href = unquote(urlsplit(response.findtext("{DAV:}href") or "").path).rstrip("/")
+            if href == own_path or not href:
+                continue
+            size = response.findtext(".//{DAV:}getcontentlength")
+            listing[href.rsplit("/", 1)[-1]] = int(size) if size else 0
+        return listing
+
+    # --- Archivos ---
+
+    def get(self, rel_path):
+        """Lee un archivo remoto completo."""
+        return self._request("GET", rel_path, expected=(200,))[1]
+
+    def put(self, rel_path, data):
+        """Escribe un archivo remoto.
+
+        Returns:
+            Campos adicionales para su entrada del manifiesto
+        """
+        self._ensure_collections(rel_path)
+        self._request("PUT", rel_path, data)
+        return {}
+
+    def delete(self, rel_path, entry=None):
+        """Borra un archivo remoto.
+
+        Los trozos de un archivo grande pueden ser también los de otro con el
+        mismo contenido: no se borran aquí sino en collect_garbage.
+        """
+        self._request("DELETE", rel_path, expected=(200, 204, 404))
+
+    @staticmethod
+    def _chunk_dir(digest):
+        return f"{REMOTE_META_DIR}/chunks/{digest}"
+
+    def upload(self, rel_path, local_path, old_entry=None):
+        """
+        Sube un archivo local, por trozos si es grande.
+
+        Returns:
+            Tupla (hash, tamaño, campos adicionales del manifiesto)
+        """
+        with open(local_path, 'rb') as f:
+            data = f.read(CHUNK_SIZE + 1)
+            if len(data) <= CHUNK_SIZE:
+                # Archivo pequeño: una sola petición
+                digest, size, extra = hashlib.sha256(data).hexdigest(), len(data), {}
+                self.put(rel_path, data)
+            else:
+                digest, size, extra = self._upload_chunks(f, data)
+                if old_entry and not old_entry.get("chunks") and not old_entry.get("deleted"):
+                    # Antes era pequeño: su copia entera ya no sirve
+                    self.delete(rel_path)
+        return digest, size, extra
+
+    def _upload_chunks(self, f, head):
+        """Sube un archivo abierto por trozos, saltando los que ya estén subidos."""
+        digest = hashlib.sha256(head)
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+        digest = digest.hexdigest()
+        size = f.tell()
+        count = -(-size // CHUNK_SIZE)
+
+        chunk_dir = self._chunk_dir(digest)
+        uploaded = self._list(chunk_dir)
+        self._ensure_collections(chunk_dir + "/")
+        for index in range(count):
+            name = f"{index:06d}"
+            expected_size = min(CHUNK_SIZE, size - index * CHUNK_SIZE)
+            if uploaded.get(name) == expected_size:
+                continue
+            f.seek(index * CHUNK_SIZE)
+            # Los trozos se nombran por contenido: reenviarlos no tiene efectos
+            self._request("PUT", f"{chunk_dir}/{name}", f.read(CHUNK_SIZE), idempotent=True)
+        return digest, size, {"chunks": count, "chunk_size": CHUNK_SIZE}
+
+    def download(self, rel_path, entry, destination):
+        """Baja un archivo remoto (o sus trozos) a un archivo abierto.
+
+        Returns:
+            Tupla (hash, bytes bajados)
+        """
+        if entry.get("chunks"):
+            paths = [f"{self._chunk_dir(entry['hash'])}/{index:06d}" for index in range(entry["chunks"])]
+        else:
+            paths = [rel_path]
+
+        digest = hashlib.sha256()
+        size = 0
+        for path in paths:
+            data = self.get(path)
+            digest.update(data)
+            destination.write(data)
+            size += len(data)
+
+        digest = digest.hexdigest()
+        if entry.get("hash") and digest != entry["hash"]:
+            raise OSError(f"{rel_path} ha llegado dañado del servidor")
+        return digest, size
+
+    # --- Manifiesto y cerrojo ---
+
+    def load_manifest(self):
+        """Carga el manifiesto remoto ({ruta: entrada}), vacío si no hay."""
+        status, data = self._request("GET", f"{REMOTE_META_DIR}/manifest.json", expected=(200, 404))
+        if status == 404:
+            return {}
+        return json.loads(data.decode('utf-8')).get("files", {})
+
+    def save_manifest(self, files, device):
+        """Guarda el manifiesto remoto de una vez."""
+        data = json.dumps({"files": files}, ensure_ascii=False).encode('utf-8')
+        self.put(f"{REMOTE_META_DIR}/manifest.json", data)
+
+    def collect_garbage(self, files):
+        """
+        Borra los trozos que no usa ningún archivo del manifiesto.
+
+        Se llama tras guardar el manifiesto al terminar una sincronización:
+        así se liberan los trozos de archivos borrados o cambiados y los de
+        subidas abandonadas, mientras que una subida interrumpida a media
+        sincronización conserva sus trozos para reanudarse.
+        """
+        referenced = {entry["hash"] for entry in files.values()
+                      if entry.get("chunks") and not entry.get("deleted")}
+        for name in self._list(f"{REMOTE_META_DIR}/chunks"):
+            if name not in referenced:
+                self._request("DELETE", f"{self._chunk_dir(name)}/", expected=(200, 204, 404))
+
+    def acquire_lock(self, device):
+        """Toma el cerrojo del destino (un PUT que solo funciona si no existe)."""
+        lock_path = f"{REMOTE_META_DIR}/lock"
+        if not self._collections:
+            # La propia carpeta de sincronización (405: ya existía)
+            self._request("MKCOL", "", expected=(200, 201, 405))
+        self._ensure_collections(lock_path)
+        for _ in range(2):
+            body = json.dumps({"device": device, "time": time.time()}).encode('utf-8')
+            status, _ = self._request("PUT", lock_path, body, {"If-None-Match": "*"},
+                                      expected=(200, 201, 204, 412))
+            if status != 412:
+                return
+
+            status, data = self._request("GET", lock_path, expected=(200, 404))
+            if status == 404:
+                continue
+            try:
+                age = time.time() - json.loads(data.decode('utf-8')).get("time", 0)
+            except (ValueError, UnicodeDecodeError, AttributeError):
+                age = self.LOCK_STALE_SECONDS
+            if age < self.LOCK_STALE_SECONDS:
+                break
+            # Cerrojo de una sincronización que no terminó
+            self._request("DELETE", lock_path, expected=(200, 204, 404))
+        raise SyncLockError("Otro dispositivo está sincronizando con este servidor")
+
+    def release_lock(self):
+        """Libera el cerrojo del destino."""
+        try:
+            self._request("DELETE", f"{REMOTE_META_DIR}/lock", expected=(200, 204, 404))
+        except OSError as e:
+            print(f"Error al liberar el cerrojo de sincronización: {e}")
+
+    def close(self):
+        """Cierra las conexiones."""
+        self.pool.close()
@@ -8,13 +8,18 @@ Permite la sincronización con servicios en la nube, respaldo automático y expo
 
 import os
 import json
-import shutil
-import zipfile
-import datetime
 import threading
-import time
 from PyQt6.QtCore import QObject, pyqtSignal
 
+from backup_store import BackupStore
+from backup_jobs import BackupJobRunner
+from sync_engine import FolderSync, SyncEngine
+from sync_http import WebDAVTransport
+import note_export
+import note_import
+from bundle import BundleWriter, read_bundle
+from reminder_store import ReminderStore
+
 class SyncManager(QObject):
     """
     Gestor de sincronización para NoteLite.
@@ -22,13 +27,36 @@ class SyncManager(QObject):
     """
     
     # Señales
-    sync_started = pyqtSignal()
+    sync_started = pyqtSignal(int, int)  # archivos, bytes a transferir
     sync_finished = pyqtSignal(bool, str)  # éxito, mensaje
+    backup_started = pyqtSignal()
+    backup_progress = pyqtSignal(str, int, int)  # fase, hechos, total
     backup_finished = pyqtSignal(bool, str)  # éxito, mensaje
+    verify_finished = pyqtSignal(bool, str)  # sin errores, mensaje
+    export_progress = pyqtSignal(int, int)  # hechos, total
+    import_progress = pyqtSignal(int, int)  # hechos, total
+    
+    # Resultado de una sincronización, para aplicarlo en el hilo de la interfaz
+    _sync_applied = pyqtSignal(object)
     
-    def __init__(self, data_manager):
+    def __init__(self, data_manager, retention=None, tag_manager=None,
+                 reminder_manager=None, templates_manager=None):
+        """
+        Inicializa el gestor.
+        
+        Args:
+            data_manager: Gestor de datos
+            retention: Retención de respaldos {"hourly", "daily", "weekly"}
+                (por defecto BackupStore.DEFAULT_RETENTION)
+            tag_manager: Gestor de etiquetas opcional (si no, se usan sus archivos)
+            reminder_manager: Gestor de recordatorios opcional
+            templates_manager: Gestor de plantillas opcional
+        """
         super().__init__()
         self.data_manager = data_manager
+        self.tag_manager = tag_manager
+        self.reminder_manager = reminder_manager
+        self.templates_manager = templates_manager
         self.sync_path = os.path.join(os.path.expanduser("~"), "NoteLite", "sync")
         self.backup_path = os.path.join(os.path.expanduser("~"), "NoteLite", "backups")
         
@@ -36,9 +64,28 @@ class SyncManager(QObject):
         os.makedirs(self.sync_path, exist_ok=True)
         os.makedirs(self.backup_path, exist_ok=True)
         
+        # Respaldos deduplicados de notas y configuración
+        data_dir = os.path.join(os.path.expanduser("~"), "NoteLite")
+        self.data_dir = data_dir
+        self.backup_store = BackupStore(data_dir, self.backup_path, retention=retention)
+        
+        # Los respaldos se ejecutan en segundo plano y a ritmo limitado
+        self.backup_runner = BackupJobRunner(self.backup_store)
+        self.backup_runner.backup_started.connect(self.backup_started)
+        self.backup_runner.backup_progress.connect(self.backup_progress)
+        self.backup_runner.backup_finished.connect(self.backup_finished)
+        self.backup_runner.verify_finished.connect(self.verify_finished)
+        
         # Configurar temporizador para respaldo automático
         self.backup_timer = None
         
+        # Sincronización en dos sentidos con self.sync_path (o self.sync_url)
+        self.sync_url = None
+        self._sync_credentials = (None, None)
+        self.sync_engine = None
+        self._sync_thread = None
+        self._sync_applied.connect(self._on_sync_applied)
+        
     def start_auto_backup(self, interval_minutes=30):
         """Inicia el respaldo automático con el intervalo especificado."""
         if self.backup_timer is None:
@@ -47,57 +94,138 @@ class SyncManager(QObject):
             self.backup_timer.start()
     
     def stop_auto_backup(self):
-        """Detiene el respaldo automático."""
+        """Detiene el respaldo automático (y cancela el que esté en marcha)."""
         if self.backup_timer:
             self.backup_timer.cancel()
             self.backup_timer = None
+        self.backup_runner.cancel()
     
     def _auto_backup_task(self):
         """Tarea de respaldo automático que se ejecuta periódicamente."""
-        self.create_backup()
+        # En el hilo del temporizador y a ritmo limitado
+        self.backup_runner.run(throttled=True)
+        self._clean_old_backups()
         # Reiniciar el temporizador para la próxima ejecución
         self.backup_timer = threading.Timer(30 * 60, self._auto_backup_task)
         self.backup_timer.daemon = True
         self.backup_timer.start()
     
     def create_backup(self):
-        """Crea un respaldo de todas las notas."""
+        """Crea un respaldo de las notas y la configuración y espera a que termine.
+        
+        Solo se leen los archivos modificados y solo se guardan los contenidos
+        nuevos; después se aplica la retención y se liberan los objetos que
+        ya no usa ningún respaldo. Desde la interfaz es preferible
+        start_backup(), que no bloquea.
+        """
+        result = self.backup_runner.run()
+        
+        # Limpiar respaldos antiguos en el formato anterior (ZIP completos)
+        self._clean_old_backups()
+        return result
+    
+    def start_backup(self, throttled=True):
+        """Inicia un respaldo en segundo plano.
+        
+        El avance llega por backup_progress y el resultado por backup_finished.
+        
+        Returns:
+            True si se ha iniciado, False si ya había uno en marcha
+        """
+        return self.backup_runner.start(throttled)
+    
+    def cancel_backup(self):
+        """Cancela el respaldo en marcha, si lo hay."""
+        self.backup_runner.cancel()
+    
+    def set_backup_options(self, compression_level=None, max_bytes_per_second=None,
+                           cpu_fraction=None):
+        """Cambia la compresión y los límites de E/S y CPU de los respaldos.
+        
+        Args:
+            compression_level: Nivel zlib 0-9 (menos es más rápido)
+            max_bytes_per_second: Límite de E/S (0 = sin límite)
+            cpu_fraction: Fracción de CPU, entre 0 y 1 (1 = sin límite)
+        """
+        if compression_level is not None:
+            self.backup_runner.compression_level = compression_level
+        if max_bytes_per_second is not None:
+            self.backup_runner.max_bytes_per_second = max_bytes_per_second
+        if cpu_fraction is not None:
+            self.backup_runner.cpu_fraction = cpu_fraction
+    
+    def verify_backups(self):
+        """Verifica todas las instantáneas de respaldo en segundo plano.
+        
+        Comprueba el hash de cada archivo respaldado contra su manifiesto, a
+        ritmo limitado y sin coincidir con un respaldo o su limpieza (usa el
+        mismo ejecutor que la verificación tras cada respaldo). El resultado
+        llega por verify_finished y el informe queda en
+        backup_runner.last_verify_report.
+        
+        Returns:
+            Tupla (iniciada, mensaje)
+        """
+        if not self.backup_runner.start_verification():
+            return False, "Ya hay un respaldo o una verificación en marcha"
+        return True, "Verificación iniciada"
+    
+    def set_backup_retention(self, hourly=None, daily=None, weekly=None):
+        """Cambia cuántos respaldos horarios, diarios y semanales se conservan."""
+        for rule, count in (("hourly", hourly), ("daily", daily), ("weekly", weekly)):
+            if count is not None:
+                self.backup_store.retention[rule] = count
+    
+    def list_backups(self):
+        """Obtiene los IDs de los respaldos, del más antiguo al más reciente."""
+        return self.backup_store.list_snapshots()
+    
+    def list_backup_notes(self, backup_id=None):
+        """Lista las notas de un respaldo (por defecto el último) sin extraerlas.
+        
+        Returns:
+            Lista de diccionarios {"id", "title", "updated_at", "size"}
+        """
         try:
-            # Crear nombre de archivo con marca de tiempo
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_file = os.path.join(self.backup_path, f"notelite_backup_{timestamp}.zip")
-            
-            # Crear archivo ZIP
-            with zipfile.ZipFile(backup_file, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # Añadir archivos de notas
-                notes_dir = os.path.join(os.path.expanduser("~"), "NoteLite", "notes")
-                if os.path.exists(notes_dir):
-                    for root, _, files in os.walk(notes_dir):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            arcname = os.path.relpath(file_path, os.path.dirname(notes_dir))
-                            zipf.write(file_path, arcname)
-                
-                # Añadir configuración
-                config_dir = os.path.join(os.path.expanduser("~"), "NoteLite", "config")
-                if os.path.exists(config_dir):
-                    for root, _, files in os.walk(config_dir):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            arcname = os.path.relpath(file_path, os.path.dirname(config_dir))
-                            zipf.write(file_path, arcname)
-            
-            # Limpiar respaldos antiguos (mantener solo los 5 más recientes)
-            self._clean_old_backups()
+            return self.backup_store.list_notes(backup_id)
+        except Exception as e:
+            print(f"Error al leer el índice del respaldo: {e}")
+            return []
+    
+    def restore_note(self, note_id, backup_id=None):
+        """Recupera una sola nota de un respaldo (por defecto el último).
+        
+        La nota vuelve a la colección con su ID, reemplazando la versión
+        actual si existe.
+        """
+        try:
+            note_data = self.backup_store.read_note(note_id, backup_id)
+            if note_data is None:
+                return False, "La nota no está en el respaldo"
+            self.data_manager.put_note(note_id, note_data)
+            return True, f"Nota restaurada: {note_data.get('title', '')}"
+        except Exception as e:
+            return False, f"Error al restaurar la nota: {str(e)}"
+    
+    def restore_backup(self, target_dir, backup_id=None, at=None):
+        """Restaura un respaldo (por defecto el último) en target_dir.
+        
+        Con at (datetime) se restaura la colección tal como estaba en ese
+        momento.
+        """
+        try:
+            if at is not None:
+                backup_id = self.backup_store.find_snapshot(at)
+                if backup_id is None:
+                    return False, "No hay respaldos anteriores a esa fecha"
             
-            self.backup_finished.emit(True, f"Respaldo creado: {os.path.basename(backup_file)}")
-            return True, backup_file
+            restored = self.backup_store.restore(target_dir, backup_id)
+            return True, f"{restored} archivos restaurados en {target_dir}"
         except Exception as e:
-            self.backup_finished.emit(False, f"Error al crear respaldo: {str(e)}")
-            return False, str(e)
+            return False, f"Error al restaurar respaldo: {str(e)}"
     
     def _clean_old_backups(self, keep=5):
-        """Limpia respaldos antiguos, manteniendo solo los más recientes."""
+        """Limpia respaldos completos antiguos (formato anterior), manteniendo los más recientes."""
         try:
             backups = []
             for file in os.listdir(self.backup_path):
@@ -115,101 +243,263 @@ class SyncManager(QObject):
             print(f"Error al limpiar respaldos antiguos: {e}")
     
     def export_notes(self, export_dir, format="json"):
-        """Exporta todas las notas al directorio especificado."""
+        """Exporta todas las notas al directorio especificado.
+        
+        Las notas se generan y escriben en paralelo; el avance llega por
+        export_progress.
+        """
         try:
-            os.makedirs(export_dir, exist_ok=True)
-            
-            # Obtener todas las notas
-            notes = self.data_manager.get_all_notes()
-            
-            # Exportar según el formato
-            if format == "json":
-                for note_id, note_data in notes.items():
-                    file_path = os.path.join(export_dir, f"{note_id}.json")
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        json.dump(note_data, f, ensure_ascii=False, indent=2)
-            
-            elif format == "txt":
-                for note_id, note_data in notes.items():
-                    file_path = os.path.join(export_dir, f"{note_data.get('title', 'Nota sin título')}.txt")
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(f"Título: {note_data.get('title', 'Sin título')}\n")
-                        f.write(f"Fecha: {note_data.get('updated_at', '')}\n")
-                        f.write("\n" + self._html_to_text(note_data.get('content', '')))
-            
-            elif format == "html":
-                for note_id, note_data in notes.items():
-                    file_path = os.path.join(export_dir, f"{note_data.get('title', 'Nota sin título')}.html")
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(f"<html><head><title>{note_data.get('title', 'Sin título')}</title></head>")
-                        f.write("<body>")
-                        f.write(f"<h1>{note_data.get('title', 'Sin título')}</h1>")
-                        f.write(f"<p><em>Fecha: {note_data.get('updated_at', '')}</em></p>")
-                        f.write(note_data.get('content', ''))
-                        f.write("</body></html>")
-            
-            return True, f"Notas exportadas a {export_dir}"
+            count = note_export.export_notes(
+                self.data_manager.get_all_notes(), export_dir, format,
+                progress=self.export_progress.emit)
+            return True, f"{count} notas exportadas a {export_dir}"
         except Exception as e:
             return False, f"Error al exportar notas: {str(e)}"
     
+    def import_notes(self, source):
+        """Importa una carpeta de archivos Markdown, texto o HTML, o un ENEX.
+        
+        Los archivos se interpretan en varios procesos y las notas se crean
+        por lotes; el avance llega por import_progress.
+        """
+        try:
+            created = note_import.import_notes(source, self.data_manager,
+                                               progress=self.import_progress.emit,
+                                               on_tags=self._create_missing_tags)
+            return True, f"{len(created)} notas importadas"
+        except Exception as e:
+            return False, f"Error al importar notas: {str(e)}"
+    
     def _html_to_text(self, html_content):
-        """Convierte contenido HTML a texto plano (implementación básica)."""
-        # Esta es una implementación muy básica, idealmente usaríamos BeautifulSoup
-        text = html_content
-        text = text.replace('<br>', '\n').replace('<br/>', '\n').replace('<br />', '\n')
-        text = text.replace('<p>', '\n').replace('</p>', '\n')
-        text = text.replace('<div>', '\n').replace('</div>', '\n')
-        text = text.replace('<li>', '\n- ').replace('</li>', '')
-        
-        # Eliminar otras etiquetas HTML (implementación muy básica)
-        while '<' in text and '>' in text:
-            start = text.find('<')
-            end = text.find('>', start)
-            if start != -1 and end != -1:
-                text = text[:start] + text[end+1:]
+        """Convierte contenido HTML a texto plano."""
+        return note_export.html_to_text(html_content)
+    
+    @staticmethod
+    def _format_size(size):
+        """Tamaño legible (B, KB, MB, GB)."""
+        for unit in ("B", "KB", "MB"):
+            if size < 1024:
+                return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+            size /= 1024
+        return f"{size:.1f} GB"
+    
+    def _read_json(self, *parts, default=None):
+        """Lee un archivo JSON de la carpeta de datos (default si no existe)."""
+        try:
+            with open(os.path.join(self.data_dir, *parts), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default
+    
+    def _write_json(self, data, *parts):
+        """Escribe un archivo JSON de la carpeta de datos de forma atómica."""
+        path = os.path.join(self.data_dir, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(path + ".tmp", path)
+    
+    def _reminder_store(self):
+        """Almacén de recordatorios: el de la aplicación o uno leído de disco."""
+        if self.reminder_manager is not None:
+            return self.reminder_manager
+        return ReminderStore(os.path.join(self.data_dir, "reminders"))
+    
+    def export_bundle(self, path, compress=None, include_media=True):
+        """Exporta toda la colección a un único archivo (ver bundle.py).
+        
+        Notas, etiquetas, plantillas, recordatorios y multimedia se escriben
+        en una sola pasada; con compress (o una ruta .gz) se comprime.
+        """
+        try:
+            with BundleWriter(path, compress) as writer:
+                for note_id, note_data in self.data_manager.get_all_notes().items():
+                    writer.write_note(note_id, note_data)
+                
+                if self.tag_manager is not None:
+                    writer.write_tags(self.tag_manager.get_all_tags())
+                else:
+                    writer.write_tags(self._read_json("tags", "tags.json", default={}))
+                
+                if self.templates_manager is not None:
+                    writer.write_templates(self.templates_manager.get_all_templates())
+                else:
+                    writer.write_templates(self._read_json("templates", "templates.json", default={}))
+                
+                for reminder in self._reminder_store().get_all_reminders():
+                    writer.write_reminder(reminder)
+                
+                media_dir = os.path.join(self.data_dir, "media")
+                if include_media and os.path.isdir(media_dir):
+                    for entry in os.scandir(media_dir):
+                        if entry.is_file() and not entry.name.endswith(".tmp"):
+                            writer.write_media(entry.name, entry.path)
+                
+                counts = writer.counts
+            return True, (f"Exportadas {counts['notes']} notas, {counts['reminders']} "
+                          f"recordatorios y {counts['media']} archivos multimedia a {path}")
+        except Exception as e:
+            return False, f"Error al exportar: {str(e)}"
+    
+    def import_bundle(self, path):
+        """Importa un archivo exportado con export_bundle.
+        
+        Las notas y recordatorios con el mismo ID se reemplazan; las
+        etiquetas y plantillas del paquete se añaden a las existentes. El
+        archivo se lee en una sola pasada, registro a registro.
+        """
+        counts = {"notes": 0, "tags": 0, "templates": 0, "reminders": 0, "media": 0}
+        reminder_store = None
+        try:
+            for record in read_bundle(path, os.path.join(self.data_dir, "media")):
+                kind = record["type"]
+                if kind == "note":
+                    self.data_manager.put_note(record["id"], record["data"])
+                    counts["notes"] += 1
+                elif kind == "tags":
+                    self._import_tags(record["data"])
+                    counts["tags"] += len(record["data"])
+                elif kind == "templates":
+                    self._import_templates(record["data"])
+                    counts["templates"] += len(record["data"])
+                elif kind == "reminder":
+                    reminder_store = reminder_store or self._reminder_store()
+                    reminder_store.put_reminder(record["data"])
+                    counts["reminders"] += 1
+                elif kind == "media":
+                    counts["media"] += 1
+        except Exception as e:
+            return False, f"Error al importar: {str(e)}"
+        finally:
+            if reminder_store is not None and reminder_store is not self.reminder_manager:
+                reminder_store.compact()
+        
+        return True, (f"Importadas {counts['notes']} notas, {counts['reminders']} "
+                      f"recordatorios y {counts['media']} archivos multimedia")
+    
+    def _import_tags(self, tags):
+        """Añade (o actualiza) definiciones de etiquetas."""
+        if self.tag_manager is None:
+            current = self._read_json("tags", "tags.json", default={})
+            current.update(tags)
+            self._write_json(current, "tags", "tags.json")
+            return
+        
+        for tag_name, tag_data in tags.items():
+            if tag_name in self.tag_manager.get_all_tags():
+                self.tag_manager.update_tag(tag_name, color=tag_data.get("color"),
+                                            icon=tag_data.get("icon"))
             else:
-                break
+                self.tag_manager.create_tag(tag_name, tag_data.get("color", "#CCCCCC"),
+                                            tag_data.get("icon"))
+    
+    def _create_missing_tags(self, tag_names):
+        """Da de alta las etiquetas usadas por notas importadas que aún no existen."""
+        if self.tag_manager is not None:
+            self.tag_manager.create_tags(sorted(tag_names))
+            return
+        
+        existing = self._read_json("tags", "tags.json", default={})
+        missing = {name: {"color": "#CCCCCC", "icon": "tag.png"}
+                   for name in sorted(tag_names) if name not in existing}
+        if missing:
+            self._import_tags(missing)
+    
+    def _import_templates(self, templates):
+        """Añade (o reemplaza) plantillas."""
+        current = self._read_json("templates", "templates.json", default={})
+        current.update(templates)
+        self._write_json(current, "templates", "templates.json")
+        if self.templates_manager is not None:
+            self.templates_manager.templates = self.templates_manager._load_templates()
+    
+    def set_sync_folder(self, sync_path):
+        """Cambia la carpeta (local o montada) con la que se sincroniza."""
+        self.sync_path = sync_path
+        self.sync_url = None
+        self._reset_sync_engine()
+    
+    def set_sync_url(self, url, username=None, password=None):
+        """
+        Sincroniza con un servidor WebDAV en lugar de con una carpeta.
+        
+        Además de las notas se sincronizan los archivos multimedia; los
+        grandes se suben por trozos y una subida interrumpida se reanuda en
+        la siguiente sincronización.
         
-        return text
+        Args:
+            url: URL de la carpeta del servidor (http:// o https://)
+            username: Usuario (opcional)
+            password: Contraseña
+        """
+        self.sync_url = url
+        self._sync_credentials = (username, password)
+        self._reset_sync_engine()
     
-    def simulate_cloud_sync(self):
+    def _reset_sync_engine(self):
+        """Descarta el motor de sincronización para crearlo con el nuevo destino."""
+        if self.sync_engine is not None:
+            self.sync_engine.transport.close()
+        self.sync_engine = None
+    
+    def _create_sync_engine(self):
+        """Crea el motor de sincronización para el destino configurado."""
+        state_dir = os.path.join(self.data_dir, "sync_state")
+        if self.sync_url:
+            username, password = self._sync_credentials
+            transport = WebDAVTransport(self.sync_url, username, password)
+            return SyncEngine(self.data_dir, transport, state_dir, roots=("notes", "media"))
+        return FolderSync(self.data_dir, self.sync_path, state_dir)
+    
+    def start_sync(self):
         """
-        Simula una sincronización con la nube.
-        En una implementación real, esto se conectaría con un servicio como Dropbox, Google Drive, etc.
+        Sincroniza las notas con la carpeta o el servidor de sincronización
+        en segundo plano.
+        
+        Solo se copian las notas que han cambiado en cada lado, varias a la
+        vez, y los borrados se propagan en los dos sentidos. sync_started
+        indica cuántos archivos y bytes se van a transferir; las notas
+        recibidas se recargan en el hilo de la interfaz y el resultado llega
+        por sync_finished.
+        
+        Returns:
+            Tupla (iniciada, mensaje)
         """
-        self.sync_started.emit()
+        if self._sync_thread is not None and self._sync_thread.is_alive():
+            return False, "Ya hay una sincronización en marcha"
+        
+        if self.sync_engine is None:
+            try:
+                self.sync_engine = self._create_sync_engine()
+            except ValueError as e:
+                return False, str(e)
         
-        # Simulamos un proceso que toma tiempo
         def sync_process():
-            time.sleep(2)  # Simulamos que la sincronización toma 2 segundos
-            
-            # Copiar los archivos de notas al directorio de sincronización
             try:
-                notes_dir = os.path.join(os.path.expanduser("~"), "NoteLite", "notes")
-                sync_notes_dir = os.path.join(self.sync_path, "notes")
-                os.makedirs(sync_notes_dir, exist_ok=True)
-                
-                if os.path.exists(notes_dir):
-                    for file in os.listdir(notes_dir):
-                        if file.endswith(".json"):
-                            shutil.copy2(
-                                os.path.join(notes_dir, file),
-                                os.path.join(sync_notes_dir, file)
-                            )
-                
-                # Crear un archivo de metadatos para simular información de sincronización
-                meta_file = os.path.join(self.sync_path, "sync_meta.json")
-                with open(meta_file, 'w', encoding='utf-8') as f:
-                    json.dump({
-                        "last_sync": datetime.datetime.now().isoformat(),
-                        "device": "PC",
-                        "status": "success"
-                    }, f, ensure_ascii=False, indent=2)
-                
-                self.sync_finished.emit(True, "Sincronización completada con éxito")
+                result = self.sync_engine.sync(on_plan=self.sync_started.emit)
             except Exception as e:
                 self.sync_finished.emit(False, f"Error en sincronización: {str(e)}")
+                return
+            self._sync_applied.emit(result)
         
-        # Iniciar proceso en un hilo separado
-        threading.Thread(target=sync_process, daemon=True).start()
+        self._sync_thread = threading.Thread(target=sync_process, daemon=True)
+        self._sync_thread.start()
         return True, "Sincronización iniciada"
+    
+    def _on_sync_applied(self, result):
+        """Recarga las notas que la sincronización cambió en disco (hilo de la interfaz)."""
+        local_changes = result["pulled"] + result["deleted_local"] + result["created_local"]
+        for rel_path in local_changes:
+            if rel_path.startswith("notes/") and rel_path.endswith(".json"):
+                self.data_manager.reload_note(rel_path[len("notes/"):-len(".json")])
+        
+        sent = len(result["pushed"]) + len(result["deleted_remote"])
+        received = len(result["pulled"]) + len(result["deleted_local"])
+        message = (f"Sincronización completada: {sent} cambios enviados "
+                   f"({self._format_size(result['bytes_sent'])}), {received} recibidos "
+                   f"({self._format_size(result['bytes_received'])})")
+        if result["merged"]:
+            message += f", {len(result['merged'])} fusionados"
+        if result["conflicts"]:
+            message += f", {len(result['conflicts'])} conflictos"
+        self.sync_finished.emit(True, message)
@@ -7,19 +7,29 @@ Permite organizar y filtrar notas mediante un sistema de etiquetas.
 """
 
 import os
+import re
 import json
+import heapq
+from bisect import bisect_left, insort
+from collections import Counter
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                             QLineEdit, QListWidget, QListWidgetItem,
-                            QPushButton, QColorDialog, QMenu, QDialog)
-from PyQt6.QtCore import Qt, pyqtSignal, QSize
+                            QPushButton, QColorDialog, QMenu, QDialog,
+                            QCompleter, QWidgetAction)
+from PyQt6.QtCore import Qt, pyqtSignal, QSize, QStringListModel
 from PyQt6.QtGui import QIcon, QColor, QPixmap
 
 
 class TagManager:
     """
     Gestor de etiquetas para organizar y clasificar notas.
+    
+    Las etiquetas pueden anidarse con "/" (por ejemplo "trabajo/clienteA/facturas").
+    Filtrar por una etiqueta incluye todas sus descendientes.
     """
     
+    SEPARATOR = "/"
+    
     def __init__(self, data_manager):
         """Inicializa el gestor de etiquetas."""
         self.data_manager = data_manager
@@ -31,6 +41,31 @@ class TagManager:
         # Cargar etiquetas existentes
         self.tags = self._load_tags()
         
+        # Índices en memoria, mantenidos de forma incremental
+        self._note_tags = {}      # note_id -> set de etiquetas de la nota
+        self._tag_notes = {}      # etiqueta -> set de note_ids
+        self._tag_counts = Counter()  # etiqueta -> nº de notas que la usan
+        self._ancestors = {}      # etiqueta -> tupla de ancestros (incluida ella)
+        self._descendants = {}    # etiqueta -> set de descendientes (incluida ella)
+        self._subtree_notes = {}  # etiqueta -> {note_id: nº de etiquetas del subárbol}
+        self._cooccurrence = {}   # etiqueta -> Counter {otra etiqueta: nº de notas}
+        self._leaf_index = {}     # último segmento en minúsculas -> set de etiquetas
+        self._sorted_names = []   # nombres de etiquetas definidas, ordenados
+        self._completion_keys = []  # (prefijo buscable en minúsculas, etiqueta), ordenado
+        self._build_indexes()
+        
+        # Caché de iconos: (etiqueta, color, tamaño, ratio) -> QPixmap
+        self._pixmap_cache = {}
+        
+        # Mantener los índices al día con los cambios de las notas
+        self.data_manager.add_listener(self._on_note_changed)
+        
+    @classmethod
+    def normalize_tag_name(cls, tag_name):
+        """Normaliza un nombre de etiqueta jerárquica ("a//b/ " -> "a/b")."""
+        parts = [part.strip() for part in tag_name.split(cls.SEPARATOR)]
+        return cls.SEPARATOR.join(part for part in parts if part)
+    
     def _load_tags(self):
         """Carga las etiquetas desde el sistema."""
         tags_file = os.path.join(self.tags_dir, "tags.json")
@@ -66,39 +101,369 @@ class TagManager:
             print(f"Error al guardar etiquetas: {e}")
             return False
     
+    def _build_indexes(self):
+        """Construye los índices de etiquetas a partir de todas las notas."""
+        for tag_name in self.tags:
+            self._register_tag_path(tag_name)
+        
+        self._sorted_names = sorted(self.tags)
+        self._completion_keys = sorted(
+            (key, tag_name) for tag_name in self.tags
+            for key in self._completion_keys_for(tag_name)
+        )
+        
+        for note_id, note_data in self.data_manager.get_all_notes().items():
+            self._on_note_changed(note_id, note_data)
+    
+    def _completion_keys_for(self, tag_name):
+        """Claves de autocompletado de una etiqueta: la ruta completa y cada segmento."""
+        lowered = tag_name.lower()
+        keys = {lowered}
+        keys.update(part for part in lowered.split(self.SEPARATOR) if part)
+        return keys
+    
+    def _define_tag(self, tag_name, tag_data):
+        """Añade una definición de etiqueta manteniendo el índice de autocompletado."""
+        if tag_name not in self.tags:
+            insort(self._sorted_names, tag_name)
+            for key in self._completion_keys_for(tag_name):
+                insort(self._completion_keys, (key, tag_name))
+        self.tags[tag_name] = tag_data
+        self._register_tag_path(tag_name)
+    
+    def _undefine_tag(self, tag_name):
+        """Elimina una definición de etiqueta y la devuelve (o None si no existía)."""
+        tag_data = self.tags.pop(tag_name, None)
+        if tag_data is not None:
+            self._sorted_names.pop(bisect_left(self._sorted_names, tag_name))
+            for key in self._completion_keys_for(tag_name):
+                self._completion_keys.pop(bisect_left(self._completion_keys, (key, tag_name)))
+        return tag_data
+    
+    def _register_tag_path(self, tag_name):
+        """Añade una etiqueta y sus ancestros al cierre jerárquico."""
+        if tag_name in self._ancestors:
+            return
+        
+        parts = tag_name.split(self.SEPARATOR)
+        ancestors = tuple(self.SEPARATOR.join(parts[:i]) for i in range(1, len(parts) + 1))
+        
+        # Los ancestros intermedios también forman parte del cierre
+        if len(ancestors) > 1:
+            self._register_tag_path(ancestors[-2])
+        
+        self._ancestors[tag_name] = ancestors
+        self._descendants[tag_name] = {tag_name}
+        self._leaf_index.setdefault(parts[-1].lower(), set()).add(tag_name)
+        for ancestor in ancestors[:-1]:
+            self._descendants[ancestor].add(tag_name)
+    
+    def _unregister_tag_path(self, tag_name):
+        """Elimina del cierre una etiqueta que ya no se usa ni está definida."""
+        if (tag_name not in self._ancestors or tag_name in self.tags
+                or self._tag_notes.get(tag_name)
+                or len(self._descendants[tag_name]) > 1):
+            return
+        
+        ancestors = self._ancestors.pop(tag_name)
+        del self._descendants[tag_name]
+        
+        leaf = tag_name.split(self.SEPARATOR)[-1].lower()
+        self._leaf_index[leaf].discard(tag_name)
+        if not self._leaf_index[leaf]:
+            del self._leaf_index[leaf]
+        self._subtree_notes.pop(tag_name, None)
+        for ancestor in ancestors[:-1]:
+            self._descendants[ancestor].discard(tag_name)
+        
+        # Un ancestro implícito puede haberse quedado sin uso
+        if len(ancestors) > 1:
+            self._unregister_tag_path(ancestors[-2])
+    
+    def _index_note_tag(self, note_id, tag_name):
+        """Registra en los índices que una nota tiene una etiqueta."""
+        self._register_tag_path(tag_name)
+        self._tag_notes.setdefault(tag_name, set()).add(note_id)
+        self._tag_counts[tag_name] += 1
+        
+        for ancestor in self._ancestors[tag_name]:
+            subtree = self._subtree_notes.setdefault(ancestor, {})
+            subtree[note_id] = subtree.get(note_id, 0) + 1
+    
+    def _unindex_note_tag(self, note_id, tag_name):
+        """Elimina de los índices que una nota tiene una etiqueta."""
+        notes = self._tag_notes.get(tag_name)
+        if notes is None or note_id not in notes:
+            return
+        
+        notes.discard(note_id)
+        if not notes:
+            del self._tag_notes[tag_name]
+        
+        self._tag_counts[tag_name] -= 1
+        if self._tag_counts[tag_name] <= 0:
+            del self._tag_counts[tag_name]
+        
+        for ancestor in self._ancestors[tag_name]:
+            subtree = self._subtree_notes[ancestor]
+            if subtree[note_id] > 1:
+                subtree[note_id] -= 1
+            else:
+                del subtree[note_id]
+        
+        self._unregister_tag_path(tag_name)
+    
+    def _on_note_changed(self, note_id, note_data):
+        """Actualiza los índices cuando se crea, modifica o elimina una nota."""
+        new_tags = set()
+        if note_data and isinstance(note_data.get("tags"), list):
+            new_tags = set(note_data["tags"])
+        old_tags = self._note_tags.get(note_id, set())
+        
+        if new_tags == old_tags:
+            return
+        
+        removed = old_tags - new_tags
+        added = new_tags - old_tags
+        
+        self._update_cooccurrence(old_tags, removed, -1)
+        for tag_name in removed:
+            self._unindex_note_tag(note_id, tag_name)
+        for tag_name in added:
+            self._index_note_tag(note_id, tag_name)
+        self._update_cooccurrence(new_tags, added, 1)
+        
+        if new_tags:
+            self._note_tags[note_id] = new_tags
+        else:
+            self._note_tags.pop(note_id, None)
+    
+    def _update_cooccurrence(self, note_tags, changed, delta):
+        """Suma delta a los pares de note_tags en los que interviene alguna de changed."""
+        if not changed:
+            return
+        
+        ordered = sorted(note_tags)
+        for i, tag_a in enumerate(ordered):
+            for tag_b in ordered[i + 1:]:
+                if tag_a not in changed and tag_b not in changed:
+                    continue
+                for first, second in ((tag_a, tag_b), (tag_b, tag_a)):
+                    counts = self._cooccurrence.setdefault(first, Counter())
+                    counts[second] += delta
+                    if counts[second] <= 0:
+                        del counts[second]
+                        if not counts:
+                            del self._cooccurrence[first]
+    
+    def get_cooccurring_tags(self, tag_name):
+        """Obtiene {etiqueta: nº de notas} con las etiquetas que acompañan a tag_name."""
+        return dict(self._cooccurrence.get(tag_name, {}))
+    
+    def suggest_tags(self, note_tags, text="", limit=5):
+        """Sugiere etiquetas para una nota.
+        
+        Combina la frecuencia con la que cada etiqueta aparece junto a las ya
+        aplicadas con las palabras del texto que coinciden con el nombre de una
+        etiqueta. Solo usa los índices en memoria, sin recorrer las notas.
+        
+        Args:
+            note_tags: Etiquetas ya aplicadas a la nota
+            text: Título y contenido de la nota (puede contener HTML)
+            limit: Número máximo de sugerencias
+            
+        Returns:
+            Lista de nombres de etiqueta, de la más a la menos relevante
+        """
+        applied = set(note_tags)
+        scores = Counter()
+        
+        # Probabilidad de aparecer junto a cada etiqueta aplicada
+        for tag_name in applied:
+            total = len(self._tag_notes.get(tag_name, ()))
+            if not total:
+                continue
+            for other, count in self._cooccurrence.get(tag_name, {}).items():
+                scores[other] += count / total
+        
+        # Palabras del texto que coinciden con el nombre de una etiqueta
+        if text:
+            plain_text = re.sub(r'<[^>]*>', ' ', text).lower()
+            for word in set(re.findall(r'\w+', plain_text)):
+                for tag_name in self._leaf_index.get(word, ()):
+                    scores[tag_name] += 1
+        
+        suggestions = [
+            tag_name for tag_name, _ in scores.most_common()
+            if tag_name not in applied and tag_name in self.tags
+        ]
+        return suggestions[:limit]
+    
     def get_all_tags(self):
         """Obtiene todas las etiquetas disponibles."""
         return self.tags
     
+    def get_tag_count(self, tag_name, include_descendants=False):
+        """Obtiene el número de notas que usan una etiqueta.
+        
+        Args:
+            tag_name: Nombre de la etiqueta
+            include_descendants: Si es True, cuenta las notas con la etiqueta o
+                con alguna de sus descendientes (cada nota una sola vez)
+        """
+        if include_descendants:
+            return len(self._subtree_notes.get(tag_name, ()))
+        return self._tag_counts.get(tag_name, 0)
+    
+    def get_tag_counts(self):
+        """Obtiene {etiqueta: nº de notas} para todas las etiquetas en uso."""
+        return dict(self._tag_counts)
+    
+    def get_top_tags(self, k=None):
+        """Obtiene las k etiquetas más usadas.
+        
+        Args:
+            k: Número de etiquetas a devolver (None para todas)
+            
+        Returns:
+            Lista de tuplas (etiqueta, nº de notas), de más a menos usada
+        """
+        def rank(item):
+            return (-item[1], item[0])
+        
+        if k is None:
+            return sorted(self._tag_counts.items(), key=rank)
+        return heapq.nsmallest(k, self._tag_counts.items(), key=rank)
+    
+    def get_sorted_tag_names(self):
+        """Obtiene los nombres de todas las etiquetas en orden alfabético.
+        
+        La lista se mantiene ordenada de forma incremental; no debe modificarse.
+        """
+        return self._sorted_names
+    
+    def complete_tags(self, prefix, limit=10):
+        """Autocompleta nombres de etiqueta a partir de un prefijo.
+        
+        El prefijo se compara, sin distinguir mayúsculas, con la ruta completa y
+        con cada segmento ("fac" encuentra "trabajo/clienteA/facturas"). Los
+        resultados se ordenan por número de notas y después alfabéticamente.
+        
+        Args:
+            prefix: Texto escrito por el usuario
+            limit: Número máximo de resultados (None para todos)
+            
+        Returns:
+            Lista de nombres de etiqueta
+        """
+        prefix = prefix.strip().lower()
+        
+        if prefix:
+            candidates = set()
+            i = bisect_left(self._completion_keys, (prefix,))
+            while i < len(self._completion_keys):
+                key, tag_name = self._completion_keys[i]
+                if not key.startswith(prefix):
+                    break
+                candidates.add(tag_name)
+                i += 1
+        else:
+            candidates = self._sorted_names
+        
+        def rank(tag_name):
+            return (-self.get_tag_count(tag_name, include_descendants=True), tag_name)
+        
+        if limit is None:
+            return sorted(candidates, key=rank)
+        return heapq.nsmallest(limit, candidates, key=rank)
+    
     def get_tag(self, tag_name):
         """Obtiene información de una etiqueta específica."""
         return self.tags.get(tag_name)
     
-    def create_tag(self, tag_name, color="#CCCCCC", icon=None):
-        """Crea una nueva etiqueta."""
-        if tag_name in self.tags:
+    def get_parent_tag(self, tag_name):
+        """Obtiene la etiqueta padre de una etiqueta anidada (o None)."""
+        ancestors = self._ancestors.get(tag_name)
+        if ancestors and len(ancestors) > 1:
+            return ancestors[-2]
+        return None
+    
+    def get_ancestor_tags(self, tag_name):
+        """Obtiene los ancestros de una etiqueta, del más general al más concreto."""
+        return list(self._ancestors.get(tag_name, ())[:-1])
+    
+    def get_descendant_tags(self, tag_name, include_self=True):
+        """Obtiene una etiqueta y todas sus descendientes."""
+        descendants = set(self._descendants.get(tag_name, ()))
+        if not include_self:
+            descendants.discard(tag_name)
+        return descendants
+    
+    def _define_tag_path(self, tag_name, color, icon):
+        """Define una etiqueta y los ancestros que falten, sin guardar.
+        
+        Returns:
+            True si la etiqueta no existía y se ha definido
+        """
+        tag_name = self.normalize_tag_name(tag_name)
+        if not tag_name or tag_name in self.tags:
             return False
         
-        self.tags[tag_name] = {
-            "color": color,
-            "icon": icon or "tag.png"
-        }
+        parts = tag_name.split(self.SEPARATOR)
+        for i in range(1, len(parts) + 1):
+            path = self.SEPARATOR.join(parts[:i])
+            if path not in self.tags:
+                self._define_tag(path, {
+                    "color": color,
+                    "icon": icon or "tag.png"
+                })
+        return True
+    
+    def create_tag(self, tag_name, color="#CCCCCC", icon=None):
+        """Crea una nueva etiqueta.
+        
+        Los ancestros que no existan se crean también con el mismo color.
+        """
+        if not self._define_tag_path(tag_name, color, icon):
+            return False
         
         return self._save_tags(self.tags)
     
+    def create_tags(self, tag_names, color="#CCCCCC", icon=None):
+        """Crea varias etiquetas de una vez, guardando tags.json una sola vez.
+        
+        Las que ya existen se ignoran. Devuelve el número de etiquetas creadas.
+        """
+        created = 0
+        for tag_name in tag_names:
+            if self._define_tag_path(tag_name, color, icon):
+                created += 1
+        
+        if created:
+            self._save_tags(self.tags)
+        return created
+    
     def update_tag(self, tag_name, new_name=None, color=None, icon=None):
-        """Actualiza una etiqueta existente."""
+        """Actualiza una etiqueta existente.
+        
+        Renombrar una etiqueta renombra también todo su subárbol en una sola
+        operación: cada nota afectada se reescribe una vez y las etiquetas se
+        guardan una vez.
+        """
         if tag_name not in self.tags:
             return False
         
+        if new_name:
+            new_name = self.normalize_tag_name(new_name)
+        
         if new_name and new_name != tag_name:
-            # Renombrar etiqueta
-            tag_data = self.tags[tag_name]
-            del self.tags[tag_name]
-            self.tags[new_name] = tag_data
+            if self._is_descendant(new_name, tag_name):
+                return False  # No se puede mover una etiqueta dentro de sí misma
+            self._invalidate_pixmaps(self.get_descendant_tags(tag_name))
+            self._rename_subtree(tag_name, new_name)
             
-            # Actualizar las notas que usan esta etiqueta
-            self._update_notes_with_tag(tag_name, new_name)
+        if color or icon:
+            self._invalidate_pixmaps({new_name or tag_name})
             
         if color:
             self.tags[new_name or tag_name]["color"] = color
@@ -108,53 +473,84 @@ class TagManager:
         
         return self._save_tags(self.tags)
     
+    def _is_descendant(self, tag_name, ancestor):
+        """Comprueba si tag_name está en el subárbol de ancestor."""
+        return tag_name == ancestor or tag_name.startswith(ancestor + self.SEPARATOR)
+    
+    def _rename_subtree(self, old_root, new_root):
+        """Renombra una etiqueta y todas sus descendientes en lote."""
+        renames = {
+            tag: new_root + tag[len(old_root):]
+            for tag in self.get_descendant_tags(old_root)
+        }
+        
+        # Renombrar las definiciones (si el destino ya existe, se fusionan)
+        for old_tag in sorted(renames, key=len):
+            tag_data = self._undefine_tag(old_tag)
+            new_tag = renames[old_tag]
+            if tag_data is not None and new_tag not in self.tags:
+                self._define_tag(new_tag, tag_data)
+            elif new_tag in self.tags:
+                self._register_tag_path(new_tag)
+        
+        # Ancestros del nuevo nombre que no existan como etiqueta
+        parent = self.get_parent_tag(new_root)
+        while parent and parent not in self.tags:
+            self._define_tag(parent, dict(self.tags[new_root]))
+            parent = self.get_parent_tag(parent)
+        
+        self._update_notes_with_tags(renames)
+        
+        for old_tag in sorted(renames, key=len, reverse=True):
+            self._unregister_tag_path(old_tag)
+    
     def delete_tag(self, tag_name):
-        """Elimina una etiqueta."""
+        """Elimina una etiqueta junto con todas sus descendientes."""
         if tag_name not in self.tags:
             return False
         
-        # Eliminar etiqueta de todas las notas que la usan
-        self._remove_tag_from_notes(tag_name)
+        removed = self.get_descendant_tags(tag_name)
+        self._invalidate_pixmaps(removed)
         
-        # Eliminar la etiqueta
-        del self.tags[tag_name]
+        # Eliminar las etiquetas de todas las notas que las usan
+        self._update_notes_with_tags({tag: None for tag in removed})
+        
+        # Eliminar las etiquetas
+        for tag in removed:
+            self._undefine_tag(tag)
+        for tag in sorted(removed, key=len, reverse=True):
+            self._unregister_tag_path(tag)
         
         return self._save_tags(self.tags)
     
-    def _update_notes_with_tag(self, old_tag, new_tag):
-        """Actualiza las notas que usan una etiqueta renombrada."""
-        all_notes = self.data_manager.get_all_notes()
-        
-        for note_id, note_data in all_notes.items():
-            if "tags" in note_data:
-                if old_tag in note_data["tags"]:
-                    # Reemplazar con la nueva etiqueta
-                    note_data["tags"].remove(old_tag)
-                    note_data["tags"].append(new_tag)
-                    self.data_manager.update_note(
-                        note_id, 
-                        note_data.get("title", ""),
-                        note_data.get("content", ""),
-                        note_data.get("type", "note"),
-                        note_data["tags"]
-                    )
-    
-    def _remove_tag_from_notes(self, tag_name):
-        """Elimina una etiqueta de todas las notas que la usan."""
-        all_notes = self.data_manager.get_all_notes()
-        
-        for note_id, note_data in all_notes.items():
-            if "tags" in note_data:
-                if tag_name in note_data["tags"]:
-                    # Quitar la etiqueta
-                    note_data["tags"].remove(tag_name)
-                    self.data_manager.update_note(
-                        note_id, 
-                        note_data.get("title", ""),
-                        note_data.get("content", ""),
-                        note_data.get("type", "note"),
-                        note_data["tags"]
-                    )
+    def _update_notes_with_tags(self, renames):
+        """Aplica un mapa {etiqueta: nuevo nombre o None} a las notas afectadas.
+        
+        Solo se recorren las notas que usan alguna de las etiquetas, y cada una
+        se guarda una única vez.
+        """
+        affected = set()
+        for tag in renames:
+            affected.update(self._tag_notes.get(tag, ()))
+        
+        for note_id in affected:
+            note_data = self.data_manager.get_note(note_id)
+            if not note_data:
+                continue
+            
+            new_tags = []
+            for tag in note_data.get("tags", []):
+                tag = renames.get(tag, tag)
+                if tag and tag not in new_tags:
+                    new_tags.append(tag)
+            
+            self.data_manager.update_note(
+                note_id,
+                note_data.get("title", ""),
+                note_data.get("content", ""),
+                note_data.get("type", "note"),
+                new_tags
+            )
     
     def add_tag_to_note(self, note_id, tag_name):
         """Añade una etiqueta a una nota."""
@@ -219,27 +615,55 @@ class TagManager:
             print(f"Error al eliminar etiqueta: {e}")
             return False
     
-    def get_notes_with_tag(self, tag_name):
-        """Obtiene todas las notas que tienen una etiqueta específica."""
-        all_notes = self.data_manager.get_all_notes()
+    def get_notes_with_tag(self, tag_name, include_descendants=True):
+        """Obtiene todas las notas que tienen una etiqueta específica.
+        
+        Args:
+            tag_name: Nombre de la etiqueta
+            include_descendants: Si es True, incluye las notas con etiquetas
+                descendientes (por ejemplo "trabajo/clienteA" para "trabajo")
+        """
+        if include_descendants:
+            note_ids = self._subtree_notes.get(tag_name, {})
+        else:
+            note_ids = self._tag_notes.get(tag_name, ())
         
+        all_notes = self.data_manager.get_all_notes()
         return {
-            note_id: note_data for note_id, note_data in all_notes.items()
-            if "tags" in note_data and tag_name in note_data["tags"]
+            note_id: all_notes[note_id] for note_id in note_ids
+            if note_id in all_notes
         }
     
-    def create_tag_pixmap(self, tag_name, size=16):
-        """Crea un QPixmap para una etiqueta."""
+    def create_tag_pixmap(self, tag_name, size=16, device_pixel_ratio=1.0):
+        """Crea un QPixmap para una etiqueta.
+        
+        Los pixmaps se guardan en caché por (etiqueta, color, tamaño, ratio de
+        píxeles), de modo que las listas y menús no repintan en cada refresco.
+        """
         tag_data = self.get_tag(tag_name)
         if not tag_data:
             return None
         
-        # Crear pixmap con el color de la etiqueta
-        color = QColor(tag_data.get("color", "#CCCCCC"))
-        pixmap = QPixmap(size, size)
-        pixmap.fill(color)
+        color_name = tag_data.get("color", "#CCCCCC")
+        key = (tag_name, color_name, size, device_pixel_ratio)
+        pixmap = self._pixmap_cache.get(key)
+        
+        if pixmap is None:
+            # Crear pixmap con el color de la etiqueta
+            physical_size = max(1, round(size * device_pixel_ratio))
+            pixmap = QPixmap(physical_size, physical_size)
+            pixmap.setDevicePixelRatio(device_pixel_ratio)
+            pixmap.fill(QColor(color_name))
+            self._pixmap_cache[key] = pixmap
         
         return pixmap
+    
+    def _invalidate_pixmaps(self, tag_names):
+        """Descarta de la caché los pixmaps de las etiquetas indicadas."""
+        self._pixmap_cache = {
+            key: pixmap for key, pixmap in self._pixmap_cache.items()
+            if key[0] not in tag_names
+        }
 
 
 class TagSelectorWidget(QWidget):
@@ -271,6 +695,13 @@ class TagSelectorWidget(QWidget):
         self.tag_input.setPlaceholderText("Nueva etiqueta...")
         add_layout.addWidget(self.tag_input)
         
+        # Autocompletado por prefijo sobre las etiquetas existentes
+        self.completer_model = QStringListModel(self)
+        self.completer = QCompleter(self.completer_model, self)
+        self.completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.tag_input.setCompleter(self.completer)
+        self.tag_input.textEdited.connect(self.update_completions)
+        
         add_btn = QPushButton("+")
         add_btn.setMaximumWidth(30)
         add_btn.clicked.connect(self.add_tag)
@@ -278,6 +709,16 @@ class TagSelectorWidget(QWidget):
         
         layout.addLayout(add_layout)
         
+        # Sugerencias según las etiquetas y el texto de la nota
+        self.suggestions_list = QListWidget()
+        self.suggestions_list.setMaximumHeight(30)
+        self.suggestions_list.setFlow(QListWidget.Flow.LeftToRight)
+        self.suggestions_list.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.suggestions_list.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.suggestions_list.setToolTip("Etiquetas sugeridas (clic para añadir)")
+        self.suggestions_list.itemClicked.connect(self.on_suggestion_clicked)
+        layout.addWidget(self.suggestions_list)
+        
         # Lista de etiquetas disponibles
         self.tags_list = QListWidget()
         self.tags_list.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
@@ -303,11 +744,18 @@ class TagSelectorWidget(QWidget):
         all_tags = self.tag_manager.get_all_tags()
         for tag_name, tag_data in all_tags.items():
             item = QListWidgetItem(tag_name)
-            item.setIcon(QIcon(self.tag_manager.create_tag_pixmap(tag_name)))
+            item.setIcon(QIcon(self.tag_manager.create_tag_pixmap(
+                tag_name, device_pixel_ratio=self.devicePixelRatioF())))
             self.tags_list.addItem(item)
         
         self.tags_list.sortItems()
     
+    def update_completions(self, text):
+        """Actualiza las sugerencias de autocompletado para el texto escrito."""
+        self.completer_model.setStringList(self.tag_manager.complete_tags(text, limit=20))
+        if text.strip():
+            self.completer.complete()
+    
     def set_note(self, note_id):
         """Establece la nota actual y carga sus etiquetas."""
         self.note_id = note_id
@@ -315,6 +763,7 @@ class TagSelectorWidget(QWidget):
         if not note_id:
             self.note_tags = []
             self.note_tags_list.clear()
+            self.suggestions_list.clear()
             return
         
         # Cargar etiquetas de la nota
@@ -333,12 +782,37 @@ class TagSelectorWidget(QWidget):
         
         for tag_name in self.note_tags:
             item = QListWidgetItem(tag_name)
-            item.setIcon(QIcon(self.tag_manager.create_tag_pixmap(tag_name)))
+            item.setIcon(QIcon(self.tag_manager.create_tag_pixmap(
+                tag_name, device_pixel_ratio=self.devicePixelRatioF())))
             self.note_tags_list.addItem(item)
+        
+        self.update_suggestions()
+    
+    def update_suggestions(self):
+        """Actualiza las etiquetas sugeridas para la nota actual."""
+        self.suggestions_list.clear()
+        
+        if not self.note_id:
+            return
+        
+        note_data = self.tag_manager.data_manager.get_note(self.note_id) or {}
+        text = f"{note_data.get('title', '')} {note_data.get('content', '')}"
+        
+        for tag_name in self.tag_manager.suggest_tags(self.note_tags, text):
+            item = QListWidgetItem(tag_name)
+            pixmap = self.tag_manager.create_tag_pixmap(
+                tag_name, device_pixel_ratio=self.devicePixelRatioF())
+            if pixmap:
+                item.setIcon(QIcon(pixmap))
+            self.suggestions_list.addItem(item)
+    
+    def on_suggestion_clicked(self, item):
+        """Añade a la nota la etiqueta sugerida sobre la que se hizo clic."""
+        self.add_tag_to_note(item.text())
     
     def add_tag(self):
         """Añade una nueva etiqueta."""
-        tag_name = self.tag_input.text().strip().lower()
+        tag_name = self.tag_manager.normalize_tag_name(self.tag_input.text().lower())
         
         if not tag_name:
             return
@@ -436,9 +910,9 @@ class TagSelectorWidget(QWidget):
         dialog = TagEditDialog(self.tag_manager, tag_name, self)
         
         if dialog.exec():
-            # Actualizar vistas
+            # Actualizar vistas (un renombrado cambia también las etiquetas de la nota)
             self.load_all_tags()
-            self.update_note_tags_list()
+            self.set_note(self.note_id)
     
     def delete_tag(self, tag_name):
         """Elimina una etiqueta."""
@@ -446,7 +920,8 @@ class TagSelectorWidget(QWidget):
         from PyQt6.QtWidgets import QMessageBox
         confirm = QMessageBox.question(
             self, "Confirmar eliminación",
-            f"¿Estás seguro de que deseas eliminar la etiqueta '{tag_name}'?",
+            f"¿Estás seguro de que deseas eliminar la etiqueta '{tag_name}' "
+            "y todas sus subetiquetas?",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         
@@ -456,10 +931,13 @@ class TagSelectorWidget(QWidget):
                 self.load_all_tags()
                 
                 # Actualizar lista de etiquetas de la nota si es necesario
-                if tag_name in self.note_tags:
-                    self.note_tags.remove(tag_name)
-                    self.update_note_tags_list()
-                    self.tags_changed.emit(self.note_tags)
+                if self.note_id:
+                    note_data = self.tag_manager.data_manager.get_note(self.note_id)
+                    note_tags = note_data.get("tags", []) if note_data else []
+                    if note_tags != self.note_tags:
+                        self.note_tags = note_tags
+                        self.update_note_tags_list()
+                        self.tags_changed.emit(self.note_tags)
 
 
 class TagEditDialog(QDialog):
@@ -502,7 +980,8 @@ class TagEditDialog(QDialog):
         
         self.preview_label = QLabel(self.tag_name)
         if self.tag_data:
-            pixmap = self.tag_manager.create_tag_pixmap(self.tag_name, 24)
+            pixmap = self.tag_manager.create_tag_pixmap(
+                self.tag_name, 24, self.devicePixelRatioF())
             self.preview_label.setPixmap(pixmap)
         preview_layout.addWidget(self.preview_label)
         
@@ -549,6 +1028,8 @@ class TagEditDialog(QDialog):
             QMessageBox.warning(self, "Error", "El nombre de la etiqueta no puede estar vacío.")
             return
         
+        new_name = self.tag_manager.normalize_tag_name(new_name)
+        
         # Si se cambió el nombre, verificar que no existe
         if new_name != self.tag_name and new_name in self.tag_manager.get_all_tags():
             from PyQt6.QtWidgets import QMessageBox
@@ -572,6 +1053,8 @@ class TagFilterWidget(QWidget):
     
     filter_changed = pyqtSignal(list)  # Emitida cuando cambia el filtro
     
+    MAX_MENU_TAGS = 200  # Etiquetas mostradas a la vez en el selector
+    
     def __init__(self, tag_manager, parent=None):
         super().__init__(parent)
         self.tag_manager = tag_manager
@@ -610,29 +1093,53 @@ class TagFilterWidget(QWidget):
     
     def show_tag_selector(self):
         """Muestra el selector de etiquetas para filtrar."""
-        all_tags = self.tag_manager.get_all_tags()
-        
-        # Crear menú con todas las etiquetas
+        # Crear menú con un campo de búsqueda y las etiquetas
         menu = QMenu(self)
         
-        for tag_name in sorted(all_tags.keys()):
-            action = menu.addAction(tag_name)
-            action.setCheckable(True)
-            action.setChecked(tag_name in self.selected_tags)
+        search_input = QLineEdit()
+        search_input.setPlaceholderText("Buscar etiqueta...")
+        search_action = QWidgetAction(menu)
+        search_action.setDefaultWidget(search_input)
+        menu.addAction(search_action)
+        menu.addSeparator()
+        
+        def populate(prefix=""):
+            # Quitar las etiquetas mostradas (se conservan búsqueda y separador)
+            for action in menu.actions()[2:]:
+                menu.removeAction(action)
+                action.deleteLater()
             
-            # Añadir icono
-            pixmap = self.tag_manager.create_tag_pixmap(tag_name)
-            if pixmap:
-                action.setIcon(QIcon(pixmap))
+            if prefix.strip():
+                tag_names = self.tag_manager.complete_tags(prefix, limit=self.MAX_MENU_TAGS)
+            else:
+                tag_names = self.tag_manager.get_sorted_tag_names()[:self.MAX_MENU_TAGS]
+            
+            for tag_name in tag_names:
+                action = menu.addAction(tag_name)
+                action.setCheckable(True)
+                action.setChecked(tag_name in self.selected_tags)
+                
+                # Añadir icono
+                pixmap = self.tag_manager.create_tag_pixmap(
+                    tag_name, device_pixel_ratio=self.devicePixelRatioF())
+                if pixmap:
+                    action.setIcon(QIcon(pixmap))
+        
+        populate()
+        search_input.textChanged.connect(populate)
         
         # Conectar acciones
         menu.triggered.connect(self.toggle_filter_tag)
         
         # Mostrar menú
+        search_input.setFocus()
         menu.exec(self.mapToGlobal(self.rect().bottomRight()))
     
     def toggle_filter_tag(self, action):
         """Alterna una etiqueta en el filtro."""
+        if not action.isCheckable():
+            return
+        
         tag_name = action.text()
         
         if action.isChecked():
@@ -671,7 +1178,8 @@ class TagFilterWidget(QWidget):
         
         for tag_name in self.selected_tags:
             item = QListWidgetItem(f" {tag_name} ✕")
-            pixmap = self.tag_manager.create_tag_pixmap(tag_name)
+            pixmap = self.tag_manager.create_tag_pixmap(
+                tag_name, device_pixel_ratio=self.devicePixelRatioF())
             if pixmap:
                 item.setIcon(QIcon(pixmap))
             self.filter_list.addItem(item)
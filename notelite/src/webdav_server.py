@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Servidor WebDAV mínimo para NoteLite.
+Sirve una carpeta con el subconjunto de WebDAV que usa la sincronización
+(GET, HEAD, PUT, DELETE, MKCOL y PROPFIND de profundidad 0 o 1). Sirve para
+sincronizar equipos de una red local sin un servidor WebDAV completo y para
+probar la sincronización por HTTP.
+
+Uso:
+    python webdav_server.py --root ~/NoteLiteServer --port 8080
+"""
+
+import os
+import base64
+import shutil
+import argparse
+import threading
+import email.utils
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, quote, unquote
+from xml.sax.saxutils import escape
+
+
+# Bloque de lectura y escritura de los cuerpos
+BLOCK_SIZE = 1024 * 1024
+
+
+class WebDAVRequestHandler(BaseHTTPRequestHandler):
+    """Atiende las peticiones sobre la carpeta del servidor."""
+
+    # Conexiones persistentes
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # --- Utilidades ---
+
+    def _fs_path(self):
+        """Ruta en disco de la petición (None si sale de la carpeta servida)."""
+        path = unquote(urlsplit(self.path).path)
+        root = self.server.root
+        full_path = os.path.realpath(os.path.join(root, *[part for part in path.split("/") if part]))
+        if full_path != root and not full_path.startswith(root + os.sep):
+            return None
+        return full_path
+
+    def _send(self, status, body=b"", content_type="text/plain; charset=utf-8", headers=None):
+        """Envía una respuesta completa."""
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _read_body(self):
+        """Lee el cuerpo de la petición."""
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _authorized(self):
+        """Comprueba la autenticación básica (si el servidor la pide)."""
+        if not self.server.credentials:
+            return True
+        header = self.headers.get("Authorization", "")
+        if header.startswith("Basic "):
+            try:
+                if base64.b64decode(header[6:]).decode('utf-8') == self.server.credentials:
+                    return True
+            except (ValueError, UnicodeDecodeError):
+                pass
+        self._read_body()
+        self._send(401, headers={"WWW-Authenticate": 'Basic realm="NoteLite"'})
+        return False
+
+    def _prepare(self):
+        """Autentica y resuelve la ruta; responde el error si no es válida."""
+        if not self._authorized():
+            return None
+        path = self._fs_path()
+        if path is None:
+            self._read_body()
+            self._send(403)
+        return path
+
+    # --- Métodos ---
+
+    def do_OPTIONS(self):
+        self._send(200, headers={"DAV": "1",
+                                 "Allow": "OPTIONS, GET, HEAD, PUT, DELETE, MKCOL, PROPFIND"})
+
+    def do_GET(self):
+        path = self._prepare()
+        if path is None:
+            return
+        if not os.path.isfile(path):
+            self._send(404)
+            return
+
+        size = os.path.getsize(path)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        if self.command == "HEAD":
+            return
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+                self.wfile.write(block)
+
+    do_HEAD = do_GET
+
+    def do_PUT(self):
+        path = self._prepare()
+        if path is None:
+            return
+        if not os.path.isdir(os.path.dirname(path)):
+            self._read_body()
+            self._send(409)
+            return
+
+        temp_path = f"{path}.{threading.get_ident()}.part"
+        remaining = int(self.headers.get("Content-Length") or 0)
+        with open(temp_path, 'wb') as f:
+            while remaining > 0:
+                block = self.rfile.read(min(BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                f.write(block)
+                remaining -= len(block)
+        if remaining > 0:
+            os.remove(temp_path)
+            self.close_connection = True
+            return
+
+        with self.server.write_lock:
+            existed = os.path.exists(path)
+            if existed and self.headers.get("If-None-Match") == "*":
+                os.remove(temp_path)
+                self._send(412)
+                return
+            os.replace(temp_path, path)
+        self._send(204 if existed else 201)
+
+    def do_DELETE(self):
+        path = self._prepare()
+        if path is None:
+            return
+        if path == self.server.root:
+            self._send(403)
+        elif os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+            self._send(204)
+        elif os.path.exists(path):
+            os.remove(path)
+            self._send(204)
+        else:
+            self._send(404)
+
+    def do_MKCOL(self):
+        path = self._prepare()
+        if path is None:
+            return
+        self._read_body()
+        if os.path.exists(path):
+            self._send(405)
+        elif not os.path.isdir(os.path.dirname(path)):
+            self._send(409)
+        else:
+            try:
+                os.mkdir(path)
+            except FileExistsError:
+                self._send(405)
+                return
+            self._send(201)
+
+    def do_PROPFIND(self):
+        path = self._prepare()
+        if path is None:
+            return
+        self._read_body()
+        if not os.path.exists(path):
+            self._send(404)
+            return
+
+        href = urlsplit(self.path).path
+        entries = [(href, path)]
+        if os.path.isdir(path) and self.headers.get("Depth", "1") != "0":
+            base = href if href.endswith("/") else href + "/"
+            entries.extend((base + quote(name), os.path.join(path, name))
+                           for name in sorted(os.listdir(path)) if not name.endswith(".part"))
+
+        responses = []
+        for entry_href, entry_path in entries:
+            try:
+                stat = os.stat(entry_path)
+            except OSError:
+                continue
+            is_dir = os.path.isdir(entry_path)
+            if is_dir and not entry_href.endswith("/"):
+                entry_href += "/"
+            props = ["<D:resourcetype><D:collection/></D:resourcetype>" if is_dir
+                     else f"<D:resourcetype/><D:getcontentlength>{stat.st_size}</D:getcontentlength>",
+                     f"<D:getlastmodified>{email.utils.formatdate(stat.st_mtime, usegmt=True)}"
+                     f"</D:getlastmodified>"]
+            responses.append(f"<D:response><D:href>{escape(entry_href)}</D:href>"
+                             f"<D:propstat><D:prop>{''.join(props)}</D:prop>"
+                             f"<D:status>HTTP/1.1 200 OK</D:status></D:propstat></D:response>")
+
+        body = ('<?xml version="1.0" encoding="utf-8"?>'
+                f'<D:multistatus xmlns:D="DAV:">{"".join(responses)}</D:multistatus>')
+        self._send(207, body.encode('utf-8'), "application/xml; charset=utf-8")
+
+
+class WebDAVServer(ThreadingHTTPServer):
+    """Servidor WebDAV sobre una carpeta, con un hilo por conexión."""
+
+    daemon_threads = True
+
+    def __init__(self, root, host="127.0.0.1", port=8080, username=None, password=None,
+                 verbose=False):
+        """
+        Inicializa el servidor.
+
+        Args:
+            root: Carpeta servida
+            host: Dirección en la que escuchar
+            port: Puerto (0 para uno libre cualquiera)
+            username: Usuario exigido (opcional)
+            password: Contraseña exigida
+            verbose: Registrar cada petición
+        """
+        os.makedirs(root, exist_ok=True)
+        self.root = os.path.realpath(root)
+        self.credentials = f"{username}:{password or ''}" if username else None
+        self.verbose = verbose
+        self.write_lock = threading.Lock()
+        super().__init__((host, port), WebDAVRequestHandler)
+
+    @property
+    def url(self):
+        """URL base del servidor."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        """Atiende peticiones en un hilo aparte."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Detiene el servidor."""
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor WebDAV mínimo para sincronizar NoteLite")
+    parser.add_argument("--root", default=os.path.join(os.path.expanduser("~"), "NoteLiteServer"),
+                        help="Carpeta servida")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección en la que escuchar")
+    parser.add_argument("--port", type=int, default=8080, help="Puerto")
+    parser.add_argument("--user", help="Usuario exigido")
+    parser.add_argument("--password", help="Contraseña exigida")
+    args = parser.parse_args()
+
+    server = WebDAVServer(args.root, args.host, args.port, args.user, args.password, verbose=True)
+    print(f"Sirviendo {server.root} en {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()